@@ -0,0 +1,140 @@
+"""
+Admission Control Module for EstimAgent
+Bounded concurrency and a bounded wait queue in front of expensive endpoints, so bursts
+are shed quickly with a Retry-After hint instead of exhausting memory.
+"""
+
+import math
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted (queue full or waited too long)."""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Admit at most `max_concurrent` requests at once and queue up to `max_queue` more.
+
+    - Queue full: rejected immediately with 429.
+    - Queued longer than `max_wait`: rejected with 503.
+
+    Both carry a Retry-After estimate derived from the recent average service time.
+    Must be used from a single event loop.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait: float):
+        """
+        Initialize AdmissionController.
+
+        Args:
+            name: Label used in logs, errors and stats
+            max_concurrent: Requests allowed to run at the same time
+            max_queue: Requests allowed to wait for a slot
+            max_wait: Seconds a queued request may wait before it is rejected
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._active = 0
+        self._queued = 0
+
+        self._admitted = 0
+        self._rejected_queue_full = 0
+        self._rejected_timeout = 0
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+        self._avg_service = 0.0  # EWMA of time a slot is held, in seconds
+        self._started: Dict[Hashable, float] = {}
+
+    async def acquire(self, owner: Optional[Hashable] = None) -> float:
+        """
+        Wait for a slot.
+
+        Args:
+            owner: Key the slot is held under until `release(owner)`; defaults to the
+                   current task. Pass one when the slot is released from elsewhere
+                   (e.g. a callback once background work finishes).
+
+        Returns:
+            Seconds spent queued
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait exceeds max_wait
+        """
+        # Counted ourselves rather than via Semaphore.locked(): a waiter that has not started
+        # its acquire yet still holds a place in line
+        if self._active + self._queued >= self.max_concurrent + self.max_queue:
+            self._rejected_queue_full += 1
+            logger.warning(f"Admission '{self.name}': queue full ({self._queued} waiting), rejecting")
+            raise AdmissionRejected(
+                f"Server busy: {self._queued} {self.name} requests already queued. Please retry shortly.",
+                status_code=429,
+                retry_after=self._retry_after(),
+            )
+
+        self._queued += 1
+        enqueued = time.monotonic()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self._rejected_timeout += 1
+            logger.warning(f"Admission '{self.name}': waited {self.max_wait:g}s without a slot, rejecting")
+            raise AdmissionRejected(
+                f"Server busy: no {self.name} slot became free within {self.max_wait:g}s. Please retry shortly.",
+                status_code=503,
+                retry_after=self._retry_after(),
+            )
+        finally:
+            self._queued -= 1
+
+        waited = time.monotonic() - enqueued
+        self._active += 1
+        self._admitted += 1
+        self._total_wait += waited
+        self._max_wait_seen = max(self._max_wait_seen, waited)
+        self._started[owner if owner is not None else id(asyncio.current_task())] = time.monotonic()
+        return waited
+
+    def release(self, owner: Optional[Hashable] = None) -> None:
+        """Give the slot back (held under `owner`, as passed to acquire) and record how long it was held."""
+        started = self._started.pop(owner if owner is not None else id(asyncio.current_task()), None)
+        if started is not None:
+            held = time.monotonic() - started
+            self._avg_service = held if self._avg_service == 0.0 else 0.8 * self._avg_service + 0.2 * held
+        self._active -= 1
+        self._slots.release()
+
+    def _retry_after(self) -> int:
+        """Seconds until a slot is likely to be free for a new request."""
+        service = self._avg_service or 1.0
+        rounds = (self._queued + 1) / max(1, self.max_concurrent)
+        return max(1, math.ceil(service * rounds))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "max_wait_s": self.max_wait,
+            "active": self._active,
+            "queued": self._queued,
+            "admitted": self._admitted,
+            "rejected_queue_full": self._rejected_queue_full,
+            "rejected_timeout": self._rejected_timeout,
+            "avg_wait_ms": round(1000 * self._total_wait / self._admitted, 1) if self._admitted else 0.0,
+            "max_wait_ms": round(1000 * self._max_wait_seen, 1),
+            "avg_service_s": round(self._avg_service, 3),
+        }
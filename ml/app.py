@@ -3,25 +3,41 @@ from __future__ import annotations
 
 import io
 import json
+import asyncio
 import os
 import uuid
 import shutil
 import base64
+import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import Depends, FastAPI, File, Form, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, PlainTextResponse, FileResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from PIL import Image
 from dotenv import load_dotenv
-from inference_sdk import InferenceHTTPClient
 import torch
 from ultralytics import YOLO
 import numpy as np
 from pdf_processor import PDFProcessor
+from admission import AdmissionController, AdmissionRejected
+from result_cache import ResultCache, hash_bytes, make_cache_key
+from roboflow_client import DETECT_API_URL, SERVERLESS_API_URL, RoboflowClient, RoboflowClientPool
+from rate_limiter import PRIORITY_BATCH, PRIORITY_INTERACTIVE, KeyedRateLimiter
+from yolo_batcher import BatchedYOLO
+from geometry import PolygonBatch, dedupe_polygons
+from compact import RESPONSE_FORMATS, compact_response
+from serialization import ResponseEncoder, dumps, encode_event, loads, negotiate_stream_type
+from pdf_jobs import JOB_DONE, JOB_FAILED, PdfJob, PdfJobQueue, load_job_state
+from ensemble import FUSION_METHODS, MATCHING_METHODS, ensemble_predictions
+from tiling import TileSpec, merge_tiled_predictions, shift_predictions, tile_windows
 
 # ------------------------------------------------------------------------------
 # Env & constants
@@ -53,12 +69,21 @@ ROOM_MODEL_ID = ""
 if ROOM_PROJECT and ROOM_VERSION:
     ROOM_MODEL_ID = f"{ROOM_PROJECT}/{ROOM_VERSION}"
 
+def _model_file_version(path: str) -> str:
+    """Identify a local weights file by name and modification time (used in cache keys)."""
+    try:
+        return f"{os.path.basename(path)}@{int(os.path.getmtime(path))}"
+    except OSError:
+        return os.path.basename(path)
+
 # Load custom room detection model if available
 CUSTOM_ROOM_MODEL = None
+CUSTOM_ROOM_MODEL_VERSION = ""
 CUSTOM_ROOM_MODEL_PATH = os.getenv("CUSTOM_ROOM_MODEL_PATH")
 if CUSTOM_ROOM_MODEL_PATH and os.path.exists(CUSTOM_ROOM_MODEL_PATH):
     try:
         CUSTOM_ROOM_MODEL = YOLO(CUSTOM_ROOM_MODEL_PATH)
+        CUSTOM_ROOM_MODEL_VERSION = _model_file_version(CUSTOM_ROOM_MODEL_PATH)
         print(f"[ML] Loaded custom room detection model from {CUSTOM_ROOM_MODEL_PATH}")
     except Exception as e:
         print(f"[WARNING] Failed to load custom room detection model: {e}")
@@ -86,9 +111,147 @@ PAGE_VERSION = os.getenv("PAGE_VERSION", "")
 # Initialize PDF processor (will be configured with classify_fn after _classify_image is defined)
 pdf_processor = None
 
+# Long-lived Roboflow clients with keep-alive connections, shared by all endpoints
+ROBOFLOW_POOL_MAXSIZE = int(os.getenv("ROBOFLOW_POOL_MAXSIZE", "16"))
+ROBOFLOW_POOL_BLOCK = os.getenv("ROBOFLOW_POOL_BLOCK", "false").lower() in ("1", "true", "yes")
+ROBOFLOW_MAX_RETRIES = int(os.getenv("ROBOFLOW_MAX_RETRIES", "2"))
+ROBOFLOW_TIMEOUT = float(os.getenv("ROBOFLOW_TIMEOUT", "60"))
+
+roboflow_pool = RoboflowClientPool(
+    pool_maxsize=ROBOFLOW_POOL_MAXSIZE,
+    pool_block=ROBOFLOW_POOL_BLOCK,
+    max_retries=ROBOFLOW_MAX_RETRIES,
+    timeout=ROBOFLOW_TIMEOUT,
+)
+
+# Per-API-key token buckets for outbound Roboflow calls. Each key can be given its own
+# quota (e.g. ROOM_RATE_PER_SEC / ROOM_RATE_BURST); interactive calls are served first.
+ROBOFLOW_RATE_PER_SEC = float(os.getenv("ROBOFLOW_RATE_PER_SEC", "10"))
+ROBOFLOW_RATE_BURST = float(os.getenv("ROBOFLOW_RATE_BURST", "20"))
+ROBOFLOW_RATE_MAX_WAIT = float(os.getenv("ROBOFLOW_RATE_MAX_WAIT", "60"))
+
+rate_limiter = KeyedRateLimiter(ROBOFLOW_RATE_PER_SEC, ROBOFLOW_RATE_BURST, max_wait=ROBOFLOW_RATE_MAX_WAIT)
+for _label, _key in (
+    ("room", ROOM_API_KEY),
+    ("wall", WALL_API_KEY),
+    ("doorwindow", DOORWINDOW_API_KEY),
+    ("page", PAGE_API_KEY),
+):
+    _rate = os.getenv(f"{_label.upper()}_RATE_PER_SEC")
+    _burst = os.getenv(f"{_label.upper()}_RATE_BURST")
+    rate_limiter.configure(
+        _key,
+        float(_rate) if _rate else None,
+        float(_burst) if _burst else None,
+        _label,
+    )
+
+# Shared, bounded executor for blocking model calls. Endpoints await these calls
+# instead of blocking the event loop, so one worker keeps many analyses in flight.
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "32"))
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+
+async def _run_to_completion(work: Awaitable[Any]) -> Any:
+    """
+    Await blocking work running in a thread. A thread cannot be interrupted, so if the
+    caller is cancelled this still waits for the work to finish before re-raising: whatever
+    the caller holds (model slots, an admission slot) stays held while the thread is busy.
+    """
+    future = asyncio.ensure_future(work)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait([future])
+        raise
+
+async def _run_inference(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking model call on the shared inference executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await _run_to_completion(loop.run_in_executor(inference_executor, lambda: fn(*args)))
+
+# Bounded fan-out for /analyze-pages: a global cap on in-flight model calls
+# (also the number of pages in progress per request) plus a per-model cap
+PAGE_ANALYSIS_CONCURRENCY = int(os.getenv("PAGE_ANALYSIS_CONCURRENCY", "16"))
+PAGE_ANALYSIS_MODEL_CONCURRENCY = int(os.getenv("PAGE_ANALYSIS_MODEL_CONCURRENCY", "8"))
+_page_analysis_slots = asyncio.Semaphore(PAGE_ANALYSIS_CONCURRENCY)
+_page_model_slots: Dict[str, asyncio.Semaphore] = {}
+
+# Admission control: bounded concurrency plus a bounded wait queue per endpoint class.
+# Single-image analyses and PDF work (render/classify/analyze pages) are admitted separately
+# so a burst of PDF uploads cannot starve interactive /analyze calls.
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "30"))
+ANALYZE_MAX_CONCURRENT = int(os.getenv("ANALYZE_MAX_CONCURRENT", "16"))
+ANALYZE_MAX_QUEUE = int(os.getenv("ANALYZE_MAX_QUEUE", "64"))
+PDF_MAX_CONCURRENT = int(os.getenv("PDF_MAX_CONCURRENT", "2"))
+PDF_MAX_QUEUE = int(os.getenv("PDF_MAX_QUEUE", "8"))
+
+analyze_admission = AdmissionController("analyze", ANALYZE_MAX_CONCURRENT, ANALYZE_MAX_QUEUE, ADMISSION_MAX_WAIT)
+pdf_admission = AdmissionController("pdf", PDF_MAX_CONCURRENT, PDF_MAX_QUEUE, ADMISSION_MAX_WAIT)
+
+# Background PDF jobs (/upload-pdf with async_job=true): worker threads, waiting jobs
+# allowed before uploads get 429, and how long finished job status stays in memory.
+# Jobs run in the process that accepted the upload; their status is persisted under
+# UPLOAD_DIR, so any worker sharing that directory can answer polls
+PDF_JOB_WORKERS = int(os.getenv("PDF_JOB_WORKERS", "2"))
+PDF_JOB_MAX_QUEUED = int(os.getenv("PDF_JOB_MAX_QUEUED", "32"))
+PDF_JOB_TTL = float(os.getenv("PDF_JOB_TTL", "3600"))
+PDF_JOB_RESULT_FILE = "result.json"
+# Job status, persisted next to the upload so every server worker can answer polls
+PDF_JOB_STATE_FILE = "job.json"
+
+# /analyze-batch: images per request and images analyzed concurrently within one batch
+ANALYZE_BATCH_MAX_FILES = int(os.getenv("ANALYZE_BATCH_MAX_FILES", "16"))
+ANALYZE_BATCH_CONCURRENCY = int(os.getenv("ANALYZE_BATCH_CONCURRENCY", "4"))
+
+# Tiled inference for large sheets (opt-in per request with `tiled=true`). Each Roboflow
+# model gets its own tile size/overlap in pixels; size 0 sends the whole image as before.
+TILED_MAX_DIMENSION = int(os.getenv("TILED_MAX_DIMENSION", "8192"))
+TILE_WORKERS = int(os.getenv("TILE_WORKERS", "8"))
+TILE_SPECS: Dict[str, TileSpec] = {
+    "rooms": TileSpec(int(os.getenv("ROOM_TILE_SIZE", "4096")), int(os.getenv("ROOM_TILE_OVERLAP", "1024"))),
+    "walls": TileSpec(int(os.getenv("WALL_TILE_SIZE", "2048")), int(os.getenv("WALL_TILE_OVERLAP", "256"))),
+    "openings": TileSpec(int(os.getenv("DOORWINDOW_TILE_SIZE", "1024")), int(os.getenv("DOORWINDOW_TILE_OVERLAP", "192"))),
+}
+tile_executor = ThreadPoolExecutor(max_workers=TILE_WORKERS, thread_name_prefix="tiles")
+
+# Analysis result cache (memory LRU + disk tier under UPLOAD_DIR)
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join(UPLOAD_DIR, "cache"))
+RESULT_CACHE_MEMORY_MB = int(os.getenv("RESULT_CACHE_MEMORY_MB", "64"))
+RESULT_CACHE_DISK_MB = int(os.getenv("RESULT_CACHE_DISK_MB", "512"))
+
+result_cache = ResultCache(
+    os.path.join(RESULT_CACHE_DIR, "analyze"),
+    max_memory_bytes=RESULT_CACHE_MEMORY_MB * 1024 * 1024,
+    max_disk_bytes=RESULT_CACHE_DISK_MB * 1024 * 1024,
+    name="analyze",
+) if RESULT_CACHE_ENABLED else None
+
+# Per-model raw output cache, so adding a takeoff type only runs the missing models
+MODEL_CACHE_MEMORY_MB = int(os.getenv("MODEL_CACHE_MEMORY_MB", "64"))
+MODEL_CACHE_DISK_MB = int(os.getenv("MODEL_CACHE_DISK_MB", "512"))
+
+model_cache = ResultCache(
+    os.path.join(RESULT_CACHE_DIR, "models"),
+    max_memory_bytes=MODEL_CACHE_MEMORY_MB * 1024 * 1024,
+    max_disk_bytes=MODEL_CACHE_DISK_MB * 1024 * 1024,
+    name="models",
+) if RESULT_CACHE_ENABLED else None
+
+# Stored analyses (by analysis_id) so a scale correction can be applied without re-running models
+ANALYSIS_STORE_DISK_MB = int(os.getenv("ANALYSIS_STORE_DISK_MB", "1024"))
+
+analysis_store = ResultCache(
+    os.path.join(RESULT_CACHE_DIR, "analyses"),
+    max_memory_bytes=32 * 1024 * 1024,
+    max_disk_bytes=ANALYSIS_STORE_DISK_MB * 1024 * 1024,
+    name="analyses",
+)
+
 # Custom YOLO model for ensemble learning (optional)
 CUSTOM_WINDOW_MODEL_PATH = os.getenv("CUSTOM_WINDOW_MODEL_PATH", "")
 CUSTOM_WINDOW_MODEL = None
+CUSTOM_WINDOW_MODEL_VERSION = ""
 
 # Try to load custom YOLO model if path is provided
 print(f"[ML] DEBUG: CUSTOM_WINDOW_MODEL_PATH = {CUSTOM_WINDOW_MODEL_PATH}")
@@ -96,10 +259,10 @@ print(f"[ML] DEBUG: Path exists? {os.path.exists(CUSTOM_WINDOW_MODEL_PATH) if CU
 
 if CUSTOM_WINDOW_MODEL_PATH and os.path.exists(CUSTOM_WINDOW_MODEL_PATH):
     try:
-        import time
         start_time = time.time()
         from ultralytics import YOLO
         CUSTOM_WINDOW_MODEL = YOLO(CUSTOM_WINDOW_MODEL_PATH)
+        CUSTOM_WINDOW_MODEL_VERSION = _model_file_version(CUSTOM_WINDOW_MODEL_PATH)
         load_time = time.time() - start_time
         print(f"[ML] SUCCESS: Loaded custom window model from: {CUSTOM_WINDOW_MODEL_PATH}")
         print(f"[ML] Model loading took {load_time:.2f} seconds")
@@ -111,6 +274,41 @@ else:
     if CUSTOM_WINDOW_MODEL_PATH:
         print(f"[ML] ERROR: Path set but file not found: {CUSTOM_WINDOW_MODEL_PATH}")
 
+# Door/window ensemble (Roboflow + custom YOLO): one-to-one matching strategy,
+# how matched pairs are combined, and the class-aware NMS threshold applied afterwards
+ENSEMBLE_MATCHING = os.getenv("ENSEMBLE_MATCHING", "greedy").lower()
+ENSEMBLE_FUSION = os.getenv("ENSEMBLE_FUSION", "max").lower()
+ENSEMBLE_NMS_IOU = float(os.getenv("ENSEMBLE_NMS_IOU", "0.5"))
+if ENSEMBLE_MATCHING not in MATCHING_METHODS:
+    print(f"[ML] WARNING: Unknown ENSEMBLE_MATCHING '{ENSEMBLE_MATCHING}', using greedy")
+    ENSEMBLE_MATCHING = "greedy"
+if ENSEMBLE_FUSION not in FUSION_METHODS:
+    print(f"[ML] WARNING: Unknown ENSEMBLE_FUSION '{ENSEMBLE_FUSION}', using max")
+    ENSEMBLE_FUSION = "max"
+
+# Room fusion in /analyze-pages: Roboflow and custom-model rooms whose outlines overlap
+# by more than this polygon IoU are treated as one room
+ROOM_FUSION_IOU = float(os.getenv("ROOM_FUSION_IOU", "0.5"))
+
+# Micro-batching workers for the local YOLO models: concurrent images are gathered
+# (up to YOLO_MAX_BATCH_SIZE, waiting at most YOLO_MAX_BATCH_WAIT_MS) into one forward pass
+YOLO_MAX_BATCH_SIZE = int(os.getenv("YOLO_MAX_BATCH_SIZE", "8"))
+YOLO_MAX_BATCH_WAIT_MS = float(os.getenv("YOLO_MAX_BATCH_WAIT_MS", "10"))
+
+# Response encoding: JSON (orjson when installed) or MessagePack by Accept header,
+# gzip/brotli by Accept-Encoding for bodies of at least RESPONSE_COMPRESS_MIN_BYTES
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+response_encoder = ResponseEncoder(RESPONSE_COMPRESS_MIN_BYTES, RESPONSE_GZIP_LEVEL, RESPONSE_BROTLI_QUALITY)
+
+custom_room_batcher = BatchedYOLO(
+    CUSTOM_ROOM_MODEL, "rooms", YOLO_MAX_BATCH_SIZE, YOLO_MAX_BATCH_WAIT_MS / 1000
+) if CUSTOM_ROOM_MODEL else None
+custom_window_batcher = BatchedYOLO(
+    CUSTOM_WINDOW_MODEL, "windows", YOLO_MAX_BATCH_SIZE, YOLO_MAX_BATCH_WAIT_MS / 1000
+) if CUSTOM_WINDOW_MODEL else None
+
 # ------------------------------------------------------------------------------
 # App
 # ------------------------------------------------------------------------------
@@ -160,45 +358,145 @@ async def startup_event():
     print(f"[ML] 🧱 Wall model: {WALL_MODEL_ID or 'Not configured'}")
     print(f"[ML] 🚪 Door/Window model: {DOORWINDOW_MODEL_ID or 'Not configured'}")
     print(f"[ML] 📋 Page classifier: {PAGE_PROJECT or 'Not configured'}")
+    print(f"[ML] ⚙️ Inference workers: {INFERENCE_WORKERS}")
+    print(f"[ML] 🚦 Admission: analyze {ANALYZE_MAX_CONCURRENT}+{ANALYZE_MAX_QUEUE} queued, pdf {PDF_MAX_CONCURRENT}+{PDF_MAX_QUEUE} queued")
     print("[ML] ✅ ML Service ready!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    inference_executor.shutdown(wait=False, cancel_futures=True)
+    tile_executor.shutdown(wait=False, cancel_futures=True)
+    for batcher in (custom_room_batcher, custom_window_batcher):
+        if batcher:
+            batcher.close()
+    roboflow_pool.close()
+    pdf_jobs.close()
+    if pdf_processor:
+        pdf_processor.close()
+
 # ------------------------------------------------------------------------------
 # Utilities
 # ------------------------------------------------------------------------------
 
-def _get_client(api_key: Optional[str] = None) -> InferenceHTTPClient:
-    """Get Roboflow inference client with API key."""
+# Anything the inference functions accept as an image: a file path, encoded bytes,
+# a PIL image or a numpy array (OpenCV BGR convention, as both the Roboflow client
+# and Ultralytics expect).
+ModelImage = Union[str, bytes, np.ndarray, Image.Image]
+
+def _to_yolo_input(image: ModelImage) -> Union[str, np.ndarray, Image.Image]:
+    """Adapt an image for Ultralytics; encoded bytes are decoded in memory."""
+    if isinstance(image, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(image))
+    if isinstance(image, Image.Image) and image.mode != "RGB":
+        image = image.convert("RGB")
+    return image
+
+def _admit(controller: AdmissionController) -> Callable[[], Any]:
+    """
+    Build a FastAPI dependency that holds an admission slot for the duration of the request.
+    Saturation is reported as 429 (queue full) or 503 (waited too long) with Retry-After.
+    """
+    async def dependency():
+        try:
+            await controller.acquire()
+        except AdmissionRejected as e:
+            raise _admission_error(e)
+        try:
+            yield
+        finally:
+            controller.release()
+    return dependency
+
+def _admission_error(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=e.status_code,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+class _StreamSlot:
+    """
+    Admission slot for a streaming response. Acquired by the handler before any work,
+    and given back only once the stream is closed and all work attached with `hold`
+    (e.g. a PDF render in a worker thread) has finished, even if the client left early.
+    """
+
+    def __init__(self, controller: AdmissionController):
+        self.controller = controller
+        self._pending = 0
+        self._closed = False
+        self._released = False
+
+    async def acquire(self) -> None:
+        try:
+            await self.controller.acquire(owner=self)
+        except AdmissionRejected as e:
+            raise _admission_error(e)
+
+    def hold(self, work: "asyncio.Future[Any]") -> None:
+        """Keep the slot until `work` is done."""
+        self._pending += 1
+        work.add_done_callback(self._work_done)
+
+    def close(self) -> None:
+        """The stream is over; the slot is released once held work has finished. Idempotent."""
+        self._closed = True
+        self._maybe_release()
+
+    def _work_done(self, _: Any) -> None:
+        self._pending -= 1
+        self._maybe_release()
+
+    def _maybe_release(self) -> None:
+        if self._closed and not self._pending and not self._released:
+            self._released = True
+            self.controller.release(owner=self)
+
+
+def _get_client(api_key: Optional[str] = None, api_url: str = DETECT_API_URL) -> RoboflowClient:
+    """Get the pooled Roboflow inference client for this API key."""
     key = (api_key or ROOM_API_KEY or WALL_API_KEY or DOORWINDOW_API_KEY or "").strip()
     if not key:
         raise RuntimeError(
             "Missing API KEY. Set ROOM_API_KEY, WALL_API_KEY, or DOORWINDOW_API_KEY in your .env file."
         )
-    return InferenceHTTPClient(
-        api_url="https://detect.roboflow.com",
-        api_key=key,
-    )
+    return roboflow_pool.get(api_url, key)
 
 
-def _image_size_from_bytes(data: bytes) -> tuple[int, int]:
-    """Get image dimensions from bytes with robust error handling."""
+def _ingest_image(data: bytes, max_dimension: int) -> tuple[Image.Image, int, int]:
+    """
+    Decode an uploaded image exactly once and downscale it to fit `max_dimension`.
+    
+    JPEGs are decoded in draft mode (DCT scaling), so a large scan is decoded
+    directly at 1/2, 1/4 or 1/8 size instead of full resolution. Other formats are
+    shrunk with an integer reduce() before the final LANCZOS pass.
+    
+    Returns:
+        (RGB image, original_width, original_height)
+    """
     try:
-        # Create BytesIO object and ensure it's at the beginning
-        img_buffer = io.BytesIO(data)
-        img_buffer.seek(0)
+        img = Image.open(io.BytesIO(data))
+        original_w, original_h = img.size
+        if original_w <= 0 or original_h <= 0:
+            raise ValueError(f"Invalid image dimensions: {original_w}x{original_h}")
         
-        # Try to open and verify the image
-        with Image.open(img_buffer) as im:
-            # Verify the image by loading it
-            im.verify()
-            
-        # Reopen for actual size reading (verify() closes the image)
-        img_buffer.seek(0)
-        with Image.open(img_buffer) as im:
-            width, height = im.size
-            if width <= 0 or height <= 0:
-                raise ValueError(f"Invalid image dimensions: {width}x{height}")
-            return width, height
-            
+        longest = max(original_w, original_h)
+        if longest > max_dimension:
+            scale_factor = max_dimension / longest
+            target = (max(1, int(original_w * scale_factor)), max(1, int(original_h * scale_factor)))
+            if img.format == "JPEG":
+                img.draft("RGB", target)
+            # load() is the single decode; it also rejects truncated or corrupt files
+            img.load()
+            img = img.resize(target, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        else:
+            img.load()
+        
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        
+        return img, original_w, original_h
+    
     except Exception as e:
         # Log the error for debugging
         print(f"[ERROR] Failed to read image: {str(e)}")
@@ -211,30 +509,11 @@ def _image_size_from_bytes(data: bytes) -> tuple[int, int]:
 
 def _calculate_polygon_area(points: List[Dict[str, float]]) -> float:
     """Calculate area of a polygon using the shoelace formula."""
-    if len(points) < 3:
-        return 0.0
-    
-    area = 0.0
-    n = len(points)
-    for i in range(n):
-        j = (i + 1) % n
-        area += points[i]["x"] * points[j]["y"]
-        area -= points[j]["x"] * points[i]["y"]
-    return abs(area) / 2.0
+    return float(PolygonBatch.from_point_lists([points]).areas()[0])
 
 def _calculate_polygon_perimeter(points: List[Dict[str, float]]) -> float:
     """Calculate perimeter of a polygon."""
-    if len(points) < 2:
-        return 0.0
-    
-    perimeter = 0.0
-    n = len(points)
-    for i in range(n):
-        j = (i + 1) % n
-        dx = points[j]["x"] - points[i]["x"]
-        dy = points[j]["y"] - points[i]["y"]
-        perimeter += (dx * dx + dy * dy) ** 0.5
-    return perimeter
+    return float(PolygonBatch.from_point_lists([points]).perimeters()[0])
 
 def _convert_to_real_units(pixel_value: float, scale: Optional[float], unit: str = "sq ft") -> float:
     """Convert pixel measurements to real-world units using scale factor.
@@ -268,6 +547,40 @@ def _convert_to_real_units(pixel_value: float, scale: Optional[float], unit: str
         # For length: direct multiplication
         return pixel_value * feet_per_pixel
 
+def _polygon_display_metrics(
+    category: Optional[str],
+    pixel_area: float,
+    pixel_perimeter: float,
+    scale: Optional[float],
+) -> Dict[str, float]:
+    """
+    Real-world display metrics for a polygon detection (rooms, walls, other polygons).
+    
+    Walls report perimeter as their length (Linear Feet) and keep the legacy
+    inner/outer perimeter fields for backward compatibility.
+    """
+    area_sqft = _convert_to_real_units(pixel_area, scale, "sq ft")
+    perimeter_ft = _convert_to_real_units(pixel_perimeter, scale, "ft")
+    
+    if category and "wall" in category.lower():
+        return {
+            "perimeter_ft": perimeter_ft,
+            "area_sqft": area_sqft,
+            "inner_perimeter": perimeter_ft,
+            "outer_perimeter": perimeter_ft,
+        }
+    return {
+        "area_sqft": area_sqft,
+        "perimeter_ft": perimeter_ft,
+    }
+
+def _opening_display_metrics(width_px: float, height_px: float, scale: Optional[float]) -> Dict[str, float]:
+    """Real-world display metrics for a door/window bounding box."""
+    return {
+        "width": _convert_to_real_units(width_px, scale, "ft"),
+        "height": _convert_to_real_units(height_px, scale, "ft"),
+    }
+
 def _normalize_predictions(
     raw: Dict[str, Any],
     img_w: int,
@@ -288,12 +601,24 @@ def _normalize_predictions(
     preds = raw.get("predictions", []) or raw.get("data", {}).get("predictions", [])
     out: List[Dict[str, Any]] = []
     
-    for p in preds:
+    # Filter by class if specified
+    if filter_classes:
+        preds = [p for p in preds if (p.get("class") or p.get("label")) in filter_classes]
+    
+    # Pack every polygon once: pixel metrics and normalized points for all of them
+    # come from one vectorized pass instead of per-vertex loops
+    polygons = PolygonBatch.from_point_lists(
+        [p["points"] if isinstance(p.get("points"), list) else None for p in preds]
+    )
+    polygon_areas = polygons.areas().tolist()
+    polygon_perimeters = polygons.perimeters().tolist()
+    polygon_masks = polygons.point_dicts()
+    polygon_points_norm = (
+        polygons.point_dicts(1.0 / img_w, 1.0 / img_h) if img_w and img_h else [[] for _ in preds]
+    )
+    
+    for index, p in enumerate(preds):
         class_name = p.get("class") or p.get("label")
-        
-        # Filter by class if specified
-        if filter_classes and class_name not in filter_classes:
-            continue
             
         # Generate unique ID for this detection
         item_id = str(uuid.uuid4())
@@ -350,32 +675,21 @@ def _normalize_predictions(
             
             # Add display metrics for openings (doors/windows)
             if class_name and class_name.lower() in ["door", "window"]:
-                item["display"].update({
-                    "width": _convert_to_real_units(w, scale, "ft"),
-                    "height": _convert_to_real_units(h, scale, "ft"),
-                })
+                item["display"].update(_opening_display_metrics(w, h, scale))
 
         # Polygon variant (for rooms, walls)
         if "points" in p and isinstance(p["points"], list):
             pts = p["points"]
             item["points"] = pts
-            item["points_norm"] = [
-                {"x": pt["x"] / img_w, "y": pt["y"] / img_h}
-                for pt in pts
-                if isinstance(pt, dict) and "x" in pt and "y" in pt and img_w and img_h
-            ]
+            item["points_norm"] = polygon_points_norm[index]
             # Convert points to mask format expected by frontend
-            item["mask"] = [
-                {"x": pt["x"], "y": pt["y"]}
-                for pt in pts
-                if isinstance(pt, dict) and "x" in pt and "y" in pt
-            ]
+            item["mask"] = polygon_masks[index]
             
             # Calculate area and perimeter for polygon detections
             if len(item["mask"]) >= 3:
-                # Calculate in pixels first
-                pixel_area = _calculate_polygon_area(item["mask"])
-                pixel_perimeter = _calculate_polygon_perimeter(item["mask"])
+                # Pixel measurements from the batched pass above
+                pixel_area = polygon_areas[index]
+                pixel_perimeter = polygon_perimeters[index]
                 
                 # Debug logging for room calculations
                 if class_name and "room" in class_name.lower():
@@ -385,21 +699,8 @@ def _normalize_predictions(
                     print(f"  - Scale factor: {scale}")
                     print(f"  - Pixels per foot: {scale * 96 if scale else 'N/A'}")
                 
-                # Add display metrics based on detection type
-                if class_name and "room" in class_name.lower():
-                    # For rooms: area_sqft and perimeter_ft
-                    area_sqft = _convert_to_real_units(pixel_area, scale, "sq ft")
-                    perimeter_ft = _convert_to_real_units(pixel_perimeter, scale, "ft")
-                    
-                    print(f"  - Converted area: {area_sqft:.2f} sq ft")
-                    print(f"  - Converted perimeter: {perimeter_ft:.2f} ft")
-                    
-                    item["display"].update({
-                        "area_sqft": area_sqft,
-                        "perimeter_ft": perimeter_ft,
-                    })
-                elif class_name and "wall" in class_name.lower():
-                    # Normalize wall class names for frontend
+                # Normalize wall class names for frontend
+                if class_name and "wall" in class_name.lower():
                     if "external" in class_name.lower() or class_name == "External_Wall":
                         item["class"] = "exterior_wall"
                         item["category"] = "exterior_wall"
@@ -416,30 +717,19 @@ def _normalize_predictions(
                         # Default to interior wall if type not specified
                         item["class"] = "interior_wall"
                         item["category"] = "interior_wall"
-                    
-                    # For walls: perimeter_ft (length) and area_sqft
-                    # Perimeter represents the wall length (Linear Feet)
-                    # Area can be used for wall surface area calculations
-                    perimeter_ft = _convert_to_real_units(pixel_perimeter, scale, "ft")
-                    area_sqft = _convert_to_real_units(pixel_area, scale, "sq ft")
-                    
+                
+                # Add display metrics based on detection type
+                item["display"].update(
+                    _polygon_display_metrics(item["category"], pixel_area, pixel_perimeter, scale)
+                )
+                
+                if class_name and "room" in class_name.lower():
+                    print(f"  - Converted area: {item['display']['area_sqft']:.2f} sq ft")
+                    print(f"  - Converted perimeter: {item['display']['perimeter_ft']:.2f} ft")
+                elif class_name and "wall" in class_name.lower():
                     print(f"  - Wall type: {item['class']}")
-                    print(f"  - Converted length: {perimeter_ft:.2f} ft")
-                    print(f"  - Converted area: {area_sqft:.2f} sq ft")
-                    
-                    item["display"].update({
-                        "perimeter_ft": perimeter_ft,
-                        "area_sqft": area_sqft,
-                        # Keep legacy fields for backward compatibility
-                        "inner_perimeter": perimeter_ft,
-                        "outer_perimeter": perimeter_ft,
-                    })
-                else:
-                    # Generic polygon - provide both area and perimeter
-                    item["display"].update({
-                        "area_sqft": _convert_to_real_units(pixel_area, scale, "sq ft"),
-                        "perimeter_ft": _convert_to_real_units(pixel_perimeter, scale, "ft"),
-                    })
+                    print(f"  - Converted length: {item['display']['perimeter_ft']:.2f} ft")
+                    print(f"  - Converted area: {item['display']['area_sqft']:.2f} sq ft")
                 
                 # Also add to metrics for consistency
                 item["metrics"].update({
@@ -452,98 +742,154 @@ def _normalize_predictions(
         out.append(item)
     return out
 
+def _rescale_predictions(predictions: Dict[str, List[Dict[str, Any]]], scale: Optional[float]) -> None:
+    """
+    Recompute every display metric in place for a new scale.
+    
+    Uses only the pixel measurements stored with each detection
+    (metrics.area_pixels / perimeter_pixels, bbox size), so no model is called.
+    """
+    for items in predictions.values():
+        for item in items or []:
+            metrics = item.get("metrics") or {}
+            
+            if "area_pixels" in metrics and "perimeter_pixels" in metrics:
+                display = _polygon_display_metrics(
+                    item.get("category"), metrics["area_pixels"], metrics["perimeter_pixels"], scale
+                )
+                item.setdefault("display", {}).update(display)
+                metrics["area_sqft"] = display["area_sqft"]
+                metrics["perimeter_ft"] = display["perimeter_ft"]
+            elif "width" in item and "height" in item:
+                # Raw custom room model output (fallback path in /analyze)
+                area_px = item.get("area_px2", item["width"] * item["height"])
+                perimeter_px = item.get("perimeter_px", 2 * (item["width"] + item["height"]))
+                item["display"] = _polygon_display_metrics(item.get("class"), area_px, perimeter_px, scale)
+            
+            if "bbox" in item and (item.get("category") or "").lower() in ("door", "window"):
+                item.setdefault("display", {}).update(
+                    _opening_display_metrics(item["bbox"]["w"], item["bbox"]["h"], scale)
+                )
+
 def _infer_image(
-    image_path: str,
+    image: ModelImage,
     model_id: str,
     api_key: Optional[str] = None,
+    priority: int = PRIORITY_INTERACTIVE,
     **kwargs: Any,
 ) -> Dict[str, Any]:
     """
     Calls Roboflow Inference API for a single model_id.
     `model_id` format: "workspace/project:version"
+    `image` may be a path or an in-memory image (see ModelImage).
+    Each attempt waits for a token from the key's rate limiter (see `priority`).
     """
     client = _get_client(api_key)
-    # You can pass extra params like `confidence`, `overlap`, `visualize`, etc. via kwargs.
-    try:
-        return client.infer(image_path, model_id=model_id, **kwargs)
-    except TypeError as exc:
-        # Some versions of the Roboflow client don't accept confidence/overlap kwargs.
-        if kwargs and "unexpected keyword argument" in str(exc):
-            print(
-                f"[ML] Warning: inference client rejected extra kwargs {list(kwargs.keys())}; "
-                "retrying without them."
-            )
-            return client.infer(image_path, model_id=model_id)
-        raise
+    # You can pass extra params like `confidence`, `overlap`, etc. via kwargs.
+    # Every attempt, retries of 429/5xx included, takes a token from the key's bucket.
+    return client.infer(
+        image, model_id=model_id, pace=lambda: rate_limiter.acquire(client.api_key, priority), **kwargs
+    )
+
+def _infer_tiled(
+    image: Image.Image,
+    model_id: str,
+    api_key: Optional[str],
+    spec: TileSpec,
+    priority: int = PRIORITY_INTERACTIVE,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """
+    Run one Roboflow model over overlapping tiles of a large image, in parallel.
+
+    Tile predictions are shifted back to image coordinates and seam duplicates merged,
+    so the result has the same shape as a single `_infer_image` response. Images that
+    fit in one tile are sent whole.
+    """
+    img_w, img_h = image.size
+    windows = tile_windows(img_w, img_h, spec)
+    if len(windows) == 1:
+        return _infer_image(image, model_id=model_id, api_key=api_key, priority=priority, **kwargs)
+
+    def run_tile(window: tuple) -> List[Dict[str, Any]]:
+        raw = _infer_image(image.crop(window), model_id=model_id, api_key=api_key, priority=priority, **kwargs)
+        preds = raw.get("predictions", []) or raw.get("data", {}).get("predictions", [])
+        return shift_predictions(preds, window[0], window[1])
+
+    per_tile = list(tile_executor.map(run_tile, windows))
+    merged = merge_tiled_predictions(per_tile, windows)
+    print(f"[ML] Tiled {model_id}: {len(windows)} tiles of {spec.size}px, {len(merged)} detections after seam merge")
+    return {
+        "predictions": merged,
+        "image": {"width": img_w, "height": img_h},
+        "tiles": len(windows),
+    }
 
 def _classify_image(
-    image_path: str,
+    image_path: ModelImage,
     project_id: str,
     version: str,
     api_key: str,
     workspace: str = None,
+    priority: int = PRIORITY_BATCH,
 ) -> Dict[str, Any]:
     """
-    Calls Roboflow Classification using InferenceHTTPClient with serverless endpoint.
+    Calls Roboflow Classification on the serverless endpoint through the shared client pool.
+    Page classification is background work, so it yields to interactive calls by default.
     Returns classification result with top class and confidence.
     """
-    from inference_sdk import InferenceHTTPClient
-    
     if not api_key:
         raise ValueError("API key is required for classification")
     
-    # Initialize client with serverless endpoint
-    client = InferenceHTTPClient(
-        api_url="https://serverless.roboflow.com",
-        api_key=api_key
-    )
-    
     # Model ID format: project_id/version
     model_id = f"{project_id}/{version}"
     
-    # Run inference
-    result = client.infer(image_path, model_id=model_id)
+    # Run inference (every attempt takes a rate limiter token)
+    result = _get_client(api_key, SERVERLESS_API_URL).infer(
+        image_path, model_id=model_id, pace=lambda: rate_limiter.acquire(api_key, priority)
+    )
     
     return result
 
 # Initialize PDF processor with classification function (now that _classify_image is defined)
 if PAGE_API_KEY and PAGE_PROJECT and PAGE_VERSION:
-    pdf_processor = PDFProcessor(classify_fn=_classify_image)
+    pdf_processor = PDFProcessor(classify_fn=_classify_image, client_pool=roboflow_pool)
     print(f"[ML] PDF Processor initialized with Roboflow classification: {PAGE_PROJECT}/{PAGE_VERSION}")
 else:
-    pdf_processor = PDFProcessor()
+    pdf_processor = PDFProcessor(client_pool=roboflow_pool)
     print("[ML] PDF Processor initialized without classification (missing config)")
 
-def _calculate_iou(box1: Dict[str, float], box2: Dict[str, float]) -> float:
+def _cached_model_call(
+    image_digest: Optional[str],
+    model_key: str,
+    params: Dict[str, Any],
+    fn: Callable[[], Any],
+) -> Any:
     """
-    Calculate Intersection over Union (IoU) between two bounding boxes.
-    Boxes are in format: {"x": center_x, "y": center_y, "w": width, "h": height}
-    """
-    # Convert center format to corner format
-    box1_x1 = box1["x"] - box1["w"] / 2
-    box1_y1 = box1["y"] - box1["h"] / 2
-    box1_x2 = box1["x"] + box1["w"] / 2
-    box1_y2 = box1["y"] + box1["h"] / 2
-    
-    box2_x1 = box2["x"] - box2["w"] / 2
-    box2_y1 = box2["y"] - box2["h"] / 2
-    box2_x2 = box2["x"] + box2["w"] / 2
-    box2_y2 = box2["y"] + box2["h"] / 2
-    
-    # Calculate intersection
-    x1 = max(box1_x1, box2_x1)
-    y1 = max(box1_y1, box2_y1)
-    x2 = min(box1_x2, box2_x2)
-    y2 = min(box1_y2, box2_y2)
-    
-    intersection = max(0, x2 - x1) * max(0, y2 - y1)
-    
-    # Calculate union
-    box1_area = box1["w"] * box1["h"]
-    box2_area = box2["w"] * box2["h"]
-    union = box1_area + box2_area - intersection
+    Return the cached raw output of one model on one image, running `fn` on a miss.
+
+    Args:
+        image_digest: Content hash of the image the model sees (None disables caching)
+        model_key: Model identifier including its version (custom models are prefixed with their
+            role, e.g. "custom-room:", since their versions are only file name and mtime)
+        params: Call parameters that change the model output
+        fn: Zero-argument callable that runs the model
     
-    return intersection / union if union > 0 else 0.0
+    Exceptions from `fn` propagate and nothing is cached, so a failed call is retried
+    on the next request instead of being remembered as an empty result.
+    """
+    if not model_cache or not image_digest:
+        return fn()
+
+    key = make_cache_key(image_digest, model_key, params)
+    cached = model_cache.get(key)
+    if cached is not None:
+        print(f"[ML] Model cache hit: {model_key}")
+        return cached
+
+    output = fn()
+    model_cache.set(key, output)
+    return output
 
 def _ensemble_door_window_predictions(
     roboflow_preds: List[Dict[str, Any]],
@@ -554,9 +900,10 @@ def _ensemble_door_window_predictions(
     Combine predictions from Roboflow and custom YOLO model using ensemble learning.
     
     Strategy:
-    1. For overlapping detections (IoU > threshold), keep the one with higher confidence
+    1. Match overlapping detections one-to-one (IoU > threshold) from the vectorized IoU matrix
+       and keep the more confident one, or fuse them (ENSEMBLE_FUSION=wbf)
     2. Add non-overlapping detections from both models
-    3. Apply NMS to remove final duplicates
+    3. Apply class-aware NMS (ENSEMBLE_NMS_IOU) to remove final duplicates
     
     Args:
         roboflow_preds: Predictions from Roboflow model
@@ -576,55 +923,36 @@ def _ensemble_door_window_predictions(
         print("[ML] Ensemble: No Roboflow predictions, returning custom only")
         return custom_preds
     
-    combined = []
-    used_roboflow = set()
-    used_custom = set()
-    
-    # Find overlapping detections and keep the one with higher confidence
-    for i, custom_pred in enumerate(custom_preds):
-        if "bbox" not in custom_pred:
-            continue
-            
-        best_match_idx = None
-        max_iou = iou_threshold
-        
-        for j, robo_pred in enumerate(roboflow_preds):
-            if j in used_roboflow or "bbox" not in robo_pred:
-                continue
-            
-            iou = _calculate_iou(custom_pred["bbox"], robo_pred["bbox"])
-            if iou > max_iou:
-                max_iou = iou
-                best_match_idx = j
-        
-        if best_match_idx is not None:
-            # Overlapping detection found - use higher confidence
-            robo_pred = roboflow_preds[best_match_idx]
-            if custom_pred["confidence"] > robo_pred["confidence"]:
-                combined.append(custom_pred)
-                print(f"[ML] Ensemble: Using custom (conf={custom_pred['confidence']:.2f}) over Roboflow (conf={robo_pred['confidence']:.2f})")
-            else:
-                combined.append(robo_pred)
-                print(f"[ML] Ensemble: Using Roboflow (conf={robo_pred['confidence']:.2f}) over custom (conf={custom_pred['confidence']:.2f})")
-            used_roboflow.add(best_match_idx)
-            used_custom.add(i)
-        else:
-            # No overlap - add custom prediction
-            combined.append(custom_pred)
-            used_custom.add(i)
-            print(f"[ML] Ensemble: Added unique custom detection (conf={custom_pred['confidence']:.2f})")
-    
-    # Add remaining Roboflow predictions that weren't matched
-    for j, robo_pred in enumerate(roboflow_preds):
-        if j not in used_roboflow:
-            combined.append(robo_pred)
-            print(f"[ML] Ensemble: Added unique Roboflow detection (conf={robo_pred['confidence']:.2f})")
+    combined = ensemble_predictions(
+        roboflow_preds,
+        custom_preds,
+        match_threshold=iou_threshold,
+        nms_threshold=ENSEMBLE_NMS_IOU,
+        matching=ENSEMBLE_MATCHING,
+        fusion=ENSEMBLE_FUSION,
+    )
     
     print(f"[ML] Ensemble: Combined total = {len(combined)} detections")
     return combined
 
+def _yolo_boxes(result: Any) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Move all boxes of one ultralytics Results to NumPy in a single transfer per tensor.
+    
+    Returns:
+        (xyxy N x 4 float64, confidences N float64, class ids N int64)
+    """
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=np.int64)
+    return (
+        boxes.xyxy.cpu().numpy().astype(np.float64, copy=False),
+        boxes.conf.cpu().numpy().astype(np.float64, copy=False),
+        boxes.cls.cpu().numpy().astype(np.int64),
+    )
+
 def _run_custom_room_model(
-    image_path: str,
+    image: ModelImage,
     img_w: int,
     img_h: int,
     confidence: float = 0.3,
@@ -634,7 +962,7 @@ def _run_custom_room_model(
     Run custom YOLO model for room detection and convert to standard format.
     
     Args:
-        image_path: Path to image file
+        image: Image path or in-memory image (PIL, numpy array or encoded bytes)
         img_w: Image width
         img_h: Image height
         confidence: Confidence threshold
@@ -642,89 +970,72 @@ def _run_custom_room_model(
     
     Returns:
         List of predictions in standard format
+    
+    Raises:
+        Exception: Inference failures propagate, so they are reported and never cached as "no rooms"
     """
     if not CUSTOM_ROOM_MODEL:
         return []
     
-    try:
-        # Run inference
-        results = CUSTOM_ROOM_MODEL(image_path, conf=confidence, iou=0.5)
-        
-        predictions = []
-        for result in results:
-            for i, box in enumerate(result.boxes):
-                # Convert box to [x1, y1, x2, y2, conf, cls]
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
-                conf = box.conf.item()
-                cls_id = int(box.cls.item())
-                cls_name = result.names[cls_id]
-                
-                # Calculate center, width, height
-                w = x2 - x1
-                h = y2 - y1
-                x = x1 + w / 2
-                y = y1 + h / 2
-                
-                # Convert to percentage of image dimensions
-                x_pct = x / img_w
-                y_pct = y / img_h
-                w_pct = w / img_w
-                h_pct = h / img_h
-                
-                # Convert to absolute coordinates
-                x_abs = x_pct * img_w
-                y_abs = y_pct * img_h
-                w_abs = w_pct * img_w
-                h_abs = h_pct * img_h
-                
-                # Create prediction in Roboflow format
-                pred = {
-                    "x": x_abs,
-                    "y": y_abs,
-                    "width": w_abs,
-                    "height": h_abs,
-                    "confidence": conf,
-                    "class": cls_name,
-                    "class_id": cls_id,
-                }
-                
-                # Add points for polygon (as a rectangle for now)
-                points = [
-                    {"x": x1, "y": y1},
-                    {"x": x2, "y": y1},
-                    {"x": x2, "y": y2},
-                    {"x": x1, "y": y2}
-                ]
-                
-                # Calculate area and perimeter if scale is provided
-                if scale is not None:
-                    area_px = w_abs * h_abs
-                    perimeter_px = 2 * (w_abs + h_abs)
-                    
-                    pred["area_px2"] = area_px
-                    pred["perimeter_px"] = perimeter_px
-                    
-                    # Convert to real-world units
-                    area_sqft = _convert_to_real_units(area_px, scale, "sq ft")
-                    perimeter_ft = _convert_to_real_units(perimeter_px, scale, "ft")
-                    
-                    pred["display"] = {
-                        "area_sqft": area_sqft,
-                        "perimeter_ft": perimeter_ft
-                    }
-                
-                pred["points"] = points
-                predictions.append(pred)
+    # Run inference (batched with concurrent requests on the model's worker thread)
+    results = [custom_room_batcher.predict(_to_yolo_input(image), conf=confidence, iou=0.5)]
+    
+    predictions = []
+    for result in results:
+        xyxy, confs, cls_ids = _yolo_boxes(result)
         
-        return predictions
+        # Center, size and (with a scale) real-world measurements for every box at once
+        x1, y1, x2, y2 = xyxy.T
+        w = x2 - x1
+        h = y2 - y1
+        cx = x1 + w / 2
+        cy = y1 + h / 2
+        area_px = w * h
+        perimeter_px = 2 * (w + h)
+        area_sqft = _convert_to_real_units(area_px, scale, "sq ft")
+        perimeter_ft = _convert_to_real_units(perimeter_px, scale, "ft")
         
-    except Exception as e:
-        print(f"[ERROR] Error running custom room model: {e}")
-        return []
+        columns = zip(
+            x1.tolist(), y1.tolist(), x2.tolist(), y2.tolist(),
+            cx.tolist(), cy.tolist(), w.tolist(), h.tolist(),
+            confs.tolist(), cls_ids.tolist(),
+            area_px.tolist(), perimeter_px.tolist(), area_sqft.tolist(), perimeter_ft.tolist(),
+        )
+        for bx1, by1, bx2, by2, x, y, bw, bh, conf, cls_id, area, perimeter, sqft, ft in columns:
+            # Create prediction in Roboflow format
+            pred = {
+                "x": x,
+                "y": y,
+                "width": bw,
+                "height": bh,
+                "confidence": conf,
+                "class": result.names[cls_id],
+                "class_id": cls_id,
+            }
+            
+            # Calculate area and perimeter if scale is provided
+            if scale is not None:
+                pred["area_px2"] = area
+                pred["perimeter_px"] = perimeter
+                pred["display"] = {
+                    "area_sqft": sqft,
+                    "perimeter_ft": ft
+                }
+            
+            # Add points for polygon (as a rectangle for now)
+            pred["points"] = [
+                {"x": bx1, "y": by1},
+                {"x": bx2, "y": by1},
+                {"x": bx2, "y": by2},
+                {"x": bx1, "y": by2}
+            ]
+            predictions.append(pred)
+    
+    return predictions
 
 
 def _run_custom_yolo_model(
-    image_path: str,
+    image: ModelImage,
     img_w: int,
     img_h: int,
     confidence: float = 0.3,
@@ -734,7 +1045,7 @@ def _run_custom_yolo_model(
     Run custom YOLO model on image and convert to standard format.
     
     Args:
-        image_path: Path to image file
+        image: Image path or in-memory image (PIL, numpy array or encoded bytes)
         img_w: Image width
         img_h: Image height
         confidence: Confidence threshold
@@ -742,92 +1053,78 @@ def _run_custom_yolo_model(
     
     Returns:
         List of predictions in standard format
+    
+    Raises:
+        Exception: Inference failures propagate, so they are reported and never cached as "no openings"
     """
     if not CUSTOM_WINDOW_MODEL:
         return []
     
-    try:
-        # Run inference
-        results = CUSTOM_WINDOW_MODEL.predict(
-            image_path,
-            conf=confidence,
-            iou=0.5,
-            verbose=False
-        )
-        
-        if not results or len(results) == 0:
-            return []
-        
-        result = results[0]
-        predictions = []
-        
-        # Convert YOLO format to standard format
-        for box in result.boxes:
-            # Get box coordinates (xyxy format)
-            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-            
-            # Convert to center format
-            center_x = (x1 + x2) / 2
-            center_y = (y1 + y2) / 2
-            width = x2 - x1
-            height = y2 - y1
-            
-            # Get class name (assume 0=window for custom model)
-            class_id = int(box.cls[0])
-            class_name = "window"  # Default to window
-            
-            # Try to get class name from model
-            if hasattr(result, 'names') and class_id in result.names:
-                class_name = result.names[class_id].lower()
-            
-            # Convert bounding box to polygon mask (4 corners)
-            mask_points = [
-                {"x": float(x1), "y": float(y1)},  # Top-left
-                {"x": float(x2), "y": float(y1)},  # Top-right
-                {"x": float(x2), "y": float(y2)},  # Bottom-right
-                {"x": float(x1), "y": float(y2)},  # Bottom-left
-            ]
-            
-            pred = {
-                "id": str(uuid.uuid4()),
-                "class": class_name,
-                "confidence": float(box.conf[0]),
-                "category": class_name,
-                "bbox": {
-                    "x": float(center_x),
-                    "y": float(center_y),
-                    "w": float(width),
-                    "h": float(height)
-                },
-                "bbox_norm": {
-                    "x": float(center_x / img_w) if img_w else 0.0,
-                    "y": float(center_y / img_h) if img_h else 0.0,
-                    "w": float(width / img_w) if img_w else 0.0,
-                    "h": float(height / img_h) if img_h else 0.0,
-                },
-                "metrics": {},
-                "mask": mask_points,
-                "points": mask_points,
-                "points_norm": [
-                    {"x": float(x1 / img_w), "y": float(y1 / img_h)},
-                    {"x": float(x2 / img_w), "y": float(y1 / img_h)},
-                    {"x": float(x2 / img_w), "y": float(y2 / img_h)},
-                    {"x": float(x1 / img_w), "y": float(y2 / img_h)},
-                ],
-                "display": {
-                    "width": _convert_to_real_units(width, scale, "ft"),
-                    "height": _convert_to_real_units(height, scale, "ft"),
-                },
-                "source": "custom_yolo"  # Mark as custom model prediction
-            }
-            predictions.append(pred)
+    # Run inference (batched with concurrent requests on the model's worker thread)
+    results = [custom_window_batcher.predict(_to_yolo_input(image), conf=confidence, iou=0.5)]
+    
+    if not results or len(results) == 0:
+        return []
+    
+    result = results[0]
+    xyxy, confs, cls_ids = _yolo_boxes(result)
+    
+    # Center format, normalized coordinates and real-world sizes for every box at once
+    x1, y1, x2, y2 = xyxy.T
+    width = x2 - x1
+    height = y2 - y1
+    center_x = (x1 + x2) / 2
+    center_y = (y1 + y2) / 2
+    inv_w = 1.0 / img_w if img_w else 0.0
+    inv_h = 1.0 / img_h if img_h else 0.0
+    width_ft = _convert_to_real_units(width, scale, "ft")
+    height_ft = _convert_to_real_units(height, scale, "ft")
+    
+    # Class names (assume 0=window for custom model when the model has no names)
+    names = getattr(result, 'names', None) or {}
+    class_names = {cls_id: names[cls_id].lower() if cls_id in names else "window" for cls_id in set(cls_ids.tolist())}
+    
+    predictions = []
+    columns = zip(
+        x1.tolist(), y1.tolist(), x2.tolist(), y2.tolist(),
+        center_x.tolist(), center_y.tolist(), width.tolist(), height.tolist(),
+        (x1 * inv_w).tolist(), (y1 * inv_h).tolist(), (x2 * inv_w).tolist(), (y2 * inv_h).tolist(),
+        confs.tolist(), cls_ids.tolist(), width_ft.tolist(), height_ft.tolist(),
+    )
+    for bx1, by1, bx2, by2, cx, cy, bw, bh, nx1, ny1, nx2, ny2, conf, cls_id, w_ft, h_ft in columns:
+        class_name = class_names[cls_id]
         
-        print(f"[ML] Custom YOLO model detected {len(predictions)} windows")
-        return predictions
+        # Convert bounding box to polygon mask (4 corners)
+        mask_points = [
+            {"x": bx1, "y": by1},  # Top-left
+            {"x": bx2, "y": by1},  # Top-right
+            {"x": bx2, "y": by2},  # Bottom-right
+            {"x": bx1, "y": by2},  # Bottom-left
+        ]
         
-    except Exception as e:
-        print(f"[ML] Error running custom YOLO model: {e}")
-        return []
+        pred = {
+            "id": str(uuid.uuid4()),
+            "class": class_name,
+            "confidence": conf,
+            "category": class_name,
+            "bbox": {"x": cx, "y": cy, "w": bw, "h": bh},
+            "bbox_norm": {"x": cx * inv_w, "y": cy * inv_h, "w": bw * inv_w, "h": bh * inv_h},
+            "metrics": {},
+            "mask": mask_points,
+            "points": mask_points,
+            "points_norm": [
+                {"x": nx1, "y": ny1},
+                {"x": nx2, "y": ny1},
+                {"x": nx2, "y": ny2},
+                {"x": nx1, "y": ny2},
+            ],
+            "display": {"width": w_ft, "height": h_ft},
+            "source": "custom_yolo"  # Mark as custom model prediction
+        }
+        predictions.append(pred)
+    
+    print(f"[ML] Custom YOLO model detected {len(predictions)} windows")
+    return predictions
 
 # ------------------------------------------------------------------------------
 # Routes
@@ -842,7 +1139,10 @@ def root() -> Dict[str, Any]:
         "name": "AIEstimAgent — ML API",
         "status": "ok",
         "docs": "/docs",
-        "endpoints": ["/healthz", "/analyze"],
+        "endpoints": [
+            "/healthz", "/analyze", "/analyze-batch", "/upload-pdf", "/upload-pdf/stream",
+            "/analyze-pages/stream", "/pdf-jobs/{job_id}",
+        ],
     }
 
 @app.options("/", response_class=PlainTextResponse)
@@ -876,32 +1176,379 @@ def config() -> Dict[str, Any]:
         }
     }
 
-def convert_numpy_types(obj):
-    """Recursively convert numpy types to native Python types for JSON serialization."""
-    import numpy as np
-    
-    if isinstance(obj, (np.bool_, np.bool)):
-        return bool(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, dict):
-        return {k: convert_numpy_types(v) for k, v in obj.items()}
-    elif isinstance(obj, (list, tuple)):
-        return [convert_numpy_types(item) for item in obj]
-    return obj
+@app.get("/stats", response_class=JSONResponse)
+def stats() -> Dict[str, Any]:
+    """
+    Runtime counters for caches and other shared resources.
+    """
+    return {
+        "result_cache": result_cache.stats() if result_cache else None,
+        "model_cache": model_cache.stats() if model_cache else None,
+        "analysis_store": analysis_store.stats(),
+        "roboflow_clients": roboflow_pool.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "yolo_batching": {
+            "rooms": custom_room_batcher.stats() if custom_room_batcher else None,
+            "windows": custom_window_batcher.stats() if custom_window_batcher else None,
+        },
+        "admission": {
+            "analyze": analyze_admission.stats(),
+            "pdf": pdf_admission.stats(),
+        },
+        "serialization": response_encoder.stats(),
+        "pdf_jobs": pdf_jobs.stats(),
+    }
+
+def _analysis_cache_key(
+    image_digest: str,
+    types_to_analyze: List[str],
+    scale: Optional[float],
+    confidence: Optional[float],
+    overlap: Optional[float],
+    tiled: bool = False,
+) -> str:
+    """Key for a full /analyze result: image content plus everything that changes the output."""
+    parts = [
+        image_digest,
+        sorted(types_to_analyze),
+        scale,
+        confidence,
+        overlap,
+        ROOM_MODEL_ID,
+        WALL_MODEL_ID,
+        DOORWINDOW_MODEL_ID,
+        CUSTOM_ROOM_MODEL_VERSION if CUSTOM_ROOM_MODEL else None,
+        CUSTOM_WINDOW_MODEL_VERSION if CUSTOM_WINDOW_MODEL else None,
+    ]
+    if tiled:
+        parts.append({"max_dimension": TILED_MAX_DIMENSION, "tiles": TILE_SPECS})
+    return make_cache_key(*parts)
+
+def _validate_response_format(response_format: str, quantize: Optional[float]) -> None:
+    """Reject unknown `format` values and non-positive `quantize` steps with a 400."""
+    if response_format not in RESPONSE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid format '{response_format}'. Expected one of: {', '.join(RESPONSE_FORMATS)}."
+        )
+    if quantize is not None and quantize <= 0:
+        raise HTTPException(status_code=400, detail="quantize must be greater than 0.")
+
+def _format_response(response: Dict[str, Any], response_format: str, quantize: Optional[float]) -> Dict[str, Any]:
+    """Apply the requested response format; caches and the analysis store keep the full format."""
+    if response_format == "compact":
+        return compact_response(response, quantize)
+    return response
+
+async def _respond(request: Request, content: Dict[str, Any], status_code: int = 200) -> Response:
+    """Encode a result for the client (format and compression negotiated from its headers) off the event loop."""
+    return await run_in_threadpool(response_encoder.response, request, content, status_code)
+
+def _event_stream(
+    request: Request,
+    slot: _StreamSlot,
+    events: AsyncIterator[Tuple[str, Dict[str, Any]]],
+) -> StreamingResponse:
+    """
+    Stream (event, data) pairs as NDJSON, or as Server-Sent Events for `Accept: text/event-stream`.
+    
+    `slot` is the request's admission slot, already acquired (a request dependency would
+    release it before the body is sent); it is closed when the stream ends, however it ends.
+    Failures after streaming has started arrive as an `error` event.
+    """
+    media_type = negotiate_stream_type(request.headers.get("accept"))
+    
+    async def body():
+        try:
+            async for event, data in events:
+                yield encode_event(event, data, media_type)
+        except Exception as e:
+            print(f"[ML] Error in event stream: {str(e)}")
+            yield encode_event("error", {"status_code": 500, "detail": str(e)}, media_type)
+        finally:
+            # Close the events first: that is where unfinished work gets attached to the slot
+            try:
+                await events.aclose()
+            finally:
+                slot.close()
+    
+    # No proxy buffering, so each event reaches the client as soon as it is written.
+    # The background task closes the slot even if the body never started.
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(slot.close),
+    )
+
+def _parse_analysis_types(types: Optional[str]) -> List[str]:
+    """Parse the `types` form field (JSON array); defaults to every takeoff type."""
+    # Parse types parameter (frontend sends JSON array)
+    types_to_analyze = []
+    if types:
+        try:
+            types_to_analyze = json.loads(types)
+        except json.JSONDecodeError:
+            types_to_analyze = []
+    
+    # Default to all types if none specified
+    if not types_to_analyze:
+        types_to_analyze = ["rooms", "walls", "doors", "windows"]
+    
+    return types_to_analyze
+
+def _validate_image_bytes(data: bytes) -> None:
+    """Reject empty, truncated or non-image uploads with a 400."""
+    if not data:
+        raise HTTPException(status_code=400, detail="Empty upload.")
+    
+    # Validate minimum file size (at least 100 bytes for a valid image)
+    if len(data) < 100:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"File too small ({len(data)} bytes). Please upload a valid image file."
+        )
+    
+    # Check file signature (magic bytes) for common image formats
+    file_signature = data[:8]
+    valid_signatures = [
+        b'\x89PNG\r\n\x1a\n',  # PNG
+        b'\xff\xd8\xff',        # JPEG
+        b'GIF87a',              # GIF
+        b'GIF89a',              # GIF
+        b'BM',                  # BMP
+    ]
+    
+    is_valid_image = any(
+        file_signature.startswith(sig) for sig in valid_signatures
+    )
+    
+    if not is_valid_image:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid image format. Please upload a PNG, JPEG, GIF, or BMP file."
+        )
+
+async def _analyze_image_bytes(
+    data: bytes,
+    filename: Optional[str],
+    types_to_analyze: List[str],
+    scale: Optional[float],
+    confidence: Optional[float],
+    overlap: Optional[float],
+    request_start: float,
+    tiled: bool = False,
+) -> Dict[str, Any]:
+    """
+    Run the room/wall/opening models on one validated upload and build its result
+    (cache lookup, ingest, parallel inference, analysis_store/result_cache writes).
+    Shared by /analyze and /analyze-batch.
+
+    With `tiled`, the image is kept at up to TILED_MAX_DIMENSION and each Roboflow model
+    runs over overlapping tiles (see TILE_SPECS).
+    """
+    # Determine which models to run
+    detect_rooms = any(t in types_to_analyze for t in ["rooms", "floors", "flooring"])
+    detect_walls = "walls" in types_to_analyze
+    detect_doors_windows = any(t in types_to_analyze for t in ["doors", "windows", "columns", "openings"])
+    
+    # Serve repeat analyses of the same image/settings straight from the cache
+    image_digest = await run_in_threadpool(hash_bytes, data)
+    cache_key = None
+    if result_cache:
+        cache_key = _analysis_cache_key(image_digest, types_to_analyze, scale, confidence, overlap, tiled)
+        cached = await run_in_threadpool(result_cache.get, cache_key)
+        if cached is not None:
+            total_time = time.time() - request_start
+            cached["filename"] = filename
+            cached["processing_time"] = f"{total_time:.2f}s"
+            cached["cached"] = True
+            if cached.get("analysis_id") and not analysis_store.has(cached["analysis_id"]):
+                await run_in_threadpool(analysis_store.set, cached["analysis_id"], cached)
+            print(f"[ML] === Analysis served from cache in {total_time:.3f}s ===")
+            return cached
+
+    # Decode once and resize to max 1536px to speed up Roboflow API
+    # This significantly reduces upload time and processing time
+    # (tiled mode keeps far more detail and splits the image per model instead)
+    MAX_DIMENSION = TILED_MAX_DIMENSION if tiled else 1536
+    img, original_img_w, original_img_h = await run_in_threadpool(_ingest_image, data, MAX_DIMENSION)
+    
+    # Use resized dimensions for inference
+    img_w, img_h = img.size
+    if (img_w, img_h) != (original_img_w, original_img_h):
+        scale_factor = img_w / original_img_w
+        print(f"[ML] Resized image from {original_img_w}x{original_img_h} to {img_w}x{img_h} (factor: {scale_factor:.2f})")
+    else:
+        print(f"[ML] Image size {original_img_w}x{original_img_h} is within limit, no resize needed")
+
+    # Inference kwargs
+    infer_kwargs: Dict[str, Any] = {}
+    if confidence is not None:
+        infer_kwargs["confidence"] = confidence
+    if overlap is not None:
+        infer_kwargs["overlap"] = overlap
+
+    results = {
+        "image": {"width": img_w, "height": img_h},
+        "scale": scale,
+        "filename": filename,
+        "predictions": {},
+    }
+    errors: Dict[str, str] = {}
+
+    # Model cache entries depend on the resolution the model saw (pages analyzed by
+    # /analyze-pages share digests with /analyze uploads but run at full size)
+    ingest_params: Dict[str, Any] = {"input_size": [img_w, img_h]}
+
+    def roboflow_call(kind: str, model_id: str, api_key: str) -> Dict[str, Any]:
+        if tiled:
+            spec = TILE_SPECS[kind]
+            return _cached_model_call(
+                image_digest, model_id, {**infer_kwargs, **ingest_params, "tiles": spec},
+                lambda: _infer_tiled(img, model_id, api_key, spec, **infer_kwargs),
+            )
+        return _cached_model_call(
+            image_digest, model_id, {**infer_kwargs, **ingest_params},
+            lambda: _infer_image(img, model_id=model_id, api_key=api_key, **infer_kwargs),
+        )
+
+    # Run all model inferences in parallel for speed
+    
+    def run_room_detection():
+        if not detect_rooms or not ROOM_MODEL_ID:
+            return None
+        try:
+            raw = roboflow_call("rooms", ROOM_MODEL_ID, ROOM_API_KEY)
+            roboflow_rooms = _normalize_predictions(raw, img_w, img_h, scale=scale)
+            
+            # Use custom room model as fallback only if Roboflow returns no results
+            if not roboflow_rooms and CUSTOM_ROOM_MODEL:
+                print("[ML] Roboflow returned no rooms, using custom room model as fallback")
+                try:
+                    roboflow_rooms = _cached_model_call(
+                        image_digest, f"custom-room:{CUSTOM_ROOM_MODEL_VERSION}", {"confidence": confidence or 0.3, "scale": scale, **ingest_params},
+                        lambda: _run_custom_room_model(
+                            img,
+                            img_w,
+                            img_h,
+                            confidence=confidence or 0.3,
+                            scale=scale
+                        ),
+                    )
+                    print(f"[ML] Custom room model fallback detected {len(roboflow_rooms)} rooms")
+                except Exception as e:
+                    print(f"[ERROR] Error running custom room model: {e}")
+            
+            return ("rooms", roboflow_rooms, None)
+        except Exception as e:
+            return ("rooms", None, str(e))
+    
+    def run_wall_detection():
+        if not detect_walls or not WALL_MODEL_ID:
+            return None
+        try:
+            raw = roboflow_call("walls", WALL_MODEL_ID, WALL_API_KEY)
+            walls = _normalize_predictions(raw, img_w, img_h, scale=scale)
+            return ("walls", walls, None)
+        except Exception as e:
+            return ("walls", None, str(e))
+    
+    def run_door_window_detection():
+        if not detect_doors_windows or not DOORWINDOW_MODEL_ID:
+            return None
+        try:
+            # Run Roboflow model
+            raw = roboflow_call("openings", DOORWINDOW_MODEL_ID, DOORWINDOW_API_KEY)
+            # Filter to only include door and window classes
+            roboflow_preds = _normalize_predictions(raw, img_w, img_h, filter_classes=["door", "window", "Door", "Window"], scale=scale)
+            
+            # If custom YOLO model is available, run ensemble learning
+            if CUSTOM_WINDOW_MODEL:
+                print("[ML] Running ensemble learning for door/window detection")
+                # Run custom model; on failure fall back to Roboflow alone (failures are not cached)
+                try:
+                    custom_preds = _cached_model_call(
+                        image_digest, f"custom-window:{CUSTOM_WINDOW_MODEL_VERSION}", {"confidence": confidence or 0.3, "scale": scale, **ingest_params},
+                        lambda: _run_custom_yolo_model(
+                            img,
+                            img_w,
+                            img_h,
+                            confidence=confidence or 0.3,
+                            scale=scale
+                        ),
+                    )
+                except Exception as e:
+                    print(f"[ML] Error running custom YOLO model: {e}")
+                    custom_preds = []
+                
+                # Combine predictions using ensemble strategy
+                door_window_preds = _ensemble_door_window_predictions(
+                    roboflow_preds,
+                    custom_preds,
+                    iou_threshold=0.4
+                )
+                print(f"[ML] Ensemble result: {len(door_window_preds)} total detections")
+            else:
+                # No custom model - use Roboflow only
+                door_window_preds = roboflow_preds
+                print(f"[ML] Using Roboflow only: {len(door_window_preds)} detections")
+            
+            return ("openings", door_window_preds, None)
+        except Exception as e:
+            return ("openings", None, str(e))
+    
+    # Run all detections in parallel on the shared executor without blocking the event loop
+    print("[ML] Running parallel model inference...")
+    parallel_start = time.time()
+    outcomes = await asyncio.gather(
+        _run_inference(run_room_detection),
+        _run_inference(run_wall_detection),
+        _run_inference(run_door_window_detection),
+    )
+    
+    # Collect results
+    for result in outcomes:
+        if result:
+            key, predictions, error = result
+            if error:
+                errors[key] = error
+            elif predictions:
+                results["predictions"][key] = predictions
+    
+    parallel_time = time.time() - parallel_start
+    print(f"[ML] Parallel inference completed in {parallel_time:.2f}s")
+
+    if errors:
+        results["errors"] = errors
+
+    total_time = time.time() - request_start
+    print(f"[ML] === Analysis completed in {total_time:.2f}s ===")
+    results["processing_time"] = f"{total_time:.2f}s"
+
+    # Keep the analysis so /rescale can apply a new scale without re-running models
+    results["analysis_id"] = uuid.uuid4().hex
+    await run_in_threadpool(analysis_store.set, results["analysis_id"], results)
+
+    # Only cache complete results so a transient model failure is retried next time
+    if cache_key and not errors:
+        await run_in_threadpool(result_cache.set, cache_key, results)
+    
+    return results
 
 @app.post("/analyze", response_class=JSONResponse)
 async def analyze(
+    request: Request,
     file: UploadFile = File(..., description="Image file (plans/photo)"),
     types: Optional[str] = Form(None, description="JSON array of types to analyze"),
     scale: Optional[float] = Form(None, description="Scale in units per pixel"),
     confidence: Optional[float] = Form(None),
     overlap: Optional[float] = Form(None),
-) -> Dict[str, Any]:
+    tiled: bool = Form(False, description="Run models over overlapping tiles of the full-resolution sheet"),
+    response_format: str = Form("full", alias="format", description="'full' or 'compact' (columnar predictions)"),
+    quantize: Optional[float] = Form(None, description="Compact format only: round coordinates to this many pixels"),
+    _slot: None = Depends(_admit(analyze_admission)),
+) -> Response:
     """
     Upload an image and run Roboflow inference for rooms, walls, doors, and windows.
     
@@ -910,214 +1557,137 @@ async def analyze(
     - walls: Uses WALL_MODEL (detects only walls)
     - doors/windows: Uses DOORWINDOW_MODEL (filters to only doors and windows)
     """
-    import time
     request_start = time.time()
     print(f"[ML] === Analysis request started at {time.strftime('%H:%M:%S')} ===")
     try:
-        # Parse types parameter (frontend sends JSON array)
-        types_to_analyze = []
-        if types:
-            try:
-                types_to_analyze = json.loads(types)
-            except json.JSONDecodeError:
-                types_to_analyze = []
-        
-        # Default to all types if none specified
-        if not types_to_analyze:
-            types_to_analyze = ["rooms", "walls", "doors", "windows"]
-        
-        # Determine which models to run
-        detect_rooms = any(t in types_to_analyze for t in ["rooms", "floors", "flooring"])
-        detect_walls = "walls" in types_to_analyze
-        detect_doors_windows = any(t in types_to_analyze for t in ["doors", "windows", "columns", "openings"])
-        
+        _validate_response_format(response_format, quantize)
+        types_to_analyze = _parse_analysis_types(types)
+
         # Read and validate image
         data = await file.read()
-        if not data:
-            raise HTTPException(status_code=400, detail="Empty upload.")
-        
-        # Validate minimum file size (at least 100 bytes for a valid image)
-        if len(data) < 100:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"File too small ({len(data)} bytes). Please upload a valid image file."
-            )
-        
-        # Check file signature (magic bytes) for common image formats
-        file_signature = data[:8]
-        valid_signatures = [
-            b'\x89PNG\r\n\x1a\n',  # PNG
-            b'\xff\xd8\xff',        # JPEG
-            b'GIF87a',              # GIF
-            b'GIF89a',              # GIF
-            b'BM',                  # BMP
-        ]
-        
-        is_valid_image = any(
-            file_signature.startswith(sig) for sig in valid_signatures
+        _validate_image_bytes(data)
+
+        results = await _analyze_image_bytes(
+            data, file.filename, types_to_analyze, scale, confidence, overlap, request_start, tiled
         )
-        
-        if not is_valid_image:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid image format. Please upload a PNG, JPEG, GIF, or BMP file."
-            )
+        return await _respond(request, _format_response(results, response_format, quantize))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Get image dimensions with error handling
-        original_img_w, original_img_h = _image_size_from_bytes(data)
-        
-        # Resize image to max 1536px to speed up Roboflow API
-        # This significantly reduces upload time and processing time
-        MAX_DIMENSION = 1536
-        img = Image.open(io.BytesIO(data))
-        
-        # Calculate scaling factor
-        scale_factor = 1.0
-        if max(original_img_w, original_img_h) > MAX_DIMENSION:
-            scale_factor = MAX_DIMENSION / max(original_img_w, original_img_h)
-            new_w = int(original_img_w * scale_factor)
-            new_h = int(original_img_h * scale_factor)
-            img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-            print(f"[ML] Resized image from {original_img_w}x{original_img_h} to {new_w}x{new_h} (factor: {scale_factor:.2f})")
-        else:
-            new_w, new_h = original_img_w, original_img_h
-            print(f"[ML] Image size {original_img_w}x{original_img_h} is within limit, no resize needed")
-        
-        # Use resized dimensions for inference
-        img_w, img_h = new_w, new_h
 
-        ext = os.path.splitext(file.filename or "")[-1].lower() or ".jpg"
-        temp_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex}{ext}")
-        
-        # Save resized image
-        img.save(temp_path, quality=85, optimize=True)
+@app.options("/analyze-batch", response_class=PlainTextResponse)
+def options_analyze_batch():
+    """Handle CORS preflight requests for /analyze-batch endpoint."""
+    return PlainTextResponse("ok", status_code=200)
 
-        # Inference kwargs
-        infer_kwargs: Dict[str, Any] = {}
-        if confidence is not None:
-            infer_kwargs["confidence"] = confidence
-        if overlap is not None:
-            infer_kwargs["overlap"] = overlap
-
-        results = {
-            "image": {"width": img_w, "height": img_h},
-            "scale": scale,
-            "filename": file.filename,
-            "predictions": {},
-        }
-        errors: Dict[str, str] = {}
+@app.post("/analyze-batch", response_class=JSONResponse)
+async def analyze_batch(
+    request: Request,
+    files: List[UploadFile] = File(..., description="Image files (plans/photos)"),
+    types: Optional[str] = Form(None, description="JSON array of types to analyze"),
+    scale: Optional[float] = Form(None, description="Scale in units per pixel"),
+    confidence: Optional[float] = Form(None),
+    overlap: Optional[float] = Form(None),
+    tiled: bool = Form(False, description="Run models over overlapping tiles of the full-resolution sheet"),
+    response_format: str = Form("full", alias="format", description="'full' or 'compact' (columnar predictions)"),
+    quantize: Optional[float] = Form(None, description="Compact format only: round coordinates to this many pixels"),
+    _slot: None = Depends(_admit(analyze_admission)),
+) -> Response:
+    """
+    Analyze several images in one request with shared types/scale/confidence/overlap.
 
-        # Run all model inferences in parallel for speed
-        import asyncio
-        from concurrent.futures import ThreadPoolExecutor
-        
-        def run_room_detection():
-            if not detect_rooms or not ROOM_MODEL_ID:
-                return None
-            try:
-                raw = _infer_image(temp_path, model_id=ROOM_MODEL_ID, api_key=ROOM_API_KEY, **infer_kwargs)
-                roboflow_rooms = _normalize_predictions(raw, img_w, img_h, scale=scale)
-                
-                # Use custom room model as fallback only if Roboflow returns no results
-                if not roboflow_rooms and CUSTOM_ROOM_MODEL:
-                    print("[ML] Roboflow returned no rooms, using custom room model as fallback")
-                    roboflow_rooms = _run_custom_room_model(
-                        temp_path,
-                        img_w,
-                        img_h,
-                        confidence=confidence or 0.3,
-                        scale=scale
-                    )
-                    print(f"[ML] Custom room model fallback detected {len(roboflow_rooms)} rooms")
-                
-                return ("rooms", roboflow_rooms, None)
-            except Exception as e:
-                return ("rooms", None, str(e))
-        
-        def run_wall_detection():
-            if not detect_walls or not WALL_MODEL_ID:
-                return None
+    Each image goes through the same pipeline as /analyze. Results are returned in upload
+    order; an image that fails validation or inference gets an `error` entry instead of
+    failing the whole batch.
+    """
+    request_start = time.time()
+    if not files:
+        raise HTTPException(status_code=400, detail="No files uploaded.")
+    if len(files) > ANALYZE_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files ({len(files)}). Maximum per batch is {ANALYZE_BATCH_MAX_FILES}.",
+        )
+
+    _validate_response_format(response_format, quantize)
+
+    print(f"[ML] === Batch analysis of {len(files)} images started at {time.strftime('%H:%M:%S')} ===")
+    types_to_analyze = _parse_analysis_types(types)
+    uploads = [(upload.filename, await upload.read()) for upload in files]
+    batch_slots = asyncio.Semaphore(ANALYZE_BATCH_CONCURRENCY)
+
+    async def analyze_one(filename: Optional[str], data: bytes) -> Dict[str, Any]:
+        async with batch_slots:
             try:
-                raw = _infer_image(temp_path, model_id=WALL_MODEL_ID, api_key=WALL_API_KEY, **infer_kwargs)
-                walls = _normalize_predictions(raw, img_w, img_h, scale=scale)
-                return ("walls", walls, None)
+                _validate_image_bytes(data)
+                return await _analyze_image_bytes(
+                    data, filename, types_to_analyze, scale, confidence, overlap, time.time(), tiled
+                )
+            except HTTPException as e:
+                return {"filename": filename, "error": e.detail, "status_code": e.status_code}
             except Exception as e:
-                return ("walls", None, str(e))
-        
-        def run_door_window_detection():
-            if not detect_doors_windows or not DOORWINDOW_MODEL_ID:
-                return None
-            try:
-                # Run Roboflow model
-                raw = _infer_image(temp_path, model_id=DOORWINDOW_MODEL_ID, api_key=DOORWINDOW_API_KEY, **infer_kwargs)
-                # Filter to only include door and window classes
-                roboflow_preds = _normalize_predictions(raw, img_w, img_h, filter_classes=["door", "window", "Door", "Window"], scale=scale)
-                
-                # If custom YOLO model is available, run ensemble learning
-                if CUSTOM_WINDOW_MODEL:
-                    print("[ML] Running ensemble learning for door/window detection")
-                    # Run custom model
-                    custom_preds = _run_custom_yolo_model(
-                        temp_path,
-                        img_w,
-                        img_h,
-                        confidence=confidence or 0.3,
-                        scale=scale
-                    )
-                    
-                    # Combine predictions using ensemble strategy
-                    door_window_preds = _ensemble_door_window_predictions(
-                        roboflow_preds,
-                        custom_preds,
-                        iou_threshold=0.4
-                    )
-                    print(f"[ML] Ensemble result: {len(door_window_preds)} total detections")
-                else:
-                    # No custom model - use Roboflow only
-                    door_window_preds = roboflow_preds
-                    print(f"[ML] Using Roboflow only: {len(door_window_preds)} detections")
-                
-                return ("openings", door_window_preds, None)
-            except Exception as e:
-                return ("openings", None, str(e))
-        
-        # Run all detections in parallel using ThreadPoolExecutor
-        print("[ML] Running parallel model inference...")
-        parallel_start = time.time()
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            room_result = executor.submit(run_room_detection)
-            wall_result = executor.submit(run_wall_detection)
-            door_result = executor.submit(run_door_window_detection)
-            
-            # Collect results
-            for future in [room_result, wall_result, door_result]:
-                result = future.result()
-                if result:
-                    key, predictions, error = result
-                    if error:
-                        errors[key] = error
-                    elif predictions:
-                        results["predictions"][key] = predictions
-        
-        parallel_time = time.time() - parallel_start
-        print(f"[ML] Parallel inference completed in {parallel_time:.2f}s")
+                return {"filename": filename, "error": str(e), "status_code": 500}
 
-        if errors:
-            results["errors"] = errors
+    results = await asyncio.gather(*(analyze_one(filename, data) for filename, data in uploads))
 
-        total_time = time.time() - request_start
-        print(f"[ML] === Analysis completed in {total_time:.2f}s ===")
-        results["processing_time"] = f"{total_time:.2f}s"
-        
-        # Convert numpy types to native Python types for JSON serialization
-        results = convert_numpy_types(results)
-        
-        return results
+    total_time = time.time() - request_start
+    failed = sum(1 for r in results if "error" in r)
+    print(f"[ML] === Batch analysis completed in {total_time:.2f}s ({failed} failed) ===")
+    return await _respond(request, _format_response({
+        "success": failed == 0,
+        "count": len(results),
+        "failed": failed,
+        "results": results,
+        "processing_time": f"{total_time:.2f}s",
+    }, response_format, quantize))
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+@app.options("/rescale", response_class=PlainTextResponse)
+def options_rescale():
+    """Handle CORS preflight requests for /rescale endpoint."""
+    return PlainTextResponse("ok", status_code=200)
+
+@app.post("/rescale", response_class=JSONResponse)
+async def rescale(
+    request: Request,
+    analysis_id: str = Form(..., description="analysis_id returned by /analyze or /analyze-pages"),
+    scale: float = Form(..., description="New drawing scale"),
+    response_format: str = Form("full", alias="format", description="'full' or 'compact' (columnar predictions)"),
+    quantize: Optional[float] = Form(None, description="Compact format only: round coordinates to this many pixels"),
+) -> Response:
+    """
+    Re-apply a corrected drawing scale to a previous analysis.
+    
+    All display metrics are recomputed from the stored pixel measurements,
+    so no image is uploaded and no model is called.
+    """
+    request_start = time.time()
+    
+    if scale <= 0:
+        raise HTTPException(status_code=400, detail="Scale must be greater than 0.")
+    _validate_response_format(response_format, quantize)
+    
+    stored = analysis_store.get(analysis_id)
+    if stored is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Analysis not found: {analysis_id}. It may have expired; please re-run the analysis."
+        )
+    
+    if stored.get("predictions"):
+        _rescale_predictions(stored["predictions"], scale)
+    for page in stored.get("results") or []:
+        if page.get("predictions"):
+            _rescale_predictions(page["predictions"], scale)
+    
+    stored["scale"] = scale
+    total_time = time.time() - request_start
+    stored["processing_time"] = f"{total_time:.3f}s"
+    print(f"[ML] Rescaled analysis {analysis_id} to scale {scale} in {total_time:.3f}s")
+    
+    return await _respond(request, _format_response(stored, response_format, quantize))
 
 
 # Convenience: allow Render's periodic HEAD health probe on /analyze (return 200 quickly)
@@ -1147,11 +1717,145 @@ def options_upload_pdf():
     """Handle CORS preflight requests for /upload-pdf endpoint."""
     return PlainTextResponse("ok", status_code=200)
 
+def _page_image_url(image_path: str) -> str:
+    """Convert a rendered page's file path to its URL under the /uploads static mount."""
+    # e.g., /opt/render/project/src/uploads/pdfs/uuid/page_1.jpg
+    # becomes http://127.0.0.1:8001/uploads/pdfs/uuid/page_1.jpg
+    ml_base_url = os.getenv("ML_BASE_URL", "http://127.0.0.1:8001")
+    rel_path = image_path.replace(UPLOAD_DIR, '').lstrip('/')
+    return f"{ml_base_url}/uploads/{rel_path}"
+
+def _process_uploaded_pdf(
+    pdf_path: str,
+    upload_dir: str,
+    upload_id: str,
+    on_start: Optional[Callable[[int], None]] = None,
+    on_page: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Render and classify a saved upload (blocking); returns the /upload-pdf response body."""
+    # Process PDF - extract pages and classify
+    result = pdf_processor.process_pdf(pdf_path, upload_dir, on_start=on_start, on_page=on_page)
+    
+    # Add upload ID to result
+    result['upload_id'] = upload_id
+    
+    print("\n" + "="*80)
+    print("[ML] PDF PROCESSING COMPLETE")
+    print("="*80)
+    print(f"[ML] Total pages: {result['total_pages']}")
+    analyzable_count = sum(1 for p in result['pages'] if p['analyzable'])
+    print(f"[ML] Analyzable pages: {analyzable_count}/{result['total_pages']}")
+    print("="*80 + "\n")
+    
+    # Convert file paths to HTTP URLs for frontend access
+    for page in result['pages']:
+        if 'image_path' in page and page['image_path']:
+            page['image_path'] = _page_image_url(page['image_path'])
+            print(f"[ML] Converted image path to URL: {page['image_path']}")
+    
+    return {
+        "success": True,
+        "data": result
+    }
+
+async def _save_uploaded_pdf(file: UploadFile) -> Tuple[str, str, str]:
+    """Validate and save an uploaded PDF in a new upload directory; returns (upload_id, upload_dir, pdf_path)."""
+    # Validate file type
+    if not file.filename or not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid file type. Please upload a PDF file."
+        )
+    
+    # Generate unique ID for this upload
+    upload_id = str(uuid.uuid4())
+    upload_dir = os.path.join(PDF_UPLOAD_DIR, upload_id)
+    os.makedirs(upload_dir, exist_ok=True)
+    
+    # Save uploaded PDF
+    pdf_path = os.path.join(upload_dir, file.filename)
+    try:
+        # Read the file content first
+        file_content = await file.read()
+        # Then write it to disk
+        with open(pdf_path, "wb") as buffer:
+            buffer.write(file_content)
+    except Exception as e:
+        error_msg = f"Error saving PDF file: {str(e)}"
+        print(f"[ML] {error_msg}")
+        raise HTTPException(status_code=500, detail=error_msg)
+    
+    print("\n" + "="*80)
+    print("[ML] PDF UPLOAD RECEIVED")
+    print("="*80)
+    print(f"[ML] Filename: {file.filename}")
+    print(f"[ML] Upload ID: {upload_id}")
+    print(f"[ML] PDF Path: {pdf_path}")
+    print(f"[ML] Output Dir: {upload_dir}")
+    print("[ML] Starting PDF processing...")
+    print("="*80 + "\n")
+    
+    return upload_id, upload_dir, pdf_path
+
+def _page_with_url(page: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a processed page with its image path converted to a URL."""
+    if not page.get('image_path'):
+        return dict(page)
+    return dict(page, image_path=_page_image_url(page['image_path']))
+
+def _upload_dir(upload_id: str, not_found: str) -> str:
+    """
+    Directory of an uploaded PDF. Upload IDs are UUIDs we generated, so anything else
+    (e.g. a relative path) is answered with 404 `not_found` instead of touching the filesystem.
+    """
+    try:
+        uuid.UUID(upload_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=404, detail=not_found)
+    upload_dir = os.path.join(PDF_UPLOAD_DIR, upload_id)
+    if os.path.dirname(os.path.realpath(upload_dir)) != os.path.realpath(PDF_UPLOAD_DIR):
+        raise HTTPException(status_code=404, detail=not_found)
+    return upload_dir
+
+def _pdf_job_dir(job_id: str) -> str:
+    """Upload directory of a job (job IDs are upload IDs); 404 for anything but a UUID."""
+    return _upload_dir(job_id, f"PDF job not found: {job_id}")
+
+def _run_pdf_job(job: PdfJob) -> None:
+    """PdfJobQueue runner: process the upload, recording per-page progress, and store the result."""
+    pdf_path, upload_dir = job.payload
+    
+    def page_done(page: Dict[str, Any]) -> None:
+        page = _page_with_url(page)
+        job.add_page({
+            key: page.get(key)
+            for key in ('page_number', 'type', 'title', 'confidence', 'analyzable', 'image_path')
+        })
+    
+    response = _process_uploaded_pdf(pdf_path, upload_dir, job.job_id, job.set_total_pages, page_done)
+    
+    # Results (thumbnails included) live on disk next to the pages, not in memory
+    result_path = os.path.join(upload_dir, PDF_JOB_RESULT_FILE)
+    with open(f"{result_path}.tmp", "wb") as f:
+        f.write(dumps(response))
+    os.replace(f"{result_path}.tmp", result_path)
+
+pdf_jobs = PdfJobQueue(_run_pdf_job, PDF_JOB_WORKERS, PDF_JOB_MAX_QUEUED, PDF_JOB_TTL)
+
 @app.post("/upload-pdf", response_class=JSONResponse)
-async def upload_pdf(file: UploadFile = File(...)) -> Dict[str, Any]:
+async def upload_pdf(
+    request: Request,
+    file: UploadFile = File(...),
+    async_job: bool = Form(False, description="Return a job ID immediately and process in the background"),
+    _slot: None = Depends(_admit(pdf_admission)),
+) -> Response:
     """
     Upload and process a multi-page PDF.
     Returns page classifications and thumbnails.
+    
+    With `async_job`, the PDF is queued for a background worker and the response (202)
+    carries a job ID; poll /pdf-jobs/{job_id} for progress and fetch
+    /pdf-jobs/{job_id}/result once it is done.
     """
     # Force UTF-8 encoding for stdout
     import sys
@@ -1173,73 +1877,29 @@ async def upload_pdf(file: UploadFile = File(...)) -> Dict[str, Any]:
     sys.stderr.flush()
     
     try:
-        # Validate file type
-        if not file.filename or not file.filename.lower().endswith('.pdf'):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid file type. Please upload a PDF file."
-            )
-        
-        # Generate unique ID for this upload
-        upload_id = str(uuid.uuid4())
-        upload_dir = os.path.join(PDF_UPLOAD_DIR, upload_id)
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Save uploaded PDF
-        pdf_path = os.path.join(upload_dir, file.filename)
-        try:
-            # Read the file content first
-            file_content = await file.read()
-            # Then write it to disk
-            with open(pdf_path, "wb") as buffer:
-                buffer.write(file_content)
-        except Exception as e:
-            error_msg = f"Error saving PDF file: {str(e)}"
-            print(f"[ML] {error_msg}")
-            raise HTTPException(status_code=500, detail=error_msg)
-        
-        print("\n" + "="*80)
-        print("[ML] PDF UPLOAD RECEIVED")
-        print("="*80)
-        print(f"[ML] Filename: {file.filename}")
-        print(f"[ML] Upload ID: {upload_id}")
-        print(f"[ML] PDF Path: {pdf_path}")
-        print(f"[ML] Output Dir: {upload_dir}")
-        print("[ML] Starting PDF processing...")
-        print("="*80 + "\n")
-        
-        # Process PDF - extract pages and classify
-        result = pdf_processor.process_pdf(pdf_path, upload_dir)
-        
-        # Add upload ID to result
-        result['upload_id'] = upload_id
-        
-        print("\n" + "="*80)
-        print("[ML] PDF PROCESSING COMPLETE")
-        print("="*80)
-        print(f"[ML] Total pages: {result['total_pages']}")
-        analyzable_count = sum(1 for p in result['pages'] if p['analyzable'])
-        print(f"[ML] Analyzable pages: {analyzable_count}/{result['total_pages']}")
-        print("="*80 + "\n")
-        
-        # Convert numpy types to native Python types for JSON serialization
-        result = convert_numpy_types(result)
+        upload_id, upload_dir, pdf_path = await _save_uploaded_pdf(file)
         
-        # Convert file paths to HTTP URLs for frontend access
-        ml_base_url = os.getenv("ML_BASE_URL", "http://127.0.0.1:8001")
-        for page in result['pages']:
-            if 'image_path' in page and page['image_path']:
-                # Convert absolute path to relative URL
-                # e.g., /opt/render/project/src/uploads/pdfs/uuid/page_1.jpg 
-                # becomes http://127.0.0.1:8001/uploads/pdfs/uuid/page_1.jpg
-                rel_path = page['image_path'].replace(UPLOAD_DIR, '').lstrip('/')
-                page['image_path'] = f"{ml_base_url}/uploads/{rel_path}"
-                print(f"[ML] Converted image path to URL: {page['image_path']}")
+        if async_job:
+            try:
+                pdf_jobs.submit(PdfJob(
+                    upload_id, file.filename, (pdf_path, upload_dir),
+                    state_path=os.path.join(upload_dir, PDF_JOB_STATE_FILE),
+                ))
+            except AdmissionRejected as e:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+                raise _admission_error(e)
+            return await _respond(request, {
+                "success": True,
+                "job_id": upload_id,
+                "upload_id": upload_id,
+                "status": "queued",
+                "status_url": f"/pdf-jobs/{upload_id}",
+                "result_url": f"/pdf-jobs/{upload_id}/result",
+            }, status_code=202)
         
-        return {
-            "success": True,
-            "data": result
-        }
+        return await _respond(
+            request, await run_in_threadpool(_process_uploaded_pdf, pdf_path, upload_dir, upload_id)
+        )
     
     except HTTPException:
         raise
@@ -1254,19 +1914,358 @@ async def upload_pdf(file: UploadFile = File(...)) -> Dict[str, Any]:
         )
 
 
+async def _upload_pdf_events(
+    slot: _StreamSlot,
+    pdf_path: str,
+    upload_dir: str,
+    upload_id: str,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Process a saved upload, yielding `start`, one `page` per finished page, then `done`.
+    Processing runs in a worker thread that keeps `slot` until it finishes.
+    """
+    loop = asyncio.get_running_loop()
+    updates: asyncio.Queue = asyncio.Queue()
+    
+    def emit(event: Optional[Tuple[str, Dict[str, Any]]]) -> None:
+        loop.call_soon_threadsafe(updates.put_nowait, event)
+    
+    def process() -> Dict[str, Any]:
+        try:
+            return _process_uploaded_pdf(
+                pdf_path, upload_dir, upload_id,
+                on_start=lambda total: emit(("start", {"upload_id": upload_id, "total_pages": total})),
+                on_page=lambda page: emit(("page", _page_with_url(page))),
+            )
+        finally:
+            emit(None)
+    
+    work = asyncio.ensure_future(run_in_threadpool(process))
+    slot.hold(work)
+    while (update := await updates.get()) is not None:
+        yield update
+    
+    result = (await work)["data"]
+    yield "done", {
+        "upload_id": upload_id,
+        "total_pages": result["total_pages"],
+        "analyzable_pages": sorted(p["page_number"] for p in result["pages"] if p["analyzable"]),
+    }
+
+@app.post("/upload-pdf/stream")
+async def upload_pdf_stream(request: Request, file: UploadFile = File(...)) -> StreamingResponse:
+    """
+    Streaming variant of /upload-pdf: each page's classification and thumbnail is sent
+    as soon as that page is done, instead of one response after the last page.
+    
+    Events (NDJSON lines, or Server-Sent Events with `Accept: text/event-stream`):
+        start: upload_id, total_pages
+        page:  one processed page, as in the /upload-pdf `pages` list
+        done:  upload_id, total_pages, analyzable_pages
+        error: status_code, detail
+    
+    A saturated server answers 429/503 with Retry-After before streaming starts.
+    """
+    slot = _StreamSlot(pdf_admission)
+    await slot.acquire()
+    try:
+        upload_id, upload_dir, pdf_path = await _save_uploaded_pdf(file)
+    except BaseException:
+        slot.close()
+        raise
+    return _event_stream(request, slot, _upload_pdf_events(slot, pdf_path, upload_dir, upload_id))
+
+async def _pdf_job_state(job_id: str) -> Dict[str, Any]:
+    """
+    Current status of a PDF job: live from this process's queue, otherwise from the state
+    file the job's worker persisted (the job may run in another server process). 404 if unknown.
+    """
+    upload_dir = _pdf_job_dir(job_id)
+    job = pdf_jobs.get(job_id)
+    if job is not None:
+        state = job.snapshot()
+        state["queue_position"] = pdf_jobs.queue_position(job_id)
+    else:
+        state_path = os.path.join(upload_dir, PDF_JOB_STATE_FILE)
+        state = await run_in_threadpool(load_job_state, state_path, pdf_jobs.stale_after)
+        if state is None:
+            raise HTTPException(status_code=404, detail=f"PDF job not found: {job_id}")
+        state.pop("heartbeat_at", None)
+        state["queue_position"] = None
+    if state["status"] == JOB_DONE:
+        state["result_url"] = f"/pdf-jobs/{job_id}/result"
+    return state
+
+@app.get("/pdf-jobs/{job_id}", response_class=JSONResponse)
+async def pdf_job_status(request: Request, job_id: str) -> Response:
+    """
+    Status of a background PDF job: queued / running / done / failed, pages done out of
+    total, and a summary (type, title, analyzable, image URL) of every completed page.
+    Answered by any server worker, from the job's persisted state.
+    """
+    return await _respond(request, await _pdf_job_state(job_id))
+
+@app.get("/pdf-jobs/{job_id}/result", response_class=JSONResponse)
+async def pdf_job_result(request: Request, job_id: str) -> Response:
+    """
+    Result of a finished background PDF job, in the same format as a synchronous
+    /upload-pdf response. 409 while the job is still queued or running.
+    """
+    state = await _pdf_job_state(job_id)
+    if state["status"] == JOB_FAILED:
+        raise HTTPException(status_code=500, detail=f"Failed to process PDF: {state['error']}")
+    if state["status"] != JOB_DONE:
+        raise HTTPException(status_code=409, detail=f"PDF job {job_id} is {state['status']}")
+    
+    result_path = os.path.join(_pdf_job_dir(job_id), PDF_JOB_RESULT_FILE)
+    
+    def read_result() -> Dict[str, Any]:
+        with open(result_path, "rb") as f:
+            return loads(f.read())
+    
+    try:
+        return await _respond(request, await run_in_threadpool(read_result))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"PDF job not found: {job_id}")
+
+
+def _read_page_image(image_path: str) -> tuple[bytes, str, int, int]:
+    """Read a rendered page once: returns (bytes, content hash, width, height)."""
+    with open(image_path, 'rb') as f:
+        page_bytes = f.read()
+    with Image.open(io.BytesIO(page_bytes)) as img:
+        img_w, img_h = img.size
+    return page_bytes, hash_bytes(page_bytes), img_w, img_h
+
+async def _run_model_limited(model_name: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a model call on the inference executor, holding a per-model slot and a global slot."""
+    slots = _page_model_slots.setdefault(model_name, asyncio.Semaphore(PAGE_ANALYSIS_MODEL_CONCURRENCY))
+    async with slots:
+        async with _page_analysis_slots:
+            return await _run_inference(fn, *args)
+
+async def _analyze_pdf_page(
+    upload_dir: str,
+    page_num: Any,
+    types_list: List[str],
+    scale: Optional[float],
+    confidence: Optional[float],
+    tiled: bool = False,
+) -> Dict[str, Any]:
+    """
+    Analyze one rendered PDF page with all requested models running concurrently.
+    With `tiled`, Roboflow models run over overlapping tiles of the full-resolution page.
+    
+    Never raises: model failures are reported in the page's `errors`, and a page
+    that cannot be read is returned with success=False.
+    """
+    image_path = os.path.join(upload_dir, f'page_{page_num}.jpg')
+
+    # Pages not classified as analyzable only have a preview; render them now
+    if not os.path.exists(image_path) and pdf_processor:
+        image_path = await _run_to_completion(
+            run_in_threadpool(pdf_processor.ensure_full_page, upload_dir, page_num)
+        ) or image_path
+
+    if not os.path.exists(image_path):
+        return {
+            'page_number': page_num,
+            'success': False,
+            'error': f'Page {page_num} not found'
+        }
+    
+    try:
+        # Read the page once; every model gets the same in-memory bytes
+        page_bytes, page_digest, img_w, img_h = await _run_to_completion(run_in_threadpool(_read_page_image, image_path))
+        
+        # Determine which models to run
+        detect_rooms = any(t in types_list for t in ["rooms", "floors", "flooring"])
+        detect_walls = "walls" in types_list
+        detect_doors_windows = any(t in types_list for t in ["doors", "windows", "columns", "openings"])
+        
+        # Inference kwargs
+        infer_kwargs: Dict[str, Any] = {}
+        if confidence is not None:
+            infer_kwargs["confidence"] = confidence
+        
+        # Cache entries record the resolution the models saw (see _analyze_image_bytes)
+        ingest_params: Dict[str, Any] = {"input_size": [img_w, img_h]}
+        
+        # Tiled models share one decoded copy of the page
+        decoded_page: List[Image.Image] = []
+        decode_lock = threading.Lock()
+        
+        def page_image() -> Image.Image:
+            with decode_lock:
+                if not decoded_page:
+                    with Image.open(io.BytesIO(page_bytes)) as page:
+                        decoded_page.append(page.convert("RGB"))
+                return decoded_page[0]
+        
+        def roboflow_call(kind: str, model_id: str, api_key: str) -> Dict[str, Any]:
+            if tiled and TILE_SPECS[kind].enabled:
+                spec = TILE_SPECS[kind]
+                return _cached_model_call(
+                    page_digest, model_id, {**infer_kwargs, **ingest_params, "tiles": spec},
+                    lambda: _infer_tiled(page_image(), model_id, api_key, spec, priority=PRIORITY_BATCH, **infer_kwargs),
+                )
+            return _cached_model_call(
+                page_digest, model_id, {**infer_kwargs, **ingest_params},
+                lambda: _infer_image(page_bytes, model_id=model_id, api_key=api_key, priority=PRIORITY_BATCH, **infer_kwargs),
+            )
+        
+        def custom_room_call() -> List[Dict[str, Any]]:
+            return _cached_model_call(
+                page_digest, f"custom-room:{CUSTOM_ROOM_MODEL_VERSION}",
+                {"confidence": confidence or 0.3, "scale": scale, **ingest_params},
+                lambda: _run_custom_room_model(page_bytes, img_w, img_h, confidence=confidence or 0.3, scale=scale),
+            )
+        
+        def custom_window_call() -> List[Dict[str, Any]]:
+            return _cached_model_call(
+                page_digest, f"custom-window:{CUSTOM_WINDOW_MODEL_VERSION}",
+                {"confidence": confidence or 0.3, "scale": scale, **ingest_params},
+                lambda: _run_custom_yolo_model(page_bytes, img_w, img_h, confidence=confidence or 0.3, scale=scale),
+            )
+        
+        # Launch every model for this page at once
+        tasks: Dict[str, Any] = {}
+        if detect_rooms and ROOM_MODEL_ID:
+            tasks["rooms_roboflow"] = _run_model_limited("rooms", roboflow_call, "rooms", ROOM_MODEL_ID, ROOM_API_KEY)
+        if detect_rooms and CUSTOM_ROOM_MODEL:
+            tasks["rooms_custom"] = _run_model_limited("rooms_custom", custom_room_call)
+        if detect_walls and WALL_MODEL_ID:
+            tasks["walls"] = _run_model_limited("walls", roboflow_call, "walls", WALL_MODEL_ID, WALL_API_KEY)
+        if detect_doors_windows and DOORWINDOW_MODEL_ID:
+            tasks["openings"] = _run_model_limited("openings", roboflow_call, "openings", DOORWINDOW_MODEL_ID, DOORWINDOW_API_KEY)
+            if CUSTOM_WINDOW_MODEL:
+                tasks["openings_custom"] = _run_model_limited("openings_custom", custom_window_call)
+        
+        outputs = dict(zip(tasks.keys(), await asyncio.gather(*tasks.values(), return_exceptions=True)))
+        
+        page_predictions = {}
+        page_errors = {}
+        
+        # Rooms: Roboflow plus custom room model
+        if detect_rooms:
+            room_predictions = []
+            
+            raw = outputs.get("rooms_roboflow")
+            if isinstance(raw, Exception):
+                page_errors["rooms_roboflow"] = str(raw)
+            elif raw is not None:
+                roboflow_rooms = _normalize_predictions(raw, img_w, img_h, scale=scale)
+                room_predictions.extend(roboflow_rooms)
+                print(f"[ML] Roboflow room detection found {len(roboflow_rooms)} rooms")
+            
+            custom_rooms = outputs.get("rooms_custom")
+            if isinstance(custom_rooms, Exception):
+                page_errors["rooms_custom"] = str(custom_rooms)
+            elif custom_rooms is not None:
+                # Convert to normalized format
+                custom_rooms_normalized = _normalize_predictions(
+                    {"predictions": custom_rooms}, 
+                    img_w, 
+                    img_h, 
+                    scale=scale
+                )
+                room_predictions.extend(custom_rooms_normalized)
+                print(f"[ML] Custom room detection found {len(custom_rooms_normalized)} rooms")
+            
+            # Fuse both models' rooms: overlapping outlines (polygon IoU above ROOM_FUSION_IOU)
+            # are the same room, and the most confident detection of each is kept
+            if room_predictions:
+                keep = dedupe_polygons(
+                    [room.get("mask") for room in room_predictions],
+                    [room.get("confidence", 0.0) for room in room_predictions],
+                    iou_threshold=ROOM_FUSION_IOU,
+                )
+                page_predictions["rooms"] = [room_predictions[i] for i in keep]
+                print(f"[ML] Combined room detection found {len(keep)} unique rooms")
+        
+        # Walls
+        raw = outputs.get("walls")
+        if isinstance(raw, Exception):
+            page_errors["walls"] = str(raw)
+        elif raw is not None:
+            page_predictions["walls"] = _normalize_predictions(raw, img_w, img_h, scale=scale)
+        
+        # Doors/windows, with ensemble learning if the custom model ran
+        raw = outputs.get("openings")
+        if isinstance(raw, Exception):
+            page_errors["openings"] = str(raw)
+        elif raw is not None:
+            roboflow_preds = _normalize_predictions(raw, img_w, img_h, filter_classes=["door", "window", "Door", "Window"], scale=scale)
+            
+            custom_preds = outputs.get("openings_custom")
+            if isinstance(custom_preds, Exception):
+                page_errors["openings_custom"] = str(custom_preds)
+                custom_preds = None
+            
+            if custom_preds is not None:
+                door_window_preds = _ensemble_door_window_predictions(roboflow_preds, custom_preds, iou_threshold=0.4)
+            else:
+                door_window_preds = roboflow_preds
+            
+            page_predictions["openings"] = door_window_preds
+        
+        print(f"[ML] Page {page_num} analyzed successfully")
+        
+        return {
+            'page_number': page_num,
+            'success': True,
+            'image': {'width': img_w, 'height': img_h},
+            'predictions': page_predictions,
+            'errors': page_errors if page_errors else None
+        }
+        
+    except Exception as e:
+        print(f"[ML] Error analyzing page {page_num}: {str(e)}")
+        return {
+            'page_number': page_num,
+            'success': False,
+            'error': str(e)
+        }
+
 @app.options("/analyze-pages", response_class=PlainTextResponse)
 def options_analyze_pages():
     """Handle CORS preflight requests for /analyze-pages endpoint."""
     return PlainTextResponse("ok", status_code=200)
 
+def _parse_page_analysis(upload_id: str, page_numbers: str, takeoff_types: str) -> Tuple[str, List[Any], List[str]]:
+    """Parse /analyze-pages form fields; returns (upload_dir, page numbers, takeoff types)."""
+    # Parse parameters
+    try:
+        pages_to_analyze = json.loads(page_numbers)
+        types_list = json.loads(takeoff_types)
+    except json.JSONDecodeError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid JSON in parameters: {str(e)}"
+        )
+    
+    # Validate upload directory exists (only our own UUID directories: pages are rendered into it)
+    upload_dir = _upload_dir(upload_id, f"Upload ID not found: {upload_id}")
+    if not os.path.isdir(upload_dir):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Upload ID not found: {upload_id}"
+        )
+    return upload_dir, pages_to_analyze, types_list
+
 @app.post("/analyze-pages", response_class=JSONResponse)
 async def analyze_pages(
+    request: Request,
     upload_id: str = Form(...),
     page_numbers: str = Form(...),  # JSON array of page numbers
     takeoff_types: str = Form(...),  # JSON array of takeoff types
     scale: Optional[float] = Form(None),
     confidence: Optional[float] = Form(None),
-) -> Dict[str, Any]:
+    tiled: bool = Form(False),
+    response_format: str = Form("full", alias="format", description="'full' or 'compact' (columnar predictions)"),
+    quantize: Optional[float] = Form(None, description="Compact format only: round coordinates to this many pixels"),
+    _slot: None = Depends(_admit(pdf_admission)),
+) -> Response:
     """
     Analyze selected pages from an uploaded PDF.
     
@@ -1276,153 +2275,35 @@ async def analyze_pages(
         takeoff_types: JSON array of takeoff types (rooms, walls, doors, windows)
         scale: Scale factor for measurements
         confidence: Confidence threshold for detections
+        tiled: Run Roboflow models over overlapping tiles of each full-resolution page
+        format: 'full' (default) or 'compact' columnar predictions
+        quantize: Compact format only: coordinate rounding step in pixels
     """
     try:
-        # Parse parameters
-        try:
-            pages_to_analyze = json.loads(page_numbers)
-            types_list = json.loads(takeoff_types)
-        except json.JSONDecodeError as e:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid JSON in parameters: {str(e)}"
-            )
-        
-        # Validate upload directory exists
-        upload_dir = os.path.join(PDF_UPLOAD_DIR, upload_id)
-        if not os.path.exists(upload_dir):
-            raise HTTPException(
-                status_code=404,
-                detail=f"Upload ID not found: {upload_id}"
-            )
+        _validate_response_format(response_format, quantize)
+        upload_dir, pages_to_analyze, types_list = _parse_page_analysis(upload_id, page_numbers, takeoff_types)
         
         print(f"[ML] Analyzing {len(pages_to_analyze)} pages from upload {upload_id}")
         
-        results = []
+        # Fan out every page/model pair under the global and per-model limits;
+        # gather keeps results in page order and each page captures its own errors
+        page_slots = asyncio.Semaphore(PAGE_ANALYSIS_CONCURRENCY)
         
-        for page_num in pages_to_analyze:
-            image_path = os.path.join(upload_dir, f'page_{page_num}.jpg')
-            
-            if not os.path.exists(image_path):
-                results.append({
-                    'page_number': page_num,
-                    'success': False,
-                    'error': f'Page {page_num} not found'
-                })
-                continue
-            
-            try:
-                # Get image dimensions
-                with Image.open(image_path) as img:
-                    img_w, img_h = img.size
-                
-                # Determine which models to run
-                detect_rooms = any(t in types_list for t in ["rooms", "floors", "flooring"])
-                detect_walls = "walls" in types_list
-                detect_doors_windows = any(t in types_list for t in ["doors", "windows", "columns", "openings"])
-                
-                # Inference kwargs
-                infer_kwargs: Dict[str, Any] = {}
-                if confidence is not None:
-                    infer_kwargs["confidence"] = confidence
-                
-                page_predictions = {}
-                page_errors = {}
-                
-                # Run room detection if requested
-                if detect_rooms:
-                    room_predictions = []
-                    
-                    # 1. Run Roboflow room detection
-                    if ROOM_MODEL_ID:
-                        try:
-                            raw = _infer_image(image_path, model_id=ROOM_MODEL_ID, api_key=ROOM_API_KEY, **infer_kwargs)
-                            roboflow_rooms = _normalize_predictions(raw, img_w, img_h, scale=scale)
-                            room_predictions.extend(roboflow_rooms)
-                            print(f"[ML] Roboflow room detection found {len(roboflow_rooms)} rooms")
-                        except Exception as e:
-                            page_errors["rooms_roboflow"] = str(e)
-                    
-                    # 2. Run custom room detection model if available
-                    if CUSTOM_ROOM_MODEL:
-                        try:
-                            custom_rooms = _run_custom_room_model(image_path, img_w, img_h, 
-                                                              confidence=confidence, scale=scale)
-                            # Convert to normalized format
-                            custom_rooms_normalized = _normalize_predictions(
-                                {"predictions": custom_rooms}, 
-                                img_w, 
-                                img_h, 
-                                scale=scale
-                            )
-                            room_predictions.extend(custom_rooms_normalized)
-                            print(f"[ML] Custom room detection found {len(custom_rooms_normalized)} rooms")
-                        except Exception as e:
-                            page_errors["rooms_custom"] = str(e)
-                    
-                    # 3. Apply ensemble method (simple merge for now, can be improved with NMS)
-                    if room_predictions:
-                        # For now, just take unique predictions based on class and position
-                        # In a production environment, you might want to implement NMS here
-                        unique_rooms = {}
-                        for room in room_predictions:
-                            # Create a unique key based on class and position
-                            key = f"{room.get('class', 'room')}_{room.get('x', 0):.0f}_{room.get('y', 0):.0f}"
-                            # Keep the one with higher confidence if duplicate
-                            if key not in unique_rooms or room.get('confidence', 0) > unique_rooms[key].get('confidence', 0):
-                                unique_rooms[key] = room
-                        
-                        page_predictions["rooms"] = list(unique_rooms.values())
-                        print(f"[ML] Combined room detection found {len(unique_rooms)} unique rooms")
-                
-                # Run wall detection
-                if detect_walls and WALL_MODEL_ID:
-                    try:
-                        raw = _infer_image(image_path, model_id=WALL_MODEL_ID, api_key=WALL_API_KEY, **infer_kwargs)
-                        page_predictions["walls"] = _normalize_predictions(raw, img_w, img_h, scale=scale)
-                    except Exception as e:
-                        page_errors["walls"] = str(e)
-                
-                # Run door/window detection
-                if detect_doors_windows and DOORWINDOW_MODEL_ID:
-                    try:
-                        raw = _infer_image(image_path, model_id=DOORWINDOW_MODEL_ID, api_key=DOORWINDOW_API_KEY, **infer_kwargs)
-                        roboflow_preds = _normalize_predictions(raw, img_w, img_h, filter_classes=["door", "window", "Door", "Window"], scale=scale)
-                        
-                        # Ensemble learning if custom model available
-                        if CUSTOM_WINDOW_MODEL:
-                            custom_preds = _run_custom_yolo_model(image_path, img_w, img_h, confidence=confidence or 0.3, scale=scale)
-                            door_window_preds = _ensemble_door_window_predictions(roboflow_preds, custom_preds, iou_threshold=0.4)
-                        else:
-                            door_window_preds = roboflow_preds
-                        
-                        page_predictions["openings"] = door_window_preds
-                    except Exception as e:
-                        page_errors["openings"] = str(e)
-                
-                results.append({
-                    'page_number': page_num,
-                    'success': True,
-                    'image': {'width': img_w, 'height': img_h},
-                    'predictions': page_predictions,
-                    'errors': page_errors if page_errors else None
-                })
-                
-                print(f"[ML] Page {page_num} analyzed successfully")
-                
-            except Exception as e:
-                print(f"[ML] Error analyzing page {page_num}: {str(e)}")
-                results.append({
-                    'page_number': page_num,
-                    'success': False,
-                    'error': str(e)
-                })
+        async def analyze_one(page_num):
+            async with page_slots:
+                return await _analyze_pdf_page(upload_dir, page_num, types_list, scale, confidence, tiled)
         
-        return {
+        results = list(await asyncio.gather(*(analyze_one(page_num) for page_num in pages_to_analyze)))
+        
+        response = {
             "success": True,
             "upload_id": upload_id,
+            "analysis_id": uuid.uuid4().hex,
             "results": results
         }
+        await run_in_threadpool(analysis_store.set, response["analysis_id"], response)
+        
+        return await _respond(request, _format_response(response, response_format, quantize))
     
     except HTTPException:
         raise
@@ -1434,6 +2315,92 @@ async def analyze_pages(
         )
 
 
+async def _analyze_pages_events(
+    slot: _StreamSlot,
+    upload_id: str,
+    upload_dir: str,
+    pages_to_analyze: List[Any],
+    types_list: List[str],
+    scale: Optional[float],
+    confidence: Optional[float],
+    tiled: bool,
+    response_format: str,
+    quantize: Optional[float],
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Analyze pages concurrently, yielding each page's result in completion order.
+    If the client leaves early, unfinished pages are cancelled and `slot` is kept until their
+    in-flight model calls and renders have finished.
+    """
+    analysis_id = uuid.uuid4().hex
+    yield "start", {"upload_id": upload_id, "analysis_id": analysis_id, "total_pages": len(pages_to_analyze)}
+    
+    page_slots = asyncio.Semaphore(PAGE_ANALYSIS_CONCURRENCY)
+    
+    async def analyze_one(index, page_num):
+        async with page_slots:
+            return index, await _analyze_pdf_page(upload_dir, page_num, types_list, scale, confidence, tiled)
+    
+    tasks = [asyncio.ensure_future(analyze_one(i, page_num)) for i, page_num in enumerate(pages_to_analyze)]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(tasks)
+    try:
+        for next_page in asyncio.as_completed(tasks):
+            index, result = await next_page
+            results[index] = result
+            yield "page", _format_response(result, response_format, quantize)
+    finally:
+        # Client went away: stop pages that have not finished yet
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            slot.hold(asyncio.gather(*tasks, return_exceptions=True))
+    
+    # Stored in page order, exactly as /analyze-pages would have returned it
+    response = {
+        "success": True,
+        "upload_id": upload_id,
+        "analysis_id": analysis_id,
+        "results": results
+    }
+    await run_in_threadpool(analysis_store.set, analysis_id, response)
+    yield "done", {"upload_id": upload_id, "analysis_id": analysis_id, "total_pages": len(results)}
+
+@app.post("/analyze-pages/stream")
+async def analyze_pages_stream(
+    request: Request,
+    upload_id: str = Form(...),
+    page_numbers: str = Form(...),  # JSON array of page numbers
+    takeoff_types: str = Form(...),  # JSON array of takeoff types
+    scale: Optional[float] = Form(None),
+    confidence: Optional[float] = Form(None),
+    tiled: bool = Form(False),
+    response_format: str = Form("full", alias="format", description="'full' or 'compact' (columnar predictions)"),
+    quantize: Optional[float] = Form(None, description="Compact format only: round coordinates to this many pixels"),
+) -> StreamingResponse:
+    """
+    Streaming variant of /analyze-pages: each page's predictions are sent as soon as
+    that page is analyzed (in completion order, not request order).
+    
+    Events (NDJSON lines, or Server-Sent Events with `Accept: text/event-stream`):
+        start: upload_id, analysis_id, total_pages
+        page:  one entry of the /analyze-pages `results` list
+        done:  upload_id, analysis_id, total_pages (the full analysis is then stored under analysis_id)
+        error: status_code, detail
+    
+    A saturated server answers 429/503 with Retry-After before streaming starts.
+    """
+    _validate_response_format(response_format, quantize)
+    upload_dir, pages_to_analyze, types_list = _parse_page_analysis(upload_id, page_numbers, takeoff_types)
+    print(f"[ML] Streaming analysis of {len(pages_to_analyze)} pages from upload {upload_id}")
+    
+    slot = _StreamSlot(pdf_admission)
+    await slot.acquire()
+    return _event_stream(request, slot, _analyze_pages_events(
+        slot, upload_id, upload_dir, pages_to_analyze, types_list,
+        scale, confidence, tiled, response_format, quantize,
+    ))
+
+
 @app.options("/upload-pdf", response_class=PlainTextResponse)
 def options_upload_pdf():
     """Handle CORS preflight for PDF upload."""
@@ -1444,3 +2411,27 @@ def options_upload_pdf():
 def options_analyze_pages():
     """Handle CORS preflight for page analysis."""
     return PlainTextResponse("ok", status_code=200)
+
+
+@app.options("/upload-pdf/stream", response_class=PlainTextResponse)
+def options_upload_pdf_stream():
+    """Handle CORS preflight for streaming PDF upload."""
+    return PlainTextResponse("ok", status_code=200)
+
+
+@app.options("/analyze-pages/stream", response_class=PlainTextResponse)
+def options_analyze_pages_stream():
+    """Handle CORS preflight for streaming page analysis."""
+    return PlainTextResponse("ok", status_code=200)
+
+
+@app.options("/pdf-jobs/{job_id}", response_class=PlainTextResponse)
+def options_pdf_job_status(job_id: str):
+    """Handle CORS preflight for PDF job status."""
+    return PlainTextResponse("ok", status_code=200)
+
+
+@app.options("/pdf-jobs/{job_id}/result", response_class=PlainTextResponse)
+def options_pdf_job_result(job_id: str):
+    """Handle CORS preflight for PDF job results."""
+    return PlainTextResponse("ok", status_code=200)
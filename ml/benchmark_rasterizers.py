@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Compare PDF rasterization engines (Poppler via pdf2image vs PyMuPDF) on real sheet sets.
+
+Measures, per PDF and engine, the same work PDFProcessor does on upload:
+  open    - open the document, read page count and page sizes
+  preview - render every page at preview size (longest edge), PDF_RENDER_WINDOW pages at a time
+  full    - render every page at full resolution (PDF_RENDER_DPI)
+
+Usage:
+    python benchmark_rasterizers.py plans/*.pdf
+    python benchmark_rasterizers.py set.pdf --engines pymupdf --dpi 200 --repeat 3 --skip-full
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+from rasterizer import RASTERIZERS, fitz, open_document
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def _render_all(document, window, **options):
+    pixels = 0
+    for first in range(1, document.page_count + 1, window):
+        last = min(first + window - 1, document.page_count)
+        for image in document.render(first, last, **options):
+            pixels += image.width * image.height
+            image.close()
+    return pixels
+
+
+def benchmark(pdf_path, engine, args):
+    """Median open/preview/full timings (seconds) over `args.repeat` runs."""
+    runs = {"open": [], "preview": [], "full": []}
+    pages = 0
+    for _ in range(args.repeat):
+        elapsed, document = _timed(lambda: open_document(pdf_path, engine))
+        with document:
+            pages = document.page_count
+            elapsed_sizes, _ = _timed(lambda: [document.page_size(n) for n in range(1, pages + 1)])
+            runs["open"].append(elapsed + elapsed_sizes)
+            runs["preview"].append(_timed(lambda: _render_all(document, args.window, size=args.preview_size))[0])
+            if not args.skip_full:
+                runs["full"].append(_timed(lambda: _render_all(document, args.window, dpi=args.dpi))[0])
+    return pages, {name: statistics.median(times) for name, times in runs.items() if times}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="+", help="PDF files to render")
+    parser.add_argument("--engines", nargs="+", default=list(RASTERIZERS), choices=RASTERIZERS)
+    parser.add_argument("--dpi", type=int, default=int(os.getenv("PDF_RENDER_DPI", "300")))
+    # PDFProcessor never renders previews below its 1200px UI thumbnail size
+    parser.add_argument("--preview-size", type=int, default=max(int(os.getenv("PDF_PREVIEW_SIZE", "1024")), 1200))
+    parser.add_argument("--window", type=int, default=int(os.getenv("PDF_RENDER_WINDOW", "2")))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--skip-full", action="store_true", help="Only time open + preview rendering")
+    args = parser.parse_args()
+
+    if "pymupdf" in args.engines and fitz is None:
+        print("PyMuPDF is not installed; skipping the pymupdf engine")
+        args.engines = [e for e in args.engines if e != "pymupdf"]
+
+    print("=" * 80)
+    print(f"RASTERIZER BENCHMARK  dpi={args.dpi} preview={args.preview_size}px window={args.window} repeat={args.repeat}")
+    print("=" * 80)
+    print(f"{'pdf':<32} {'engine':<8} {'pages':>5} {'open':>8} {'preview':>9} {'full':>9} {'full/page':>10}")
+
+    for pdf_path in args.pdfs:
+        for engine in args.engines:
+            try:
+                pages, t = benchmark(pdf_path, engine, args)
+            except Exception as e:
+                print(f"{os.path.basename(pdf_path)[:32]:<32} {engine:<8} ERROR: {e}")
+                continue
+            full = t.get("full")
+            print(
+                f"{os.path.basename(pdf_path)[:32]:<32} {engine:<8} {pages:>5} "
+                f"{t['open']:>7.3f}s {t['preview']:>8.3f}s "
+                f"{(f'{full:.3f}s' if full is not None else '-'):>9} "
+                f"{(f'{full / max(pages, 1):.3f}s' if full is not None else '-'):>10}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
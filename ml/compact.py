@@ -0,0 +1,112 @@
+"""
+Compact Response Module for EstimAgent
+Opt-in columnar encoding of prediction lists.
+
+The full format repeats every polygon in `mask`, `points` and `points_norm` as lists
+of {"x", "y"} dicts. The compact format groups each prediction list into columns and
+packs all vertices into one flat coordinate array:
+
+    {
+      "count": 2,
+      "id": [...], "class": [...], "category": [...], "confidence": [...],
+      "bbox": [x, y, w, h, x, y, w, h],            # null where an item has no box
+      "vertex_offsets": [0, 4, 9],                 # item i owns vertices offsets[i]..offsets[i+1]
+      "coords": [x0, y0, x1, y1, ...],             # pixel coordinates, flat
+      "metrics": {"area_pixels": [...], ...},      # one column per key, null where missing
+      "display": {"area_sqft": [...], ...}
+    }
+
+Normalized coordinates are left to the client (coords / image width, height).
+With `quantize`, coordinates are integers in units of that many pixels.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from geometry import PolygonBatch
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_FORMATS = ("full", "compact")
+COMPACT_FORMAT_VERSION = "columnar-v1"
+
+# Per-item keys that are dropped (derivable) or encoded in dedicated columns
+_ENCODED_KEYS = {
+    "id", "class", "category", "confidence", "bbox", "bbox_norm",
+    "mask", "points", "points_norm", "metrics", "display",
+    "x", "y", "width", "height",
+}
+
+
+def _item_bbox(item: Dict[str, Any]) -> Optional[List[float]]:
+    bbox = item.get("bbox")
+    if bbox:
+        return [bbox["x"], bbox["y"], bbox["w"], bbox["h"]]
+    if all(k in item for k in ("x", "y", "width", "height")):
+        return [item["x"], item["y"], item["width"], item["height"]]
+    return None
+
+
+def _columns(items: List[Dict[str, Any]], field: str) -> Dict[str, List[Any]]:
+    """One column per key found in any item's `field` dict (metrics/display)."""
+    keys: Dict[str, None] = {}
+    for item in items:
+        keys.update(dict.fromkeys(item.get(field) or {}))
+    return {key: [(item.get(field) or {}).get(key) for item in items] for key in keys}
+
+
+def compact_predictions(items: List[Dict[str, Any]], quantize: Optional[float] = None) -> Dict[str, Any]:
+    """Encode one list of normalized predictions as columns (see module docstring)."""
+    polygons = PolygonBatch.from_point_lists([item.get("mask") or item.get("points") for item in items])
+    coords = polygons.coords.ravel()
+    if quantize:
+        coords = np.rint(coords / quantize).astype(np.int64)
+
+    bboxes: List[Any] = []
+    for item in items:
+        bboxes.extend(_item_bbox(item) or (None, None, None, None))
+
+    columns: Dict[str, Any] = {
+        "count": len(items),
+        "id": [item.get("id") for item in items],
+        "class": [item.get("class") for item in items],
+        "category": [item.get("category") for item in items],
+        "confidence": [item.get("confidence") for item in items],
+        "bbox": bboxes,
+        "vertex_offsets": polygons.offsets.tolist(),
+        "coords": coords.tolist(),
+        "metrics": _columns(items, "metrics"),
+        "display": _columns(items, "display"),
+    }
+
+    # Anything else (source, class_id, raw custom-model fields) as sparse extra columns
+    extra_keys: Dict[str, None] = {}
+    for item in items:
+        extra_keys.update(dict.fromkeys(k for k in item if k not in _ENCODED_KEYS))
+    if extra_keys:
+        columns["extra"] = {key: [item.get(key) for item in items] for key in extra_keys}
+    return columns
+
+
+def compact_response(response: Dict[str, Any], quantize: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Return a copy of an analysis response with every `predictions` mapping
+    (top level, and per entry of `results` for pages and batches) in compact form.
+    """
+    out = dict(response)
+    if isinstance(out.get("predictions"), dict):
+        out["predictions"] = {
+            group: compact_predictions(items or [], quantize)
+            for group, items in out["predictions"].items()
+        }
+        out["format"] = COMPACT_FORMAT_VERSION
+        out["coord_quantum"] = quantize
+    if isinstance(out.get("results"), list):
+        out["results"] = [
+            compact_response(entry, quantize) if isinstance(entry, dict) else entry
+            for entry in out["results"]
+        ]
+        out["format"] = COMPACT_FORMAT_VERSION
+    return out
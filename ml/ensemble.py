@@ -0,0 +1,201 @@
+"""
+Ensemble Module for EstimAgent
+Vectorized box matching and de-duplication for combining door/window detections from
+the Roboflow model and the custom YOLO model.
+
+Works on normalized predictions (`bbox` = center x/y, w/h in pixels). Pairwise IoU is
+computed as one NumPy matrix; matching is greedy (highest IoU first) or optimal
+(Hungarian, when SciPy is available); the merged set then goes through class-aware NMS.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Optimal assignment (ultralytics pulls in SciPy); greedy matching is used without it
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+logger = logging.getLogger(__name__)
+
+MATCHING_METHODS = ("greedy", "optimal")
+FUSION_METHODS = ("max", "wbf")
+
+
+def boxes_xyxy(preds: List[Dict[str, Any]]) -> np.ndarray:
+    """N x 4 corner boxes (x1, y1, x2, y2) from the predictions' center-format `bbox`."""
+    if not preds:
+        return np.zeros((0, 4), dtype=np.float64)
+    centers = np.array(
+        [(p["bbox"]["x"], p["bbox"]["y"], p["bbox"]["w"], p["bbox"]["h"]) for p in preds],
+        dtype=np.float64,
+    )
+    half = centers[:, 2:] / 2.0
+    return np.hstack((centers[:, :2] - half, centers[:, :2] + half))
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between N x 4 and M x 4 corner boxes (N x M)."""
+    if not len(a) or not len(b):
+        return np.zeros((len(a), len(b)), dtype=np.float64)
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0.0, None)
+    inter = wh[..., 0] * wh[..., 1]
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def match_boxes(iou: np.ndarray, threshold: float, method: str = "greedy") -> List[Tuple[int, int]]:
+    """
+    One-to-one matching of rows to columns with IoU above `threshold`.
+
+    - greedy: repeatedly take the highest remaining IoU pair.
+    - optimal: maximize total IoU (Hungarian); falls back to greedy without SciPy.
+    """
+    if not iou.size:
+        return []
+
+    if method == "optimal" and linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(iou, maximize=True)
+        return [(int(r), int(c)) for r, c in zip(rows, cols) if iou[r, c] > threshold]
+
+    rows, cols = np.nonzero(iou > threshold)
+    order = np.argsort(-iou[rows, cols], kind="stable")
+    used_rows, used_cols = set(), set()
+    pairs = []
+    for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        pairs.append((r, c))
+    return pairs
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, classes: Optional[List[Any]], iou_threshold: float) -> List[int]:
+    """
+    Greedy non-maximum suppression; boxes of different classes never suppress each other.
+    Returns kept indices in descending score order.
+    """
+    if not len(boxes):
+        return []
+
+    # Class-aware in one pass: shift each class to its own disjoint region of the plane
+    if classes is not None:
+        _, class_ids = np.unique(np.array([str(c) for c in classes]), return_inverse=True)
+        span = float(boxes.max() - boxes.min()) + 1.0
+        boxes = boxes + (class_ids * span)[:, None]
+
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(int(i))
+        rest = order[1:]
+        top_left = np.maximum(boxes[i, :2], boxes[rest, :2])
+        bottom_right = np.minimum(boxes[i, 2:], boxes[rest, 2:])
+        wh = np.clip(bottom_right - top_left, 0.0, None)
+        inter = wh[:, 0] * wh[:, 1]
+        union = areas[i] + areas[rest] - inter
+        iou = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+        order = rest[iou <= iou_threshold]
+    return keep
+
+
+def _weighted(a: Dict[str, float], b: Dict[str, float], wa: float, wb: float) -> Dict[str, float]:
+    return {k: (a[k] * wa + b[k] * wb) / (wa + wb) for k in a if k in b}
+
+
+def fuse_pair(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Weighted box fusion of two matched predictions: confidence-weighted average box,
+    mean confidence, class and metadata from the more confident one. bbox, bbox_norm
+    and display sizes are all linear in the box, so they are averaged the same way.
+    """
+    wa, wb = float(a["confidence"]), float(b["confidence"])
+    if wa + wb <= 0:
+        wa = wb = 1.0
+    best = a if a["confidence"] >= b["confidence"] else b
+    fused = dict(best)
+    fused["confidence"] = (float(a["confidence"]) + float(b["confidence"])) / 2.0
+    fused["source"] = "ensemble"
+
+    bbox = _weighted(a["bbox"], b["bbox"], wa, wb)
+    fused["bbox"] = bbox
+    x1, y1 = bbox["x"] - bbox["w"] / 2, bbox["y"] - bbox["h"] / 2
+    x2, y2 = bbox["x"] + bbox["w"] / 2, bbox["y"] + bbox["h"] / 2
+    fused["mask"] = [{"x": x1, "y": y1}, {"x": x2, "y": y1}, {"x": x2, "y": y2}, {"x": x1, "y": y2}]
+    fused["points"] = fused["mask"]
+
+    if "bbox_norm" in a and "bbox_norm" in b:
+        norm = _weighted(a["bbox_norm"], b["bbox_norm"], wa, wb)
+        fused["bbox_norm"] = norm
+        nx1, ny1 = norm["x"] - norm["w"] / 2, norm["y"] - norm["h"] / 2
+        nx2, ny2 = norm["x"] + norm["w"] / 2, norm["y"] + norm["h"] / 2
+        fused["points_norm"] = [{"x": nx1, "y": ny1}, {"x": nx2, "y": ny1}, {"x": nx2, "y": ny2}, {"x": nx1, "y": ny2}]
+
+    if a.get("display") and b.get("display"):
+        fused["display"] = _weighted(a["display"], b["display"], wa, wb)
+    return fused
+
+
+def ensemble_predictions(
+    primary: List[Dict[str, Any]],
+    secondary: List[Dict[str, Any]],
+    match_threshold: float = 0.4,
+    nms_threshold: float = 0.5,
+    matching: str = "greedy",
+    fusion: str = "max",
+) -> List[Dict[str, Any]]:
+    """
+    Combine two models' detections of the same image.
+
+    1. Match primary to secondary boxes one-to-one above `match_threshold` IoU.
+    2. Each matched pair becomes one detection: the more confident one (`fusion="max"`)
+       or their weighted box fusion (`fusion="wbf"`).
+    3. Unmatched detections from both models are kept.
+    4. Class-aware NMS at `nms_threshold` removes remaining duplicates.
+
+    Predictions without a `bbox` are passed through unchanged.
+    """
+    primary_boxed = [p for p in primary if "bbox" in p]
+    secondary_boxed = [p for p in secondary if "bbox" in p]
+    passthrough = [p for p in primary if "bbox" not in p] + [p for p in secondary if "bbox" not in p]
+
+    iou = iou_matrix(boxes_xyxy(primary_boxed), boxes_xyxy(secondary_boxed))
+    pairs = match_boxes(iou, match_threshold, matching)
+
+    combined: List[Dict[str, Any]] = []
+    for i, j in pairs:
+        a, b = primary_boxed[i], secondary_boxed[j]
+        if fusion == "wbf":
+            combined.append(fuse_pair(a, b))
+        else:
+            combined.append(a if a["confidence"] >= b["confidence"] else b)
+
+    matched_primary = {i for i, _ in pairs}
+    matched_secondary = {j for _, j in pairs}
+    combined.extend(p for i, p in enumerate(primary_boxed) if i not in matched_primary)
+    combined.extend(p for j, p in enumerate(secondary_boxed) if j not in matched_secondary)
+
+    if combined:
+        scores = np.array([float(p["confidence"]) for p in combined], dtype=np.float64)
+        classes = [p.get("category") or p.get("class") for p in combined]
+        keep = nms(boxes_xyxy(combined), scores, classes, nms_threshold)
+        suppressed = len(combined) - len(keep)
+        combined = [combined[k] for k in keep]
+    else:
+        suppressed = 0
+
+    logger.info(
+        f"Ensemble: {len(primary_boxed)} + {len(secondary_boxed)} -> {len(pairs)} matched ({matching}/{fusion}), "
+        f"{suppressed} suppressed by NMS, {len(combined)} kept"
+    )
+    return combined + passthrough
@@ -0,0 +1,303 @@
+"""
+Geometry Module for EstimAgent
+Vectorized polygon metrics. All polygons of a response are packed into one contiguous
+vertex array plus offsets, so area, perimeter, bounds and normalized coordinates
+are computed for every polygon in a single NumPy pass instead of per-vertex Python loops.
+
+Also polygon IoU and union, and a grid spatial index for de-duplicating overlapping polygons.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Exact polygon overlap when Shapely is installed; rasterized estimate otherwise
+try:
+    from shapely.geometry import Polygon as ShapelyPolygon, box as shapely_box
+except ImportError:
+    ShapelyPolygon = None
+    shapely_box = None
+
+
+class PolygonBatch:
+    """
+    Polygons packed as `coords` (V x 2 float64 vertex array) and `offsets` (P + 1 indices):
+    polygon i is `coords[offsets[i]:offsets[i + 1]]`. Polygons are treated as closed.
+    """
+
+    def __init__(self, coords: np.ndarray, offsets: np.ndarray):
+        self.coords = coords
+        self.offsets = offsets
+        self.counts = np.diff(offsets)
+
+    @classmethod
+    def from_point_lists(cls, point_lists: Sequence[Optional[Sequence[Any]]]) -> "PolygonBatch":
+        """
+        Pack lists of `{"x": .., "y": ..}` points. Entries that are not dicts with both
+        keys are skipped; a None or empty list becomes an empty polygon.
+        """
+        xs: List[float] = []
+        ys: List[float] = []
+        counts = [0] * len(point_lists)
+        for i, pts in enumerate(point_lists):
+            if not pts:
+                continue
+            valid = [pt for pt in pts if isinstance(pt, dict) and "x" in pt and "y" in pt]
+            counts[i] = len(valid)
+            xs.extend([pt["x"] for pt in valid])
+            ys.extend([pt["y"] for pt in valid])
+
+        coords = np.empty((len(xs), 2), dtype=np.float64)
+        coords[:, 0] = xs
+        coords[:, 1] = ys
+        offsets = np.zeros(len(point_lists) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(coords, offsets)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def _next_vertex(self) -> np.ndarray:
+        """Index of each vertex's successor, wrapping to the first vertex of its polygon."""
+        nxt = np.arange(1, len(self.coords) + 1)
+        nonempty = self.counts > 0
+        nxt[self.offsets[1:][nonempty] - 1] = self.offsets[:-1][nonempty]
+        return nxt
+
+    def _sum_per_polygon(self, values: np.ndarray, min_vertices: int) -> np.ndarray:
+        """Sum per-vertex values for each polygon; polygons below `min_vertices` get 0."""
+        out = np.zeros(len(self), dtype=np.float64)
+        nonempty = self.counts > 0
+        if len(values) and nonempty.any():
+            out[nonempty] = np.add.reduceat(values, self.offsets[:-1][nonempty])
+        out[self.counts < min_vertices] = 0.0
+        return out
+
+    def areas(self) -> np.ndarray:
+        """Polygon areas (shoelace formula)."""
+        if not len(self.coords):
+            return np.zeros(len(self), dtype=np.float64)
+        nxt = self._next_vertex()
+        x, y = self.coords[:, 0], self.coords[:, 1]
+        cross = x * y[nxt] - x[nxt] * y
+        return np.abs(self._sum_per_polygon(cross, 3)) / 2.0
+
+    def perimeters(self) -> np.ndarray:
+        """Polygon perimeters, including the closing edge."""
+        if not len(self.coords):
+            return np.zeros(len(self), dtype=np.float64)
+        nxt = self._next_vertex()
+        edges = self.coords[nxt] - self.coords
+        return self._sum_per_polygon(np.hypot(edges[:, 0], edges[:, 1]), 2)
+
+    def bounds(self) -> np.ndarray:
+        """P x 4 array of (min_x, min_y, max_x, max_y); empty polygons get NaN."""
+        out = np.full((len(self), 4), np.nan, dtype=np.float64)
+        nonempty = self.counts > 0
+        if nonempty.any():
+            starts = self.offsets[:-1][nonempty]
+            out[nonempty, :2] = np.minimum.reduceat(self.coords, starts, axis=0)
+            out[nonempty, 2:] = np.maximum.reduceat(self.coords, starts, axis=0)
+        return out
+
+    def point_dicts(self, scale_x: float = 1.0, scale_y: float = 1.0) -> List[List[Dict[str, float]]]:
+        """
+        Unpack to per-polygon lists of `{"x": .., "y": ..}` (the response format),
+        optionally scaled, e.g. by 1/width and 1/height for normalized coordinates.
+        """
+        xs = (self.coords[:, 0] * scale_x).tolist()
+        ys = (self.coords[:, 1] * scale_y).tolist()
+        return [
+            [{"x": x, "y": y} for x, y in zip(xs[start:end], ys[start:end])]
+            for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist())
+        ]
+
+
+def polygon_iou(
+    a: np.ndarray,
+    b: np.ndarray,
+    resolution: int = 128,
+    clip: Optional[Sequence[float]] = None,
+) -> float:
+    """
+    IoU of two simple polygons given as K x 2 vertex arrays (concave shapes allowed).
+    With `clip` (min_x, min_y, max_x, max_y), only the parts inside that rectangle count.
+
+    Uses Shapely when available; otherwise both polygons are rasterized on a
+    `resolution`-cell grid over their combined (clipped) bounds.
+    """
+    if len(a) < 3 or len(b) < 3:
+        return 0.0
+
+    if ShapelyPolygon is not None:
+        pa, pb = ShapelyPolygon(a).buffer(0), ShapelyPolygon(b).buffer(0)
+        if clip is not None:
+            window = shapely_box(*clip)
+            pa, pb = pa.intersection(window), pb.intersection(window)
+        union = pa.union(pb).area
+        return float(pa.intersection(pb).area / union) if union > 0 else 0.0
+
+    lo = np.minimum(a.min(axis=0), b.min(axis=0))
+    hi = np.maximum(a.max(axis=0), b.max(axis=0))
+    if clip is not None:
+        lo = np.maximum(lo, np.asarray(clip[:2], dtype=np.float64))
+        hi = np.minimum(hi, np.asarray(clip[2:], dtype=np.float64))
+        if (hi <= lo).any():
+            return 0.0
+    extent = float((hi - lo).max())
+    if extent <= 0:
+        return 0.0
+    cell = extent / resolution
+    size = tuple(int(v) + 1 for v in np.ceil((hi - lo) / cell))
+
+    def rasterize(poly: np.ndarray) -> np.ndarray:
+        canvas = Image.new("1", size, 0)
+        ImageDraw.Draw(canvas).polygon([tuple(pt) for pt in ((poly - lo) / cell).tolist()], fill=1)
+        return np.asarray(canvas, dtype=bool)
+
+    ra, rb = rasterize(a), rasterize(b)
+    union = np.count_nonzero(ra | rb)
+    return float(np.count_nonzero(ra & rb) / union) if union else 0.0
+
+
+def convex_hull(points: np.ndarray) -> np.ndarray:
+    """Convex hull of a K x 2 point array, counter-clockwise (monotone chain)."""
+    pts = np.unique(np.asarray(points, dtype=np.float64), axis=0)
+    if len(pts) < 3:
+        return pts
+
+    def half(ordered: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+        chain: List[Tuple[float, float]] = []
+        for x, y in ordered:
+            # Drop the last point while it does not make a left turn
+            while len(chain) >= 2 and (
+                (chain[-1][0] - chain[-2][0]) * (y - chain[-2][1]) - (chain[-1][1] - chain[-2][1]) * (x - chain[-2][0])
+            ) <= 0:
+                chain.pop()
+            chain.append((x, y))
+        return chain
+
+    ordered = [tuple(pt) for pt in pts.tolist()]
+    lower, upper = half(ordered), half(ordered[::-1])
+    return np.array(lower[:-1] + upper[:-1], dtype=np.float64)
+
+
+def polygon_union(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Outline covering two overlapping polygons given as K x 2 vertex arrays.
+
+    Uses the exact union (outer boundary) when Shapely is available; otherwise the convex
+    hull of both, which is exact for convex shapes and slightly larger for concave ones.
+    """
+    if ShapelyPolygon is not None and len(a) >= 3 and len(b) >= 3:
+        merged = ShapelyPolygon(a).buffer(0).union(ShapelyPolygon(b).buffer(0))
+        if merged.geom_type != "Polygon":
+            merged = merged.convex_hull
+        if merged.geom_type == "Polygon" and not merged.is_empty:
+            return np.asarray(merged.exterior.coords[:-1], dtype=np.float64)
+    return convex_hull(np.vstack([a, b]))
+
+
+class GridIndex:
+    """
+    Uniform-grid spatial index over axis-aligned bounds, for finding candidate overlaps
+    in near-linear time. The cell size defaults to the median box extent, but never
+    drops below 1/MAX_GRID_DIVISIONS of the extent of all boxes, so tiny or degenerate
+    boxes cannot make one large box span an unbounded number of cells. Boxes that would
+    still cover more than MAX_CELLS_PER_ITEM cells are kept in a separate list that
+    every query checks directly.
+    """
+
+    MAX_GRID_DIVISIONS = 256
+    MAX_CELLS_PER_ITEM = 1024
+
+    def __init__(self, bounds: np.ndarray, cell_size: Optional[float] = None):
+        """
+        Args:
+            bounds: N x 4 (min_x, min_y, max_x, max_y); rows with NaN are not indexed
+        """
+        self.bounds = bounds
+        valid = ~np.isnan(bounds).any(axis=1)
+        self._valid = np.flatnonzero(valid)
+        total_extent = 0.0
+        if len(self._valid):
+            b = bounds[valid]
+            total_extent = float(max(b[:, 2].max() - b[:, 0].min(), b[:, 3].max() - b[:, 1].min()))
+        if cell_size is None:
+            extents = np.maximum(bounds[valid, 2] - bounds[valid, 0], bounds[valid, 3] - bounds[valid, 1])
+            cell_size = float(np.median(extents)) if len(extents) else 1.0
+        self.cell_size = max(cell_size, total_extent / self.MAX_GRID_DIVISIONS, 1e-9)
+
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._large: List[int] = []
+        for i in self._valid.tolist():
+            x0, y0, x1, y1 = self._cell_range(bounds[i])
+            if (x1 - x0 + 1) * (y1 - y0 + 1) > self.MAX_CELLS_PER_ITEM:
+                self._large.append(i)
+                continue
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    self._cells.setdefault((cx, cy), []).append(i)
+
+    def _cell_range(self, box: np.ndarray) -> Tuple[int, int, int, int]:
+        x0, y0, x1, y1 = (np.floor(np.asarray(box) / self.cell_size)).astype(np.int64).tolist()
+        return x0, y0, x1, y1
+
+    def query(self, box: np.ndarray) -> List[int]:
+        """Indices whose bounds intersect `box`."""
+        x0, y0, x1, y1 = self._cell_range(box)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > self.MAX_CELLS_PER_ITEM:
+            # Cheaper to test every box than to walk that many cells
+            ids = self._valid
+        else:
+            found = set(self._large)
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    found.update(self._cells.get((cx, cy), ()))
+            if not found:
+                return []
+            ids = np.fromiter(found, dtype=np.int64, count=len(found))
+        b = self.bounds[ids]
+        hit = (b[:, 0] <= box[2]) & (b[:, 2] >= box[0]) & (b[:, 1] <= box[3]) & (b[:, 3] >= box[1])
+        return ids[hit].tolist()
+
+
+def dedupe_polygons(
+    point_lists: Sequence[Optional[Sequence[Any]]],
+    scores: Sequence[float],
+    iou_threshold: float = 0.5,
+) -> List[int]:
+    """
+    Polygon NMS: visit polygons by descending score and drop any lower-scored polygon
+    whose IoU with a kept one exceeds `iou_threshold`. Candidates come from a grid
+    index on the polygon bounds; only those are checked with exact polygon IoU.
+
+    Returns kept indices in descending score order. Degenerate polygons (< 3 points)
+    are always kept.
+    """
+    batch = PolygonBatch.from_point_lists(point_lists)
+    bounds = batch.bounds()
+    bounds[batch.counts < 3] = np.nan
+    index = GridIndex(bounds)
+
+    order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    suppressed = np.zeros(len(order), dtype=bool)
+
+    keep = []
+    for i in order.tolist():
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        if batch.counts[i] < 3:
+            continue
+        poly_i = batch.coords[batch.offsets[i]:batch.offsets[i + 1]]
+        for j in index.query(bounds[i]):
+            if rank[j] <= rank[i] or suppressed[j]:
+                continue
+            poly_j = batch.coords[batch.offsets[j]:batch.offsets[j + 1]]
+            if polygon_iou(poly_i, poly_j) > iou_threshold:
+                suppressed[j] = True
+    return keep
@@ -0,0 +1,275 @@
+"""
+PDF Jobs Module for EstimAgent
+Background processing of uploaded PDFs: uploads are queued as jobs and run on a small
+pool of worker threads, so the upload request returns immediately and clients poll
+for status and per-page progress instead of holding a connection open.
+
+The queue and its workers live in one process. Each job's status is also written to a
+state file next to its upload, so with several server workers (or after a restart)
+any process can answer status polls; jobs whose process died stop heartbeating and
+are reported as failed.
+"""
+
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from admission import AdmissionRejected
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class PdfJob:
+    """State and per-page progress of one PDF upload. Safe to update from a worker thread."""
+
+    def __init__(self, job_id: str, filename: str, payload: Any = None, state_path: Optional[str] = None):
+        """
+        Args:
+            job_id: Job identifier (the upload ID)
+            filename: Original PDF filename
+            payload: Whatever the runner needs to process the job (e.g. file paths)
+            state_path: File the job's status is persisted to (see load_job_state)
+        """
+        self.job_id = job_id
+        self.filename = filename
+        self.payload = payload
+        self.state_path = state_path
+
+        self.status = JOB_QUEUED
+        self.error: Optional[str] = None
+        self.total_pages: Optional[int] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        self._pages: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    def set_total_pages(self, total_pages: int) -> None:
+        with self._lock:
+            self.total_pages = total_pages
+        self.save()
+
+    def add_page(self, page: Dict[str, Any]) -> None:
+        """Record a completed page (a small summary, not the full page data)."""
+        with self._lock:
+            self._pages.append(page)
+        self.save()
+
+    def save(self) -> None:
+        """Write the current snapshot, with a heartbeat timestamp, to `state_path` (atomically)."""
+        if not self.state_path:
+            return
+        with self._save_lock:
+            state = self.snapshot()
+            state["heartbeat_at"] = time.time()
+            tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.state_path)
+            except OSError as e:
+                logger.warning(f"Could not save state of PDF job {self.job_id}: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable status with per-page progress."""
+        with self._lock:
+            pages = sorted(self._pages, key=lambda p: p.get("page_number", 0))
+            total = self.total_pages
+            done = len(pages)
+            end = self.finished_at or time.time()
+            return {
+                "job_id": self.job_id,
+                "filename": self.filename,
+                "status": self.status,
+                "error": self.error,
+                "total_pages": total,
+                "pages_done": done,
+                "progress": round(done / total, 3) if total else (1.0 if self.status == JOB_DONE else 0.0),
+                "pages": pages,
+                "queued_seconds": round((self.started_at or end) - self.created_at, 2),
+                "running_seconds": round(end - self.started_at, 2) if self.started_at else 0.0,
+            }
+
+
+def load_job_state(state_path: str, stale_after: float) -> Optional[Dict[str, Any]]:
+    """
+    Read a job snapshot saved by PdfJob.save, from any process. A queued or running job
+    whose heartbeat is older than `stale_after` seconds lost its worker (e.g. a restart)
+    and is reported as failed. Returns None when there is no readable state.
+    """
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("status") in (JOB_QUEUED, JOB_RUNNING) and time.time() - state.get("heartbeat_at", 0) > stale_after:
+        state["status"] = JOB_FAILED
+        state["error"] = "Job was interrupted before it finished (server restarted); please upload again"
+    return state
+
+
+class PdfJobQueue:
+    """
+    FIFO queue of PdfJobs served by `workers` threads calling `runner(job)`.
+
+    At most `max_queued` jobs may wait; further submissions are rejected with a 429
+    AdmissionRejected carrying a Retry-After estimate. Finished jobs stay queryable
+    for `ttl` seconds (at most `max_finished` are kept). Every `heartbeat` seconds the
+    state files of waiting and running jobs are refreshed; see `stale_after`.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[PdfJob], None],
+        workers: int = 2,
+        max_queued: int = 32,
+        ttl: float = 3600.0,
+        max_finished: int = 256,
+        name: str = "pdf",
+        heartbeat: float = 30.0,
+    ):
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self.max_finished = max_finished
+        self.name = name
+        self.heartbeat = heartbeat
+        # Persisted states not refreshed for this long belong to a process that is gone
+        self.stale_after = 3 * heartbeat
+
+        self._queue: "queue.Queue[Optional[PdfJob]]" = queue.Queue()
+        self._jobs: "OrderedDict[str, PdfJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._avg_duration = 0.0  # EWMA of job run time, in seconds
+
+        self._closed = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"{name}-job-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        threading.Thread(target=self._beat, name=f"{name}-job-heartbeat", daemon=True).start()
+
+    def submit(self, job: PdfJob) -> PdfJob:
+        """Queue a job, or raise AdmissionRejected (429) when the queue is full."""
+        with self._lock:
+            self._evict()
+            if self._queued >= self.max_queued:
+                self._rejected += 1
+                raise AdmissionRejected(
+                    f"PDF job queue is full ({self._queued} waiting)", 429, self._retry_after()
+                )
+            self._queued += 1
+            self._jobs[job.job_id] = job
+        job.save()
+        self._queue.put(job)
+        logger.info(f"PdfJobQueue '{self.name}': queued {job.job_id} ({job.filename})")
+        return job
+
+    def get(self, job_id: str) -> Optional[PdfJob]:
+        with self._lock:
+            self._evict()
+            return self._jobs.get(job_id)
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """1-based position among queued jobs, None if the job is not waiting."""
+        with self._lock:
+            waiting = [j for j in self._jobs.values() if j.status == JOB_QUEUED]
+        for position, job in enumerate(waiting, start=1):
+            if job.job_id == job_id:
+                return position
+        return None
+
+    def close(self) -> None:
+        """Stop the workers after the jobs already queued."""
+        self._closed.set()
+        for _ in self._threads:
+            self._queue.put(None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "max_queued": self.max_queued,
+                "avg_job_seconds": round(self._avg_duration, 2),
+                "tracked_jobs": len(self._jobs),
+            }
+
+    def _retry_after(self) -> int:
+        """Seconds until roughly one queue slot frees up (lock held)."""
+        backlog = self._queued + self._running
+        return max(1, int(self._avg_duration * backlog / self.workers) or 1)
+
+    def _evict(self) -> None:
+        """Drop finished jobs past their TTL, and the oldest beyond max_finished (lock held)."""
+        now = time.time()
+        finished = [j for j in self._jobs.values() if j.finished_at is not None]
+        overflow = len(finished) - self.max_finished
+        for i, job in enumerate(finished):
+            if i < overflow or now - job.finished_at > self.ttl:
+                self._jobs.pop(job.job_id, None)
+
+    def _beat(self) -> None:
+        while not self._closed.wait(self.heartbeat):
+            with self._lock:
+                active = [j for j in self._jobs.values() if j.status in (JOB_QUEUED, JOB_RUNNING)]
+            for job in active:
+                job.save()
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+            job.save()
+
+            try:
+                self.runner(job)
+                job.status = JOB_DONE
+            except Exception as e:
+                logger.error(f"PdfJobQueue '{self.name}': job {job.job_id} failed: {e}")
+                job.error = str(e)
+                job.status = JOB_FAILED
+            finally:
+                job.finished_at = time.time()
+                job.payload = None
+                job.save()
+                duration = job.finished_at - job.started_at
+                with self._lock:
+                    self._running -= 1
+                    if job.status == JOB_DONE:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+                    self._avg_duration = duration if not self._avg_duration else 0.8 * self._avg_duration + 0.2 * duration
+                logger.info(f"PdfJobQueue '{self.name}': job {job.job_id} {job.status} in {duration:.1f}s")
@@ -6,16 +6,20 @@ Handles multi-page PDF processing and page classification using Roboflow Inferen
 import os
 import logging
 import base64
+import threading
+import multiprocessing
 import requests
 from io import BytesIO
-from typing import List, Dict, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
 
 # PDF & Image processing
-import PyPDF2
-from pdf2image import convert_from_path
 from PIL import Image
 
+from rasterizer import PdfDocument, open_document, resolve_engine
+from roboflow_client import SERVERLESS_API_URL, RoboflowClientPool
+
 # Roboflow SDK for classification (used if classify_fn not provided)
 try:
     from roboflow import Roboflow
@@ -26,18 +30,95 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+THUMBNAIL_MAX_SIZE = 1200
+
+
+def _thumbnail_b64(image: Image.Image, max_size: int = THUMBNAIL_MAX_SIZE) -> str:
+    """Create a high-quality base64 thumbnail for the UI."""
+    # Resize straight to the target size instead of copying the full-resolution page first
+    scale = min(1.0, max_size / max(image.size))
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    thumb = image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0) if scale < 1.0 else image
+    
+    buffered = BytesIO()
+    thumb.save(buffered, format="JPEG", quality=85)
+    img_str = base64.b64encode(buffered.getvalue()).decode()
+    
+    return f"data:image/jpeg;base64,{img_str}"
+
+
+def _save_jpeg_atomic(image: Image.Image, image_path: str, quality: int) -> None:
+    """Write under a temporary name first so readers never see a partial file."""
+    tmp_path = f"{image_path}.tmp"
+    image.save(tmp_path, 'JPEG', quality=quality)
+    os.replace(tmp_path, image_path)
+
+
+# ------------------------------------------------------------------------------
+# Render worker processes
+# ------------------------------------------------------------------------------
+
+# Documents kept open in each worker process, so a worker opens an upload once
+_WORKER_DOCUMENTS: "OrderedDict[Tuple[str, str], PdfDocument]" = OrderedDict()
+_WORKER_MAX_DOCUMENTS = 2
+
+
+def _worker_document(pdf_path: str, engine: str) -> PdfDocument:
+    key = (pdf_path, engine)
+    document = _WORKER_DOCUMENTS.get(key)
+    if document is not None:
+        _WORKER_DOCUMENTS.move_to_end(key)
+        return document
+    document = _WORKER_DOCUMENTS[key] = open_document(pdf_path, engine)
+    while len(_WORKER_DOCUMENTS) > _WORKER_MAX_DOCUMENTS:
+        _, evicted = _WORKER_DOCUMENTS.popitem(last=False)
+        evicted.close()
+    return document
+
+
+def _render_single_page(pdf_path: str, engine: str, page_num: int, **options: Any) -> Image.Image:
+    images = _worker_document(pdf_path, engine).render(page_num, page_num, **options)
+    if not images:
+        raise Exception(f"Page {page_num} is out of range")
+    return images[0]
+
+
+def _render_preview_job(
+    pdf_path: str, engine: str, page_num: int, preview_path: str, preview_size: int
+) -> Tuple[int, str, str]:
+    """Worker: render one page at preview size, save it and encode its thumbnail."""
+    image = _render_single_page(pdf_path, engine, page_num, size=preview_size)
+    try:
+        image.save(preview_path, 'JPEG', quality=85)
+        return page_num, preview_path, _thumbnail_b64(image)
+    finally:
+        image.close()
+
+
+def _render_full_job(pdf_path: str, engine: str, page_num: int, image_path: str, dpi: int) -> str:
+    """Worker: render one page at full resolution and save it."""
+    image = _render_single_page(pdf_path, engine, page_num, dpi=dpi)
+    try:
+        _save_jpeg_atomic(image, image_path, 95)
+        return image_path
+    finally:
+        image.close()
+
+
 class PDFProcessor:
     """
     Process multi-page construction PDFs and classify pages using Roboflow hosted inference.
     """
     
-    def __init__(self, classify_fn=None):
+    def __init__(self, classify_fn=None, client_pool: RoboflowClientPool = None):
         """
         Initialize PDFProcessor.
         
         Args:
             classify_fn: Optional classification function from app.py (_classify_image).
                         If provided, will be used instead of direct HTTP requests.
+            client_pool: Shared Roboflow client pool (keep-alive connections) for the
+                        built-in classification path. A private pool is created if omitted.
         """
         # Load Configuration
         self.api_key = os.getenv('PAGE_API_KEY', '')
@@ -45,16 +126,96 @@ class PDFProcessor:
         self.project_id = os.getenv('PAGE_PROJECT', '')
         self.version = os.getenv('PAGE_VERSION', '')
         
+        # Rasterization happens in two phases:
+        # 1. every page at preview size (thumbnail + classification), PDF_RENDER_WINDOW
+        #    pages per render so peak memory is bounded by the window, not the page count
+        # 2. full resolution only for analyzable pages, or on demand via ensure_full_page
+        # with the Poppler (pdftoppm subprocess) or PyMuPDF (in-process) engine
+        self.rasterizer = resolve_engine(os.getenv('PDF_RASTERIZER', 'poppler'))
+        self.render_dpi = int(os.getenv('PDF_RENDER_DPI', '300'))
+        # Previews are sent to the page classifier as is (PDF_PREVIEW_SIZE is its input size),
+        # but never rendered below THUMBNAIL_MAX_SIZE: the UI thumbnail and the image_path of
+        # pages that are not rendered at full resolution both come from the preview
+        self.preview_size = max(int(os.getenv('PDF_PREVIEW_SIZE', '1024')), THUMBNAIL_MAX_SIZE)
+        self.render_window = max(1, int(os.getenv('PDF_RENDER_WINDOW', '2')))
+        self.classify_workers = max(1, int(os.getenv('PDF_CLASSIFY_WORKERS', '4')))
+        self.full_render_workers = max(1, int(os.getenv('PDF_FULL_RENDER_WORKERS', '2')))
+        
+        # Rendering and JPEG encoding run on PDF_RENDER_PROCESSES worker processes
+        # (0 = in this process), with at most PDF_RENDER_MAX_IN_FLIGHT pages queued at once.
+        # Defaults to one per core; on a single core the pool would only add overhead
+        cores = os.cpu_count() or 1
+        self.render_processes = max(0, int(os.getenv('PDF_RENDER_PROCESSES', str(cores if cores > 1 else 0))))
+        self.render_max_in_flight = max(1, int(os.getenv(
+            'PDF_RENDER_MAX_IN_FLIGHT', str(2 * max(1, self.render_processes))
+        )))
+        self._render_pool: Optional[ProcessPoolExecutor] = None
+        self._render_pool_lock = threading.Lock()
+        
+        # In-flight full-resolution renders, so concurrent requests for a page render it once
+        self._full_renders: Dict[str, Future] = {}
+        self._full_renders_lock = threading.Lock()
+        
         # Store classification function (from app.py)
         self.classify_fn = classify_fn
+        self.client_pool = client_pool or RoboflowClientPool()
         
         logger.info(f"PDFProcessor initialized. Project: {self.project_id}, Version: {self.version}")
+        logger.info(
+            f"Rendering with {self.rasterizer}: previews at {self.preview_size}px ({self.render_window} page(s) at a time), "
+            f"analyzable pages at {self.render_dpi} DPI"
+        )
+        if self.render_processes:
+            logger.info(f"Render pool: {self.render_processes} processes, {self.render_max_in_flight} pages in flight")
         logger.info(f"API Key: {'***' + self.api_key[-4:] if self.api_key else 'NOT SET'}")
         logger.info(f"Using {'external' if classify_fn else 'built-in'} classification function")
 
-    def process_pdf(self, pdf_path: str, output_dir: str) -> Dict[str, Any]:
+    def _pool(self) -> ProcessPoolExecutor:
+        """The render worker pool, started on first use."""
+        with self._render_pool_lock:
+            if self._render_pool is None:
+                # spawn: the parent runs threads (server, classification), which fork does not mix with
+                self._render_pool = ProcessPoolExecutor(
+                    max_workers=self.render_processes,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._render_pool
+
+    def close(self) -> None:
+        """Stop the render worker processes."""
+        with self._render_pool_lock:
+            if self._render_pool is not None:
+                self._render_pool.shutdown(wait=False, cancel_futures=True)
+                self._render_pool = None
+
+    @staticmethod
+    def full_page_path(output_dir: str, page_num: int) -> str:
+        """Where the full-resolution render of a page is (or will be) stored."""
+        return os.path.join(output_dir, f"page_{page_num}.jpg")
+
+    @staticmethod
+    def preview_page_path(output_dir: str, page_num: int) -> str:
+        """Where the preview-size render of a page is stored."""
+        return os.path.join(output_dir, f"page_{page_num}_preview.jpg")
+
+    def process_pdf(
+        self,
+        pdf_path: str,
+        output_dir: str,
+        on_start: Optional[Callable[[int], None]] = None,
+        on_page: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
         """
         Main entry point: Convert PDF to images and classify each page.
+
+        Every page gets a preview render for its thumbnail and classification; only
+        pages classified as analyzable are rendered at full resolution, and their
+        `image_path` points at that render (other pages point at the preview).
+
+        Args:
+            on_start: Called with the page count once the document is open
+            on_page: Called with each page's data as soon as that page is complete,
+                     in completion order (from the calling thread)
         """
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
@@ -62,96 +223,112 @@ class PDFProcessor:
         # 1. Create output directory
         os.makedirs(output_dir, exist_ok=True)
 
-        # 2. Get PDF Metadata
+        # 2. Open the document once; page count and every render come from it
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                total_pages = len(pdf_reader.pages)
+            document = open_document(pdf_path, self.rasterizer)
+            total_pages = document.page_count
         except Exception as e:
             logger.error(f"Failed to read PDF metadata: {e}")
             raise Exception(f"Invalid PDF file: {str(e)}")
 
         logger.info(f"Processing {total_pages} pages from {os.path.basename(pdf_path)}")
 
-        # 3. Convert PDF to Images
-        # Thread count of 4 is usually optimal for standard PDFs
-        try:
-            images = convert_from_path(
-                pdf_path, 
-                dpi=300,
-                fmt='jpeg',
-                thread_count=4
-            )
-        except Exception as e:
-            logger.error(f"pdf2image conversion failed: {e}")
-            raise Exception("Failed to convert PDF pages to images. Ensure Poppler is installed.")
-
-        # 4. Save all images first
-        image_paths = []
-        thumbnails = {}
-        
-        for i, image in enumerate(images):
-            page_num = i + 1
-            filename = f"page_{page_num}.jpg"
-            image_path = os.path.join(output_dir, filename)
-            
-            # Save full resolution image to disk
-            image.save(image_path, 'JPEG', quality=95)
-            image_paths.append((page_num, image_path))
-            
-            # Generate UI Thumbnail (Base64)
-            thumbnails[page_num] = self._generate_thumbnail_b64(image)
-        
-        # 5. Parallel Classification - Process up to 4 pages simultaneously
+        # 3. Render previews (on the worker pool, or a window at a time in process); each
+        #    page is queued for classification as soon as it is on disk
         processed_pages = []
-        max_workers = min(4, len(image_paths))  # Use up to 4 parallel workers
+        pages_by_number: Dict[int, Dict[str, Any]] = {}
+        thumbnails = {}
+        preview_paths = {}
+        max_workers = min(self.classify_workers, total_pages) or 1
+        if on_start:
+            on_start(total_pages)
         
-        logger.info(f"Starting parallel classification with {max_workers} workers for {len(image_paths)} pages")
+        logger.info(f"Starting parallel classification with {max_workers} workers for {total_pages} pages")
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all classification tasks
-            future_to_page = {
-                executor.submit(self._classify_page, image_path): page_num 
-                for page_num, image_path in image_paths
-            }
-            
-            # Collect results as they complete
-            for future in as_completed(future_to_page):
-                page_num = future_to_page[future]
-                image_path = next(path for num, path in image_paths if num == page_num)
-                
-                try:
-                    classification = future.result()
+        with document, ThreadPoolExecutor(max_workers=max_workers) as executor, \
+                ThreadPoolExecutor(max_workers=self.full_render_workers) as render_executor:
+            # Classification and full-resolution render futures -> (stage, page number)
+            pending: Dict[Future, Tuple[str, int]] = {}
+            full_renders = 0
+
+            def collect(timeout: Optional[float]) -> None:
+                """
+                4. Handle finished classifications and renders. Analyzable pages start their
+                   full-resolution render right away; a page is complete (and reported to
+                   `on_page`) once it is classified and, if analyzable, rendered.
+                """
+                nonlocal full_renders
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, page_num = pending.pop(future)
                     
-                    # Structure Data
-                    page_data = {
-                        'page_number': page_num,
-                        'image_path': image_path,
-                        'thumbnail': thumbnails.get(page_num, ""),
-                        # Classification Data
-                        'type': classification['type'],
-                        'confidence': classification['confidence'],
-                        'title': classification['title'],
-                        'analyzable': classification['analyzable'],
-                        'metadata': classification['metadata']
-                    }
+                    if stage == 'render':
+                        page_data = pages_by_number[page_num]
+                        try:
+                            page_data['image_path'] = future.result()
+                        except Exception as e:
+                            logger.error(f"Full-resolution render of page {page_num} failed: {e}")
+                            page_data['metadata']['render_error'] = str(e)
+                        if on_page:
+                            on_page(page_data)
+                        continue
                     
-                    processed_pages.append(page_data)
-                    logger.info(f"Page {page_num}: {classification['title']} ({classification['confidence']:.1%})")
+                    image_path = preview_paths[page_num]
+                    try:
+                        classification = future.result()
+                        
+                        # Structure Data
+                        page_data = {
+                            'page_number': page_num,
+                            'image_path': image_path,
+                            'thumbnail': thumbnails.get(page_num, ""),
+                            # Classification Data
+                            'type': classification['type'],
+                            'confidence': classification['confidence'],
+                            'title': classification['title'],
+                            'analyzable': classification['analyzable'],
+                            'metadata': classification['metadata']
+                        }
+                        logger.info(f"Page {page_num}: {classification['title']} ({classification['confidence']:.1%})")
+                        
+                    except Exception as e:
+                        logger.error(f"Error processing page {page_num}: {e}")
+                        # Fallback for individual page failure
+                        page_data = {
+                            'page_number': page_num,
+                            'image_path': image_path,
+                            'thumbnail': thumbnails.get(page_num, ""),
+                            'type': 'unknown',
+                            'confidence': 0.0,
+                            'title': 'Processing Error',
+                            'analyzable': False,
+                            'metadata': {'error': str(e)}
+                        }
                     
-                except Exception as e:
-                    logger.error(f"Error processing page {page_num}: {e}")
-                    # Fallback for individual page failure
-                    processed_pages.append({
-                        'page_number': page_num,
-                        'image_path': image_path,
-                        'thumbnail': thumbnails.get(page_num, ""),
-                        'type': 'unknown',
-                        'confidence': 0.0,
-                        'title': 'Processing Error',
-                        'analyzable': False,
-                        'metadata': {'error': str(e)}
-                    })
+                    processed_pages.append(page_data)
+                    pages_by_number[page_num] = page_data
+                    if page_data['analyzable']:
+                        full_renders += 1
+                        render = render_executor.submit(self.render_full_page, document, output_dir, page_num)
+                        pending[render] = ('render', page_num)
+                    elif on_page:
+                        on_page(page_data)
+
+            if self.render_processes:
+                rendered_pages = self._iter_preview_pages_parallel(document.pdf_path, output_dir, total_pages)
+            else:
+                rendered_pages = self.iter_preview_pages(document, output_dir)
+            for page_num, preview_path, thumbnail in rendered_pages:
+                preview_paths[page_num] = preview_path
+                thumbnails[page_num] = thumbnail
+                pending[executor.submit(self._classify_page, preview_path)] = ('classify', page_num)
+                collect(timeout=0)
+            
+            # 5. Wait for the remaining classifications and full-resolution renders
+            while pending:
+                collect(timeout=None)
+
+        logger.info(f"Rendered {full_renders}/{total_pages} pages at full resolution")
 
         return {
             'total_pages': total_pages,
@@ -159,30 +336,134 @@ class PDFProcessor:
             'pdf_path': pdf_path
         }
 
+    def _render_pages(self, document: PdfDocument, first: int, last: int, **options: Any) -> List[Image.Image]:
+        """Rasterize pages `first`..`last` (1-based, inclusive) of an open document."""
+        try:
+            return document.render(first, last, **options)
+        except Exception as e:
+            logger.error(f"{self.rasterizer} conversion failed for pages {first}-{last}: {e}")
+            if self.rasterizer == 'poppler':
+                raise Exception("Failed to convert PDF pages to images. Ensure Poppler is installed.")
+            raise Exception(f"Failed to convert PDF pages to images: {e}")
+
+    def iter_preview_pages(self, document: PdfDocument, output_dir: str) -> Iterator[Tuple[int, str, str]]:
+        """
+        Render every page at preview size (longest edge `preview_size`), `render_window`
+        pages at a time, yielding (page_number, preview_path, thumbnail) once each is saved.
+
+        Only the current window's images are ever in memory.
+        """
+        for first in range(1, document.page_count + 1, self.render_window):
+            last = min(first + self.render_window - 1, document.page_count)
+            images = self._render_pages(document, first, last, size=self.preview_size)
+            try:
+                for page_num, image in zip(range(first, last + 1), images):
+                    preview_path = self.preview_page_path(output_dir, page_num)
+                    image.save(preview_path, 'JPEG', quality=85)
+                    
+                    # Generate UI Thumbnail (Base64)
+                    thumbnail = self._generate_thumbnail_b64(image)
+                    yield page_num, preview_path, thumbnail
+            finally:
+                for image in images:
+                    image.close()
+                del images
+
+    def _iter_preview_pages_parallel(self, pdf_path: str, output_dir: str, total_pages: int) -> Iterator[Tuple[int, str, str]]:
+        """
+        Render previews on the worker pool, yielding (page_number, preview_path, thumbnail)
+        in completion order. At most `render_max_in_flight` pages are submitted at a time.
+        """
+        pool = self._pool()
+        pending = set()
+        next_page = 1
+        try:
+            while next_page <= total_pages or pending:
+                while next_page <= total_pages and len(pending) < self.render_max_in_flight:
+                    pending.add(pool.submit(
+                        _render_preview_job, pdf_path, self.rasterizer, next_page,
+                        self.preview_page_path(output_dir, next_page), self.preview_size
+                    ))
+                    next_page += 1
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def render_full_page(self, document: PdfDocument, output_dir: str, page_num: int) -> str:
+        """
+        Render one page at `render_dpi` to `full_page_path` and return the path.
+        Already-rendered pages are returned as is; concurrent calls share one render.
+        """
+        image_path = self.full_page_path(output_dir, page_num)
+        if os.path.exists(image_path):
+            return image_path
+
+        with self._full_renders_lock:
+            pending = self._full_renders.get(image_path)
+            owner = pending is None
+            if owner:
+                pending = self._full_renders[image_path] = Future()
+        if not owner:
+            return pending.result()
+
+        try:
+            if self.render_processes:
+                self._pool().submit(
+                    _render_full_job, document.pdf_path, self.rasterizer, page_num, image_path, self.render_dpi
+                ).result()
+            else:
+                images = self._render_pages(document, page_num, page_num, dpi=self.render_dpi)
+                if not images:
+                    raise Exception(f"Page {page_num} is out of range")
+                try:
+                    _save_jpeg_atomic(images[0], image_path, 95)
+                finally:
+                    for image in images:
+                        image.close()
+            pending.set_result(image_path)
+            return image_path
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._full_renders_lock:
+                self._full_renders.pop(image_path, None)
+
+    def ensure_full_page(self, output_dir: str, page_num: int) -> Optional[str]:
+        """
+        Full-resolution render of a page of the PDF uploaded to `output_dir`, rendering it
+        now if it was skipped (pages not classified as analyzable). None if there is no
+        source PDF in the directory or the page cannot be rendered.
+        """
+        image_path = self.full_page_path(output_dir, page_num)
+        if os.path.exists(image_path):
+            return image_path
+        
+        pdf_names = sorted(name for name in os.listdir(output_dir) if name.lower().endswith('.pdf'))
+        if not pdf_names:
+            return None
+        try:
+            logger.info(f"Rendering page {page_num} at full resolution on demand")
+            with open_document(os.path.join(output_dir, pdf_names[0]), self.rasterizer) as document:
+                return self.render_full_page(document, output_dir, int(page_num))
+        except Exception as e:
+            logger.error(f"On-demand render of page {page_num} failed: {e}")
+            return None
+
     def _classify_page(self, image_path: str) -> Dict[str, Any]:
         """
         Sends image to Roboflow Classification API.
         Uses external classify_fn if provided, otherwise uses direct HTTP POST.
         Includes retry logic for transient failures.
-        Compresses image before sending to speed up API requests.
+        `image_path` is the page preview, already at the classifier's input size.
         """
         import time
         max_retries = 3
         retry_delay = 1  # Reduced from 2 to speed up retries
         
-        # Compress image for faster API transmission
-        compressed_path = image_path.replace('.jpg', '_compressed.jpg')
-        try:
-            img = Image.open(image_path)
-            # Resize to max 1024px while maintaining aspect ratio
-            img.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
-            img.save(compressed_path, 'JPEG', quality=75, optimize=True)
-            classify_image_path = compressed_path
-            logger.debug(f"Compressed image for faster classification: {image_path}")
-        except Exception as e:
-            logger.warning(f"Could not compress image, using original: {e}")
-            classify_image_path = image_path
-        
         for attempt in range(max_retries):
             try:
                 logger.info(f"Classifying {image_path} (attempt {attempt + 1}/{max_retries})")
@@ -190,22 +471,17 @@ class PDFProcessor:
                 # Use external function if provided (from app.py)
                 if self.classify_fn:
                     result = self.classify_fn(
-                        image_path=classify_image_path,  # Use compressed image
+                        image_path=image_path,
                         project_id=self.project_id,
                         version=self.version,
                         api_key=self.api_key,
                         workspace=self.workspace
                     )
                 else:
-                    # Fallback: Use InferenceHTTPClient with serverless endpoint
-                    from inference_sdk import InferenceHTTPClient
-                    
-                    client = InferenceHTTPClient(
-                        api_url="https://serverless.roboflow.com",
-                        api_key=self.api_key
-                    )
+                    # Fallback: Use pooled client with serverless endpoint
+                    client = self.client_pool.get(SERVERLESS_API_URL, self.api_key)
                     model_id = f"{self.project_id}/{self.version}"
-                    result = client.infer(classify_image_path, model_id=model_id)  # Use compressed image
+                    result = client.infer(image_path, model_id=model_id)
                 
                 logger.debug(f"API Response keys: {result.keys()}")
                 
@@ -316,13 +592,6 @@ class PDFProcessor:
             }
         }
 
-    def _generate_thumbnail_b64(self, image: Image.Image, max_size: int = 1200) -> str:
+    def _generate_thumbnail_b64(self, image: Image.Image, max_size: int = THUMBNAIL_MAX_SIZE) -> str:
         """Create a high-quality base64 thumbnail for the UI."""
-        thumb = image.copy()
-        thumb.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-        
-        buffered = BytesIO()
-        thumb.save(buffered, format="JPEG", quality=85)
-        img_str = base64.b64encode(buffered.getvalue()).decode()
-        
-        return f"data:image/jpeg;base64,{img_str}"
\ No newline at end of file
+        return _thumbnail_b64(image, max_size)
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Rasterizer Module for EstimAgent
+Pluggable PDF rendering backends behind one interface.
+
+- poppler: pdfinfo / pdftoppm subprocesses through pdf2image (needs poppler-utils)
+- pymupdf: in-process rendering with PyMuPDF, no subprocess or temp files
+
+A rasterizer opens a document once; page count, page sizes and every render then
+come from that open document.
+"""
+
+import re
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+# In-process engine; only the Poppler engine is available without it
+try:
+    import pymupdf as fitz
+except ImportError:
+    fitz = None
+
+logger = logging.getLogger(__name__)
+
+RASTERIZERS = ("poppler", "pymupdf")
+
+# MuPDF is not thread-safe: all PyMuPDF calls in this process go through one lock
+_FITZ_LOCK = threading.Lock()
+
+_POPPLER_PAGE_SIZE = re.compile(r"^Page\s+(\d+)\s+size$")
+
+
+class PdfDocument(ABC):
+    """
+    An open PDF: page count and sizes (in points), and page rendering.
+    Engines implement `page_size` and `render`; an incomplete engine cannot be instantiated.
+    """
+
+    pdf_path: str = ""
+    page_count: int = 0
+
+    @abstractmethod
+    def page_size(self, page_num: int) -> Tuple[float, float]:
+        """(width, height) of a 1-based page in PDF points (1/72 inch)."""
+
+    @abstractmethod
+    def render(
+        self,
+        first: int,
+        last: int,
+        dpi: Optional[int] = None,
+        size: Optional[int] = None,
+    ) -> List[Image.Image]:
+        """
+        Render pages `first`..`last` (1-based, inclusive) as RGB images, either at
+        `dpi` or scaled so that the longest edge is `size` pixels.
+        """
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "PdfDocument":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class PopplerDocument(PdfDocument):
+    """Poppler backend: one pdfinfo call on open, one pdftoppm call per render."""
+
+    def __init__(self, pdf_path: str):
+        self.pdf_path = pdf_path
+        # -l beyond the last page is clamped by pdfinfo, so this lists every page size
+        info = pdfinfo_from_path(pdf_path, first_page=1, last_page=1_000_000)
+        self.page_count = int(info["Pages"])
+        self._sizes: Dict[int, Tuple[float, float]] = {}
+        for key, value in info.items():
+            match = _POPPLER_PAGE_SIZE.match(key)
+            if match:
+                width, _, height = value.split()[:3]
+                self._sizes[int(match.group(1))] = (float(width), float(height))
+
+    def page_size(self, page_num: int) -> Tuple[float, float]:
+        return self._sizes.get(page_num) or (0.0, 0.0)
+
+    def render(self, first: int, last: int, dpi: Optional[int] = None, size: Optional[int] = None) -> List[Image.Image]:
+        options: Dict[str, Any] = {"size": size} if size else {"dpi": dpi or 200}
+        return convert_from_path(
+            self.pdf_path,
+            fmt="jpeg",
+            first_page=first,
+            last_page=last,
+            thread_count=last - first + 1,
+            **options,
+        )
+
+
+class PyMuPDFDocument(PdfDocument):
+    """PyMuPDF backend: the document stays open and pages render in-process."""
+
+    def __init__(self, pdf_path: str):
+        self.pdf_path = pdf_path
+        with _FITZ_LOCK:
+            self._doc = fitz.open(pdf_path)
+            self.page_count = self._doc.page_count
+
+    def page_size(self, page_num: int) -> Tuple[float, float]:
+        with _FITZ_LOCK:
+            rect = self._doc[page_num - 1].rect
+            return float(rect.width), float(rect.height)
+
+    def render(self, first: int, last: int, dpi: Optional[int] = None, size: Optional[int] = None) -> List[Image.Image]:
+        images = []
+        for page_num in range(first, min(last, self.page_count) + 1):
+            with _FITZ_LOCK:
+                page = self._doc[page_num - 1]
+                if size:
+                    zoom = size / max(page.rect.width, page.rect.height, 1.0)
+                else:
+                    zoom = (dpi or 200) / 72.0
+                pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False, colorspace=fitz.csRGB)
+                images.append(Image.frombytes("RGB", (pix.width, pix.height), pix.samples))
+        return images
+
+    def close(self) -> None:
+        with _FITZ_LOCK:
+            self._doc.close()
+
+
+def open_document(pdf_path: str, engine: str = "poppler") -> PdfDocument:
+    """Open `pdf_path` with the named engine (see RASTERIZERS)."""
+    if engine == "pymupdf":
+        if fitz is None:
+            raise RuntimeError("PDF_RASTERIZER=pymupdf but PyMuPDF is not installed")
+        return PyMuPDFDocument(pdf_path)
+    if engine == "poppler":
+        return PopplerDocument(pdf_path)
+    raise ValueError(f"Unknown rasterizer '{engine}'. Expected one of: {', '.join(RASTERIZERS)}")
+
+
+def resolve_engine(engine: str) -> str:
+    """Validate a configured engine name, falling back to Poppler for unknown or unavailable ones."""
+    engine = (engine or "poppler").lower()
+    if engine not in RASTERIZERS:
+        logger.warning(f"Unknown rasterizer '{engine}', using poppler")
+        return "poppler"
+    if engine == "pymupdf" and fitz is None:
+        logger.warning("PyMuPDF is not installed, using poppler")
+        return "poppler"
+    return engine
@@ -0,0 +1,198 @@
+"""
+Rate Limiter Module for EstimAgent
+Per-API-key token buckets that pace outbound Roboflow calls, so bursts are smoothed
+out locally instead of turning into upstream 429s.
+
+Waiters are served in priority order: an interactive /analyze call queued behind a
+large PDF classification batch gets the next token.
+"""
+
+import time
+import heapq
+import itertools
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a call waited longer than allowed for a token."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `rate` tokens/second up to `burst` tokens.
+    """
+
+    def __init__(self, rate: float, burst: float, label: str = ""):
+        """
+        Initialize TokenBucket.
+
+        Args:
+            rate: Sustained calls per second
+            burst: Bucket capacity (calls allowed back-to-back after an idle period)
+            label: Name used in logs and stats
+        """
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.label = label
+
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+
+        self._granted = 0
+        self._delayed = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+
+    def acquire(self, priority: int = PRIORITY_BATCH, timeout: Optional[float] = None) -> float:
+        """
+        Block until a token is available for this caller.
+
+        Args:
+            priority: PRIORITY_INTERACTIVE or PRIORITY_BATCH (lower is served first)
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            RateLimitTimeout: If no token was granted within `timeout`
+        """
+        start = time.monotonic()
+        deadline = start + timeout if timeout is not None else None
+        ticket = (priority, next(self._seq))
+
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    self._refill()
+                    at_head = self._waiters[0] == ticket
+                    if at_head and self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        heapq.heappop(self._waiters)
+                        self._cond.notify_all()
+                        break
+
+                    # Head of the line sleeps until the next token; everyone else until woken
+                    wait = (1.0 - self._tokens) / self.rate if at_head else None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._timeouts += 1
+                            raise RateLimitTimeout(
+                                f"Rate limit '{self.label}': no token within {timeout:g}s"
+                            )
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                if ticket in self._waiters:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                raise
+
+            waited = time.monotonic() - start
+            self._granted += 1
+            self._total_wait += waited
+            if waited > 0.001:
+                self._delayed += 1
+            return waited
+
+    def _refill(self) -> None:
+        """Add tokens for the time elapsed since the last refill. Caller holds the lock."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            self._refill()
+            return {
+                "rate_per_sec": self.rate,
+                "burst": self.burst,
+                "tokens": round(self._tokens, 2),
+                "waiting_interactive": sum(1 for p, _ in self._waiters if p <= PRIORITY_INTERACTIVE),
+                "waiting_batch": sum(1 for p, _ in self._waiters if p > PRIORITY_INTERACTIVE),
+                "granted": self._granted,
+                "delayed": self._delayed,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": round(1000 * self._total_wait / self._granted, 1) if self._granted else 0.0,
+            }
+
+
+class KeyedRateLimiter:
+    """
+    One TokenBucket per API key. Keys without an explicit limit share the default rate.
+    """
+
+    def __init__(self, default_rate: float, default_burst: float, max_wait: Optional[float] = None):
+        """
+        Initialize KeyedRateLimiter.
+
+        Args:
+            default_rate: Calls per second for keys without an explicit limit (<= 0 disables limiting)
+            default_burst: Bucket capacity for those keys
+            max_wait: Maximum seconds a call waits for a token (None waits indefinitely)
+        """
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.max_wait = max_wait
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._limits: Dict[str, Tuple[float, float, str]] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, api_key: str, rate: Optional[float], burst: Optional[float], label: str) -> None:
+        """
+        Set the limit for one key. Keys shared by several models share one bucket,
+        so the first configuration for a key wins.
+        """
+        if not api_key:
+            return
+        if api_key in self._limits:
+            existing_rate, existing_burst, existing_label = self._limits[api_key]
+            self._limits[api_key] = (existing_rate, existing_burst, f"{existing_label}+{label}")
+            return
+        self._limits[api_key] = (
+            rate if rate is not None else self.default_rate,
+            burst if burst is not None else self.default_burst,
+            label,
+        )
+
+    def acquire(self, api_key: Optional[str], priority: int = PRIORITY_BATCH) -> float:
+        """Wait for a token for `api_key`. Returns seconds waited (0 when unlimited)."""
+        bucket = self._bucket_for(api_key or "")
+        if bucket is None:
+            return 0.0
+        waited = bucket.acquire(priority, timeout=self.max_wait)
+        if waited > 1.0:
+            logger.info(f"Rate limit '{bucket.label}': call waited {waited:.1f}s for a token")
+        return waited
+
+    def _bucket_for(self, api_key: str) -> Optional[TokenBucket]:
+        with self._lock:
+            bucket = self._buckets.get(api_key)
+            if bucket is None:
+                rate, burst, label = self._limits.get(
+                    api_key, (self.default_rate, self.default_burst, f"***{api_key[-4:]}")
+                )
+                if rate <= 0:
+                    return None
+                bucket = TokenBucket(rate, burst, label=label)
+                self._buckets[api_key] = bucket
+            return bucket
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            buckets = list(self._buckets.values())
+        return {bucket.label: bucket.stats() for bucket in buckets}
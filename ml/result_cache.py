@@ -0,0 +1,251 @@
+"""
+Result Cache Module for EstimAgent
+Content-addressed cache for analysis results with an in-memory LRU tier backed by an on-disk tier.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+
+def hash_bytes(data: bytes) -> str:
+    """Return the SHA-256 hex digest of raw content (e.g. an uploaded image)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Build a stable cache key from arbitrary JSON-serializable parts.
+
+    Parts are serialized with sorted keys so that dicts with the same content
+    always produce the same key regardless of insertion order.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache for JSON-serializable results.
+
+    - Memory tier: LRU of serialized entries, bounded by total bytes.
+    - Disk tier: one JSON file per entry under `cache_dir`, bounded by total bytes
+      and evicted least-recently-used first.
+
+    Entries are stored serialized, so every `get` returns a fresh copy that callers
+    are free to mutate.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str],
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+        name: str = "results",
+    ):
+        """
+        Initialize ResultCache.
+
+        Args:
+            cache_dir: Directory for the disk tier. If None, only the memory tier is used.
+            max_memory_bytes: Size budget for the memory tier (0 disables it).
+            max_disk_bytes: Size budget for the disk tier (0 disables it).
+            name: Label used in logs and stats.
+        """
+        self.name = name
+        self.cache_dir = cache_dir if max_disk_bytes > 0 else None
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._evictions = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._load_disk_index()
+
+        logger.info(
+            f"ResultCache '{name}' ready: memory={max_memory_bytes // (1024 * 1024)}MB, "
+            f"disk={max_disk_bytes // (1024 * 1024)}MB ({len(self._disk)} entries on disk)"
+        )
+
+    # --------------------------------------------------------------------------
+    # Public API
+    # --------------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for `key`, or None on a miss."""
+        with self._lock:
+            blob = self._memory.get(key)
+            if blob is not None:
+                self._memory.move_to_end(key)
+                self._memory_hits += 1
+                return loads(blob)
+
+            in_disk_index = key in self._disk
+
+        blob = self._read_disk(key) if in_disk_index else None
+
+        with self._lock:
+            if blob is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self._put_memory(key, blob)
+
+        return loads(blob)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store `value` under `key` in both tiers."""
+        try:
+            blob = dumps(value)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"ResultCache '{self.name}': value for {key[:12]} is not serializable: {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            self._put_memory(key, blob)
+
+        if self.cache_dir and len(blob) <= self.max_disk_bytes:
+            self._write_disk(key, blob)
+
+    def has(self, key: str) -> bool:
+        """Whether `key` is present in either tier (does not count as a lookup)."""
+        with self._lock:
+            return key in self._memory or key in self._disk
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current tier sizes."""
+        with self._lock:
+            lookups = self._memory_hits + self._disk_hits + self._misses
+            hits = self._memory_hits + self._disk_hits
+            return {
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "writes": self._writes,
+                "evictions": self._evictions,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    # --------------------------------------------------------------------------
+    # Memory tier
+    # --------------------------------------------------------------------------
+
+    def _put_memory(self, key: str, blob: bytes) -> None:
+        """Insert into the memory tier and evict LRU entries. Caller holds the lock."""
+        if self.max_memory_bytes <= 0 or len(blob) > self.max_memory_bytes:
+            return
+
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+
+        self._memory[key] = blob
+        self._memory_bytes += len(blob)
+
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._evictions += 1
+
+    # --------------------------------------------------------------------------
+    # Disk tier
+    # --------------------------------------------------------------------------
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load_disk_index(self) -> None:
+        """Rebuild the LRU index from files left by a previous process."""
+        entries = []
+        for root, _dirs, files in os.walk(self.cache_dir):
+            for filename in files:
+                if not filename.endswith(".json"):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, filename[:-5], st.st_size))
+
+        for _mtime, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+        with self._lock:
+            self._evict_disk()
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        path = self._path_for(key)
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+            os.utime(path, None)
+            return blob
+        except OSError:
+            with self._lock:
+                size = self._disk.pop(key, None)
+                if size is not None:
+                    self._disk_bytes -= size
+            return None
+
+    def _write_disk(self, key: str, blob: bytes) -> None:
+        path = self._path_for(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"ResultCache '{self.name}': failed to write {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            previous = self._disk.pop(key, None)
+            if previous is not None:
+                self._disk_bytes -= previous
+            self._disk[key] = len(blob)
+            self._disk_bytes += len(blob)
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Remove LRU files until the disk tier fits its budget. Caller holds the lock."""
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._evictions += 1
+            try:
+                os.remove(self._path_for(key))
+            except OSError:
+                pass
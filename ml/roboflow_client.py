@@ -0,0 +1,270 @@
+"""
+Roboflow Client Module for EstimAgent
+Long-lived, pooled HTTP clients for Roboflow hosted inference (detection and classification).
+
+The hosted v0 API is a single POST of a base64 image to `{api_url}/{project}/{version}`.
+Calling it through a shared `requests.Session` keeps connections alive between calls,
+so repeated model calls skip TCP/TLS setup.
+"""
+
+import io
+import os
+import base64
+import logging
+import time
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DETECT_API_URL = "https://detect.roboflow.com"
+SERVERLESS_API_URL = "https://serverless.roboflow.com"
+
+# Thresholds the service passes as fractions (like YOLO's `conf`), but the hosted API takes as percentages
+PERCENT_PARAMS = ("confidence", "overlap")
+
+# Statuses worth retrying (rate limited / transient upstream errors). Retried by `infer` itself
+# rather than urllib3, so every attempt goes through the caller's rate limiter.
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+RETRY_BACKOFF = 0.5
+MAX_RETRY_AFTER = 30.0
+
+
+class Base64Image(str):
+    """Image data that is already base64-encoded; sent to the API as is."""
+
+
+def encode_image(image: Union[str, bytes, np.ndarray, Image.Image]) -> str:
+    """
+    Encode an image as the base64 payload expected by the hosted API.
+
+    Args:
+        image: File path, Base64Image, encoded bytes, PIL image, or numpy array
+               (OpenCV BGR convention).
+
+    Raises:
+        FileNotFoundError: If a plain string is not an existing file
+    """
+    if isinstance(image, Base64Image):
+        return str(image)
+
+    if isinstance(image, str):
+        # Plain strings are always paths: a missing file fails here rather than at the API
+        if not os.path.isfile(image):
+            raise FileNotFoundError(f"Image file not found: {image}")
+        with open(image, "rb") as f:
+            return base64.b64encode(f.read()).decode("ascii")
+
+    if isinstance(image, (bytes, bytearray)):
+        return base64.b64encode(image).decode("ascii")
+
+    if isinstance(image, np.ndarray):
+        if image.ndim == 3 and image.shape[2] == 3:
+            image = image[:, :, ::-1]  # BGR -> RGB
+        image = Image.fromarray(np.ascontiguousarray(image))
+
+    if isinstance(image, Image.Image):
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=90)
+        return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    raise TypeError(f"Unsupported image type: {type(image).__name__}")
+
+
+class RoboflowClient:
+    """
+    Keep-alive client for one (API URL, API key) pair.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        api_key: str,
+        pool_maxsize: int = 16,
+        pool_block: bool = False,
+        max_retries: int = 2,
+        timeout: float = 60.0,
+    ):
+        """
+        Initialize RoboflowClient.
+
+        Args:
+            api_url: Hosted API base URL (detect or serverless)
+            api_key: Roboflow API key
+            pool_maxsize: Maximum open connections kept to the host
+            pool_block: If True, pool_maxsize is a hard per-host limit and callers wait for a free connection
+            max_retries: Retries for connection errors and retryable statuses
+            timeout: Read timeout in seconds
+        """
+        self.api_url = api_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.requests_sent = 0
+        self.retries = 0
+
+        # urllib3 only retries connection errors; retryable statuses are handled in `infer`
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=RETRY_BACKOFF,
+            status_forcelist=(),
+            allowed_methods=None,  # inference POSTs are safe to repeat
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=retry,
+        )
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/x-www-form-urlencoded"})
+
+    def infer(
+        self,
+        image: Union[str, bytes, np.ndarray, Image.Image],
+        model_id: str,
+        pace: Optional[Callable[[], Any]] = None,
+        **params: Any,
+    ) -> Dict[str, Any]:
+        """
+        Run a hosted model on one image, retrying rate-limited and transient upstream errors.
+
+        Args:
+            image: Image to send (see encode_image)
+            model_id: "project_id/version"
+            pace: Called before every attempt, retries included (e.g. to take a rate limiter token)
+            **params: Extra query parameters. `confidence` and `overlap` are fractions in [0, 1]
+                      and are sent as the percentages the hosted API expects (0.3 -> 30)
+
+        Raises:
+            ValueError: If `confidence` or `overlap` is outside [0, 1]
+            requests.exceptions.HTTPError: On a non-2xx response
+            requests.exceptions.Timeout: If the call exceeds the timeout
+            FileNotFoundError: If `image` is a path to a missing file
+        """
+        chunks = model_id.split("/")
+        if len(chunks) != 2:
+            raise ValueError(f"Invalid model id: {model_id}. Expected format: project_id/model_version_id.")
+
+        query: Dict[str, Any] = {"api_key": self.api_key}
+        for name, value in params.items():
+            if value is None:
+                continue
+            if name in PERCENT_PARAMS:
+                if not 0.0 <= float(value) <= 1.0:
+                    raise ValueError(f"{name} must be a fraction between 0 and 1, got {value}")
+                value = round(float(value) * 100, 2)
+            query[name] = value
+
+        payload = encode_image(image)
+        for attempt in range(self.max_retries + 1):
+            if pace is not None:
+                pace()
+            response = self.session.post(
+                f"{self.api_url}/{chunks[0]}/{chunks[1]}",
+                params=query,
+                data=payload,
+                timeout=(10.0, self.timeout),
+            )
+            self.requests_sent += 1
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                break
+            delay = self._retry_delay(response, attempt)
+            logger.warning(f"Roboflow {model_id} returned {response.status_code}; retrying in {delay:.1f}s")
+            self.retries += 1
+            time.sleep(delay)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _retry_delay(response: requests.Response, attempt: int) -> float:
+        """Seconds to wait before retrying: the server's Retry-After if given, else exponential backoff."""
+        retry_after = response.headers.get("Retry-After")
+        try:
+            if retry_after is not None:
+                return min(MAX_RETRY_AFTER, max(0.0, float(retry_after)))
+        except ValueError:
+            pass  # HTTP-date form: fall back to backoff
+        return RETRY_BACKOFF * (2 ** attempt)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class RoboflowClientPool:
+    """
+    Process-wide registry of RoboflowClient instances keyed by (API URL, API key).
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 16,
+        pool_block: bool = False,
+        max_retries: int = 2,
+        timeout: float = 60.0,
+    ):
+        """
+        Initialize RoboflowClientPool.
+
+        Args:
+            pool_maxsize: Per-host connection limit for each client
+            pool_block: Enforce pool_maxsize as a hard limit instead of opening overflow connections
+            max_retries: Retries for connection errors and retryable statuses
+            timeout: Read timeout in seconds
+        """
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._clients: Dict[Tuple[str, str], RoboflowClient] = {}
+        self._lock = threading.Lock()
+
+    def get(self, api_url: str, api_key: str) -> RoboflowClient:
+        """Return the shared client for this URL/key, creating it on first use."""
+        key = (api_url.rstrip("/"), api_key)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = RoboflowClient(
+                    api_url,
+                    api_key,
+                    pool_maxsize=self.pool_maxsize,
+                    pool_block=self.pool_block,
+                    max_retries=self.max_retries,
+                    timeout=self.timeout,
+                )
+                self._clients[key] = client
+                logger.info(f"Created pooled Roboflow client for {api_url} (key ***{api_key[-4:]})")
+            return client
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "pool_maxsize": self.pool_maxsize,
+                "pool_block": self.pool_block,
+                "requests": {
+                    f"{url} (***{key[-4:]})": client.requests_sent
+                    for (url, key), client in self._clients.items()
+                },
+                "retries": sum(client.retries for client in self._clients.values()),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
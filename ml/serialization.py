@@ -0,0 +1,187 @@
+"""
+Serialization Module for EstimAgent
+Single encoding path for API responses and cached results.
+
+- JSON through orjson when installed (native NumPy support, no pre-conversion walk),
+  falling back to the standard library with a `default` hook that only sees the
+  objects json cannot handle itself.
+- MessagePack for clients that send `Accept: application/msgpack`.
+- gzip or brotli compression negotiated from `Accept-Encoding`.
+- Event streams (NDJSON, or Server-Sent Events for `Accept: text/event-stream`)
+  for endpoints that report results as they complete.
+"""
+
+import gzip
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import Request
+from fastapi.responses import Response
+
+# Fast JSON encoder; the standard library is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Binary responses are only offered when msgpack is installed
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Brotli compression is only offered when brotli is installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+_ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for values the encoders do not handle natively (NumPy scalars and arrays)."""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode `obj` as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    """Decode JSON produced by `dumps`."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _accepted(header: Optional[str]) -> List[Tuple[str, float]]:
+    """Parse an Accept / Accept-Encoding header into (token, q) pairs, dropping q=0."""
+    accepted = []
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.append((token, q))
+    return accepted
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """MessagePack when the client prefers it (and msgpack is installed); JSON otherwise."""
+    if msgpack is None:
+        return JSON_MEDIA_TYPE
+    best, best_q = JSON_MEDIA_TYPE, 0.0
+    for token, q in _accepted(accept):
+        if token in MSGPACK_MEDIA_TYPES and q > best_q:
+            best, best_q = token, q
+        elif token in (JSON_MEDIA_TYPE, "application/*", "*/*") and q >= best_q:
+            best, best_q = JSON_MEDIA_TYPE, q
+    return best
+
+
+def negotiate_stream_type(accept: Optional[str]) -> str:
+    """Server-Sent Events when the client asks for them, NDJSON otherwise."""
+    best, best_q = NDJSON_MEDIA_TYPE, 0.0
+    for token, q in _accepted(accept):
+        if token == SSE_MEDIA_TYPE and q > best_q:
+            best, best_q = SSE_MEDIA_TYPE, q
+        elif token in (NDJSON_MEDIA_TYPE, "application/json", "*/*") and q >= best_q:
+            best, best_q = NDJSON_MEDIA_TYPE, q
+    return best
+
+
+def encode_event(event: str, data: Any, media_type: str = NDJSON_MEDIA_TYPE) -> bytes:
+    """
+    Frame one stream event: an SSE `event:`/`data:` block, or one NDJSON line
+    `{"event": ..., "data": ...}`.
+    """
+    if media_type == SSE_MEDIA_TYPE:
+        return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(data) + b"\n\n"
+    return dumps({"event": event, "data": data}) + b"\n"
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick "br" or "gzip" from Accept-Encoding (brotli wins ties when available)."""
+    offered = {"gzip": 1}
+    if brotli is not None:
+        offered["br"] = 2
+    best, best_rank = None, (0.0, 0)
+    for token, q in _accepted(accept_encoding):
+        candidates = offered if token == "*" else ({token: offered[token]} if token in offered else {})
+        for name, preference in candidates.items():
+            if (q, preference) > best_rank:
+                best, best_rank = name, (q, preference)
+    return best
+
+
+class ResponseEncoder:
+    """
+    Build API responses from plain result dicts, negotiating body format and compression.
+
+    Bodies smaller than `min_compress_bytes` are sent uncompressed.
+    """
+
+    def __init__(self, min_compress_bytes: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.min_compress_bytes = min_compress_bytes
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def encode(self, content: Any, accept: Optional[str] = None, accept_encoding: Optional[str] = None) -> Tuple[bytes, Dict[str, str]]:
+        """Return the encoded body and its Content-Type / Content-Encoding / Vary headers."""
+        media_type = negotiate_media_type(accept)
+        if media_type == JSON_MEDIA_TYPE:
+            body = dumps(content)
+        else:
+            body = msgpack.packb(content, default=_default, use_bin_type=True)
+
+        headers = {"content-type": media_type, "vary": "Accept, Accept-Encoding"}
+        encoding = negotiate_encoding(accept_encoding) if len(body) >= self.min_compress_bytes else None
+        if encoding == "br":
+            body = brotli.compress(body, quality=self.brotli_quality)
+            headers["content-encoding"] = "br"
+        elif encoding == "gzip":
+            body = gzip.compress(body, compresslevel=self.gzip_level)
+            headers["content-encoding"] = "gzip"
+        return body, headers
+
+    def response(self, request: Request, content: Any, status_code: int = 200) -> Response:
+        """Encode `content` for `request` as a ready-to-send Response."""
+        body, headers = self.encode(content, request.headers.get("accept"), request.headers.get("accept-encoding"))
+        media_type = headers.pop("content-type")
+        return Response(content=body, status_code=status_code, media_type=media_type, headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "json_encoder": "orjson" if orjson is not None else "json",
+            "msgpack": msgpack is not None,
+            "encodings": ["br", "gzip"] if brotli is not None else ["gzip"],
+            "min_compress_bytes": self.min_compress_bytes,
+        }
@@ -0,0 +1,68 @@
+"""Admission control: concurrency, queue limit and rejections (run with pytest)"""
+
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected
+
+
+def test_full_queue_is_rejected_with_429():
+    async def run():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=1, max_wait=5)
+        await controller.acquire(owner="first")
+
+        queued = asyncio.ensure_future(controller.acquire(owner="second"))
+        await asyncio.sleep(0)
+        assert controller.stats()["queued"] == 1
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire(owner="third")
+        assert rejected.value.status_code == 429
+        assert rejected.value.retry_after >= 1
+
+        # The queued request gets the slot once it is released
+        controller.release(owner="first")
+        await queued
+        stats = controller.stats()
+        assert (stats["active"], stats["queued"], stats["admitted"], stats["rejected_queue_full"]) == (1, 0, 2, 1)
+        controller.release(owner="second")
+        assert controller.stats()["active"] == 0
+
+    asyncio.run(run())
+
+
+def test_waiting_too_long_is_rejected_with_503():
+    async def run():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=5, max_wait=0.05)
+        await controller.acquire(owner="busy")
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire(owner="late")
+        assert rejected.value.status_code == 503
+        stats = controller.stats()
+        assert (stats["active"], stats["queued"], stats["rejected_timeout"]) == (1, 0, 1)
+
+    asyncio.run(run())
+
+
+def test_slot_can_be_released_from_another_task():
+    async def run():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=0, max_wait=1)
+        owner = object()
+        await controller.acquire(owner=owner)
+
+        async def finish_later():
+            await asyncio.sleep(0.01)
+            controller.release(owner=owner)
+
+        await asyncio.ensure_future(finish_later())
+        assert controller.stats()["active"] == 0
+        assert controller.stats()["avg_service_s"] > 0
+        assert controller._started == {}
+
+        # The slot is free again
+        await controller.acquire()
+        controller.release()
+
+    asyncio.run(run())
@@ -0,0 +1,36 @@
+"""/analyze-pages only touches upload directories we created (run with pytest)"""
+
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+import app
+
+
+@pytest.fixture
+def client():
+    return TestClient(app.app)
+
+
+def test_upload_id_cannot_escape_upload_dir(client, tmp_path):
+    outside = tmp_path / "victim_dir"
+    outside.mkdir()
+    Image.new("RGB", (200, 200), "white").save(outside / "plan.pdf", "PDF")
+    upload_id = os.path.relpath(outside, app.PDF_UPLOAD_DIR)
+
+    response = client.post("/analyze-pages", data={
+        "upload_id": upload_id, "page_numbers": "[1]", "takeoff_types": '["rooms"]',
+    })
+
+    assert response.status_code == 404
+    assert sorted(os.listdir(outside)) == ["plan.pdf"]
+
+
+@pytest.mark.parametrize("upload_id", ["..", "../pdfs", "not-a-uuid"])
+def test_non_uuid_upload_ids_are_rejected(client, upload_id):
+    response = client.post("/analyze-pages/stream", data={
+        "upload_id": upload_id, "page_numbers": "[1]", "takeoff_types": '["rooms"]',
+    })
+    assert response.status_code == 404
@@ -0,0 +1,66 @@
+"""Compact columnar response format (run with pytest)"""
+
+from compact import COMPACT_FORMAT_VERSION, compact_predictions, compact_response
+
+
+def _room(id_, points, confidence=0.9, **extra):
+    return {
+        "id": id_, "class": "room", "category": "room", "confidence": confidence,
+        "bbox": {"x": points[0][0], "y": points[0][1], "w": 10, "h": 10},
+        "mask": [{"x": x, "y": y} for x, y in points],
+        "points": [{"x": x, "y": y} for x, y in points],
+        "points_norm": [{"x": x / 100, "y": y / 100} for x, y in points],
+        "metrics": {"area_pixels": 100.0},
+        "display": {"area_sqft": 12.5},
+        **extra,
+    }
+
+
+def _polygons(columns):
+    offsets, coords = columns["vertex_offsets"], columns["coords"]
+    return [
+        [(coords[2 * v], coords[2 * v + 1]) for v in range(start, end)]
+        for start, end in zip(offsets[:-1], offsets[1:])
+    ]
+
+
+def test_columns_round_trip_every_prediction():
+    square = [(0.0, 0.0), (10.0, 0.0), (10.0, 10.0), (0.0, 10.0)]
+    triangle = [(20.5, 20.0), (30.0, 20.0), (25.0, 31.25)]
+    door = {"id": "d1", "class": "door", "category": "door", "confidence": 0.5,
+            "x": 1, "y": 2, "width": 3, "height": 4, "source": "custom"}
+    items = [_room("r1", square), _room("r2", triangle, confidence=0.7, source="roboflow"), door]
+
+    columns = compact_predictions(items)
+
+    assert columns["count"] == 3
+    assert columns["id"] == ["r1", "r2", "d1"]
+    assert columns["confidence"] == [0.9, 0.7, 0.5]
+    assert columns["bbox"] == [0.0, 0.0, 10, 10, 20.5, 20.0, 10, 10, 1, 2, 3, 4]
+    assert _polygons(columns) == [square, triangle, []]
+    assert columns["metrics"] == {"area_pixels": [100.0, 100.0, None]}
+    assert columns["display"] == {"area_sqft": [12.5, 12.5, None]}
+    assert columns["extra"] == {"source": [None, "roboflow", "custom"]}
+    # Derived copies of the outline are not repeated
+    assert "points_norm" not in columns and "mask" not in columns
+
+
+def test_quantized_coordinates_are_integer_steps():
+    columns = compact_predictions([_room("r1", [(0.0, 0.0), (10.4, 0.0), (10.6, 9.9)])], quantize=2)
+    assert columns["coords"] == [0, 0, 5, 0, 5, 5]
+    assert all(isinstance(value, int) for value in columns["coords"])
+
+
+def test_response_pages_are_compacted_and_metadata_kept():
+    page = {"page_number": 1, "success": True, "predictions": {"rooms": [_room("r1", [(0, 0), (1, 0), (1, 1)])]}}
+    response = {"success": True, "analysis_id": "a1", "results": [page, None]}
+
+    compact = compact_response(response, quantize=None)
+
+    assert compact["format"] == COMPACT_FORMAT_VERSION
+    assert compact["analysis_id"] == "a1" and compact["results"][1] is None
+    compact_page = compact["results"][0]
+    assert compact_page["page_number"] == 1
+    assert compact_page["predictions"]["rooms"]["count"] == 1
+    # The full response is left untouched for caches and the analysis store
+    assert isinstance(response["results"][0]["predictions"]["rooms"], list)
@@ -0,0 +1,32 @@
+"""Polygon de-duplication and the grid spatial index (run with pytest)"""
+
+import numpy as np
+
+from geometry import GridIndex, dedupe_polygons
+
+
+def _rect(x0, y0, x1, y1):
+    return [{"x": x0, "y": y0}, {"x": x1, "y": y0}, {"x": x1, "y": y1}, {"x": x0, "y": y1}]
+
+
+def test_degenerate_polygons_do_not_explode_the_grid():
+    # Mostly zero-width wall slivers (median extent ~0) plus one sheet-sized polygon
+    slivers = [[{"x": 10.0 * i, "y": 0}, {"x": 10.0 * i, "y": 1e-6}, {"x": 10.0 * i, "y": 0}] for i in range(500)]
+    polygons = slivers + [_rect(0, 0, 20000, 20000), _rect(100, 100, 200, 200), _rect(105, 100, 200, 200)]
+    scores = [0.5] * len(slivers) + [0.9, 0.8, 0.7]
+
+    keep = dedupe_polygons(polygons, scores, iou_threshold=0.5)
+
+    # The near-identical rectangle is suppressed, everything else survives
+    assert len(keep) == len(polygons) - 1
+    assert len(polygons) - 1 not in keep
+
+
+def test_grid_index_bounds_cell_count():
+    bounds = np.array([[0.0, 0.0, 0.0, 0.0]] * 100 + [[0.0, 0.0, 1e6, 1e6], [5.0, 5.0, 6.0, 6.0]])
+    index = GridIndex(bounds)
+
+    assert index.cell_size >= 1e6 / GridIndex.MAX_GRID_DIVISIONS
+    assert sum(len(ids) for ids in index._cells.values()) <= len(bounds) * GridIndex.MAX_CELLS_PER_ITEM
+    assert sorted(index.query(np.array([5.5, 5.5, 5.6, 5.6]))) == [100, 101]
+    assert len(index.query(np.array([-1.0, -1.0, 1e6, 1e6]))) == len(bounds)
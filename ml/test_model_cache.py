@@ -0,0 +1,88 @@
+"""Model output caching: failed model calls must not be cached (run with pytest)"""
+
+import asyncio
+import io
+
+import pytest
+from PIL import Image
+
+import app
+from result_cache import ResultCache
+
+
+@pytest.fixture
+def model_cache(monkeypatch, tmp_path):
+    cache = ResultCache(str(tmp_path), name="models-test")
+    monkeypatch.setattr(app, "model_cache", cache)
+    return cache
+
+
+def test_failed_model_call_is_retried(model_cache):
+    calls = []
+
+    def flaky_model():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("Roboflow unavailable")
+        return [{"class": "door", "confidence": 0.9}]
+
+    with pytest.raises(ConnectionError):
+        app._cached_model_call("digest", "doors/1", {"confidence": 0.3}, flaky_model)
+
+    # The failure was not remembered: the next request runs the model again
+    result = app._cached_model_call("digest", "doors/1", {"confidence": 0.3}, flaky_model)
+    assert result == [{"class": "door", "confidence": 0.9}]
+    assert len(calls) == 2
+
+    # ...and its successful output is cached
+    assert app._cached_model_call("digest", "doors/1", {"confidence": 0.3}, flaky_model) == result
+    assert len(calls) == 2
+
+
+class _FailingBatcher:
+    def predict(self, *args, **kwargs):
+        raise RuntimeError("CUDA out of memory")
+
+
+def test_custom_model_failures_propagate(monkeypatch, model_cache):
+    monkeypatch.setattr(app, "CUSTOM_WINDOW_MODEL", object())
+    monkeypatch.setattr(app, "CUSTOM_ROOM_MODEL", object())
+    monkeypatch.setattr(app, "custom_window_batcher", _FailingBatcher())
+    monkeypatch.setattr(app, "custom_room_batcher", _FailingBatcher())
+    page = Image.new("RGB", (100, 100), "white")
+
+    with pytest.raises(RuntimeError):
+        app._cached_model_call(
+            "digest", "custom-window", {}, lambda: app._run_custom_yolo_model(page, 100, 100)
+        )
+    with pytest.raises(RuntimeError):
+        app._cached_model_call(
+            "digest", "custom-room", {}, lambda: app._run_custom_room_model(page, 100, 100)
+        )
+    assert model_cache.stats()["writes"] == 0
+
+
+def test_pages_and_uploads_do_not_share_model_outputs(monkeypatch, model_cache, tmp_path):
+    # /analyze-pages runs on the full page, /analyze on a copy downsized to 1536px
+    seen_sizes = []
+
+    def fake_infer(image, model_id, api_key=None, priority=None, **kwargs):
+        width, height = image.size if isinstance(image, Image.Image) else Image.open(io.BytesIO(image)).size
+        seen_sizes.append((width, height))
+        corner = [{"x": width * 0.9, "y": height * 0.9}]
+        return {"predictions": [{"class": "room", "confidence": 0.9, "points": corner * 3}]}
+
+    monkeypatch.setattr(app, "_infer_image", fake_infer)
+    monkeypatch.setattr(app, "ROOM_MODEL_ID", "rooms/1")
+    monkeypatch.setattr(app, "ROOM_API_KEY", "key")
+    monkeypatch.setattr(app, "CUSTOM_ROOM_MODEL", None)
+    monkeypatch.setattr(app, "result_cache", None)
+
+    page_path = tmp_path / "page_1.jpg"
+    Image.new("RGB", (6000, 4000), "white").save(page_path)
+    page = asyncio.run(app._analyze_pdf_page(str(tmp_path), 1, ["rooms"], None, 0.3))
+    upload = asyncio.run(app._analyze_image_bytes(page_path.read_bytes(), "page_1.jpg", ["rooms"], None, 0.3, None, 0.0))
+
+    assert page["success"] and seen_sizes == [(6000, 4000), (1536, 1024)]
+    (room,) = upload["predictions"]["rooms"]
+    assert room["points"][0]["x"] == pytest.approx(1536 * 0.9)
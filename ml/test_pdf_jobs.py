@@ -0,0 +1,131 @@
+"""Background PDF jobs: queue limit, persisted state and stale workers (run with pytest)"""
+
+import json
+import threading
+import time
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from admission import AdmissionRejected
+from pdf_jobs import JOB_DONE, JOB_FAILED, JOB_RUNNING, PdfJob, PdfJobQueue, load_job_state
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def _run_two_pages(job):
+    job.set_total_pages(2)
+    for page_number in (2, 1):
+        job.add_page({"page_number": page_number, "analyzable": page_number == 1})
+
+
+def test_job_progress_is_persisted(tmp_path):
+    jobs = PdfJobQueue(_run_two_pages, workers=1)
+    try:
+        job = jobs.submit(PdfJob("job-1", "set.pdf", state_path=str(tmp_path / "job.json")))
+        _wait_for(lambda: job.status == JOB_DONE)
+    finally:
+        jobs.close()
+
+    state = load_job_state(str(tmp_path / "job.json"), stale_after=60)
+    assert state["status"] == JOB_DONE
+    assert (state["total_pages"], state["pages_done"], state["progress"]) == (2, 2, 1.0)
+    assert [page["page_number"] for page in state["pages"]] == [1, 2]
+    assert jobs.stats()["completed"] == 1
+
+
+def test_failed_job_keeps_its_error(tmp_path):
+    def broken(job):
+        raise ValueError("not a PDF")
+
+    jobs = PdfJobQueue(broken, workers=1)
+    try:
+        job = jobs.submit(PdfJob("job-1", "set.pdf", state_path=str(tmp_path / "job.json")))
+        _wait_for(lambda: job.status == JOB_FAILED)
+    finally:
+        jobs.close()
+
+    state = load_job_state(str(tmp_path / "job.json"), stale_after=60)
+    assert (state["status"], state["error"]) == (JOB_FAILED, "not a PDF")
+
+
+def test_full_queue_is_rejected():
+    release = threading.Event()
+    jobs = PdfJobQueue(lambda job: release.wait(5), workers=1, max_queued=1)
+    try:
+        running = jobs.submit(PdfJob("running", "a.pdf"))
+        _wait_for(lambda: running.status == JOB_RUNNING)
+        jobs.submit(PdfJob("waiting", "b.pdf"))
+        assert jobs.queue_position("waiting") == 1
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            jobs.submit(PdfJob("rejected", "c.pdf"))
+        assert rejected.value.status_code == 429 and rejected.value.retry_after >= 1
+        assert jobs.get("rejected") is None
+    finally:
+        release.set()
+        jobs.close()
+
+
+def test_heartbeat_keeps_long_jobs_fresh(tmp_path):
+    release = threading.Event()
+    jobs = PdfJobQueue(lambda job: release.wait(5), workers=1, heartbeat=0.05)
+    try:
+        job = jobs.submit(PdfJob("job-1", "set.pdf", state_path=str(tmp_path / "job.json")))
+        _wait_for(lambda: job.status == JOB_RUNNING)
+        time.sleep(0.3)  # well past stale_after (3 heartbeats) without any progress
+        assert load_job_state(str(tmp_path / "job.json"), jobs.stale_after)["status"] == JOB_RUNNING
+    finally:
+        release.set()
+        jobs.close()
+
+
+@pytest.fixture
+def other_worker_job(monkeypatch, tmp_path):
+    """A job persisted by another server process: not in this process's queue."""
+    monkeypatch.setattr(app, "PDF_UPLOAD_DIR", str(tmp_path))
+    job_id = str(uuid.uuid4())
+    (tmp_path / job_id).mkdir()
+    job = PdfJob(job_id, "set.pdf", state_path=str(tmp_path / job_id / app.PDF_JOB_STATE_FILE))
+    job.status = JOB_RUNNING
+    job.started_at = time.time()
+    job.set_total_pages(3)
+    job.add_page({"page_number": 1, "analyzable": True})
+    return job
+
+
+def test_any_worker_answers_status_polls(other_worker_job):
+    response = TestClient(app.app).get(f"/pdf-jobs/{other_worker_job.job_id}")
+
+    assert response.status_code == 200
+    state = response.json()
+    assert (state["status"], state["pages_done"], state["total_pages"]) == (JOB_RUNNING, 1, 3)
+    assert "heartbeat_at" not in state
+    assert TestClient(app.app).get(f"/pdf-jobs/{other_worker_job.job_id}/result").status_code == 409
+
+
+def test_job_of_a_dead_worker_is_reported_failed(other_worker_job):
+    with open(other_worker_job.state_path, encoding="utf-8") as f:
+        state = json.load(f)
+    state["heartbeat_at"] -= app.pdf_jobs.stale_after + 1  # its process stopped heartbeating
+    with open(other_worker_job.state_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+    client = TestClient(app.app)
+    status = client.get(f"/pdf-jobs/{other_worker_job.job_id}").json()
+    assert status["status"] == JOB_FAILED and "interrupted" in status["error"]
+    assert client.get(f"/pdf-jobs/{other_worker_job.job_id}/result").status_code == 500
+
+
+def test_unknown_or_invalid_job_ids_are_404(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "PDF_UPLOAD_DIR", str(tmp_path))
+    client = TestClient(app.app)
+    assert client.get(f"/pdf-jobs/{uuid.uuid4()}").status_code == 404
+    assert client.get("/pdf-jobs/not-a-job").status_code == 404
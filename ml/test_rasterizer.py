@@ -0,0 +1,97 @@
+"""PDF rasterizer engines against a real PDF (run with pytest; needs poppler-utils installed)"""
+
+import base64
+import io
+import shutil
+
+import pytest
+from PIL import Image
+
+from rasterizer import PdfDocument, fitz, open_document
+
+# Letter portrait, letter landscape and a wide sheet, at 72 dpi so pixels == PDF points
+PAGE_SIZES = [(612, 792), (792, 612), (1224, 792)]
+
+requires_poppler = pytest.mark.skipif(
+    shutil.which("pdfinfo") is None or shutil.which("pdftoppm") is None,
+    reason="poppler-utils is not installed",
+)
+
+
+@pytest.fixture(scope="module")
+def sheet_set(tmp_path_factory):
+    pages = [Image.new("RGB", size, color) for size, color in zip(PAGE_SIZES, ("white", "gray", "black"))]
+    path = tmp_path_factory.mktemp("pdf") / "set.pdf"
+    pages[0].save(path, "PDF", resolution=72.0, save_all=True, append_images=pages[1:])
+    return str(path)
+
+
+def _check_engine(engine, pdf_path):
+    with open_document(pdf_path, engine) as document:
+        assert document.page_count == len(PAGE_SIZES)
+        for page_num, (width, height) in enumerate(PAGE_SIZES, start=1):
+            assert document.page_size(page_num) == pytest.approx((width, height), abs=1)
+
+        previews = document.render(1, 3, size=400)
+        assert [max(image.size) for image in previews] == pytest.approx([400, 400, 400], abs=1)
+        assert previews[1].width > previews[1].height
+
+        (full,) = document.render(3, 3, dpi=144)
+        assert full.size == pytest.approx((1224 * 2, 792 * 2), abs=2)
+        assert full.getpixel((10, 10)) == pytest.approx((0, 0, 0), abs=8)
+
+
+@requires_poppler
+def test_poppler_engine(sheet_set):
+    _check_engine("poppler", sheet_set)
+
+
+@pytest.mark.skipif(fitz is None, reason="PyMuPDF is not installed")
+def test_pymupdf_engine(sheet_set):
+    _check_engine("pymupdf", sheet_set)
+
+
+@pytest.mark.parametrize("engine", [
+    pytest.param("poppler", marks=requires_poppler),
+    pytest.param("pymupdf", marks=pytest.mark.skipif(fitz is None, reason="PyMuPDF is not installed")),
+])
+def test_pdf_processor(engine, sheet_set, tmp_path, monkeypatch):
+    monkeypatch.setenv("PDF_RASTERIZER", engine)
+    monkeypatch.setenv("PDF_RENDER_PROCESSES", "0")
+    monkeypatch.setenv("PDF_RENDER_DPI", "72")
+    import pdf_processor
+
+    classified = []
+
+    def classify(image_path, **kwargs):
+        classified.append(image_path)
+        return {"top": "notes" if "page_2_" in image_path else "floor_plan", "confidence": 0.9}
+
+    processor = pdf_processor.PDFProcessor(classify_fn=classify)
+    pdf_path = str(tmp_path / "set.pdf")
+    shutil.copy(sheet_set, pdf_path)
+
+    result = processor.process_pdf(pdf_path, str(tmp_path))
+
+    assert result["total_pages"] == len(PAGE_SIZES)
+    pages = {page["page_number"]: page for page in result["pages"]}
+    assert sorted(pages) == [1, 2, 3]
+    assert [pages[n]["analyzable"] for n in (1, 2, 3)] == [True, False, True]
+    assert all(page["image_path"].endswith(".jpg") for page in pages.values())
+    assert sorted(classified) == sorted(processor.preview_page_path(str(tmp_path), n) for n in (1, 2, 3))
+
+    # Thumbnails and the preview used as a skipped page's image keep the UI thumbnail size
+    for page in pages.values():
+        thumbnail = Image.open(io.BytesIO(base64.b64decode(page["thumbnail"].split(",", 1)[1])))
+        assert max(thumbnail.size) == pdf_processor.THUMBNAIL_MAX_SIZE
+    with Image.open(pages[2]["image_path"]) as preview:
+        assert max(preview.size) == pdf_processor.THUMBNAIL_MAX_SIZE
+
+
+def test_incomplete_engine_fails_on_creation():
+    class PageSizesOnly(PdfDocument):
+        def page_size(self, page_num):
+            return (612.0, 792.0)
+
+    with pytest.raises(TypeError):
+        PageSizesOnly()
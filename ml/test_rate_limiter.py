@@ -0,0 +1,79 @@
+"""Per-key token buckets: pacing, priority and timeouts (run with pytest)"""
+
+import threading
+import time
+
+import pytest
+
+from rate_limiter import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    KeyedRateLimiter,
+    RateLimitTimeout,
+    TokenBucket,
+)
+
+
+def test_calls_beyond_the_burst_are_paced():
+    bucket = TokenBucket(rate=20, burst=2)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    # Two calls from the burst, then four at 20/s
+    assert 0.17 <= elapsed < 1.0
+    stats = bucket.stats()
+    assert stats["granted"] == 6 and stats["delayed"] >= 3
+
+
+def test_interactive_calls_jump_the_batch_queue():
+    bucket = TokenBucket(rate=10, burst=1)
+    bucket.acquire()  # empty the bucket
+    order = []
+
+    def call(priority, label):
+        bucket.acquire(priority)
+        order.append(label)
+
+    batch = [threading.Thread(target=call, args=(PRIORITY_BATCH, f"batch-{i}")) for i in range(3)]
+    for thread in batch:
+        thread.start()
+    time.sleep(0.02)  # batch calls are queued first
+    interactive = threading.Thread(target=call, args=(PRIORITY_INTERACTIVE, "interactive"))
+    interactive.start()
+    for thread in batch + [interactive]:
+        thread.join(5)
+
+    assert order[0] == "interactive"
+    assert sorted(order[1:]) == ["batch-0", "batch-1", "batch-2"]
+
+
+def test_waiting_longer_than_allowed_times_out():
+    bucket = TokenBucket(rate=1, burst=1, label="slow")
+    bucket.acquire()
+    with pytest.raises(RateLimitTimeout):
+        bucket.acquire(timeout=0.05)
+    assert bucket.stats()["timeouts"] == 1
+    assert bucket.stats()["waiting_batch"] == 0
+
+
+def test_keys_sharing_a_quota_share_a_bucket():
+    limiter = KeyedRateLimiter(default_rate=1000, default_burst=5)
+    limiter.configure("shared", 50, 3, "room")
+    limiter.configure("shared", 1, 1, "wall")  # first configuration wins
+    limiter.configure("other", None, None, "page")
+
+    for _ in range(3):
+        limiter.acquire("shared")
+    limiter.acquire("other")
+
+    stats = limiter.stats()
+    assert stats["room+wall"]["rate_per_sec"] == 50 and stats["room+wall"]["granted"] == 3
+    assert stats["page"]["rate_per_sec"] == 1000
+
+
+def test_non_positive_rate_disables_limiting():
+    limiter = KeyedRateLimiter(default_rate=0, default_burst=1)
+    assert all(limiter.acquire("key") == 0.0 for _ in range(100))
+    assert limiter.stats() == {}
@@ -0,0 +1,67 @@
+"""Two-tier result cache: LRU eviction, disk tier and copy semantics (run with pytest)"""
+
+import os
+
+from result_cache import ResultCache, make_cache_key
+from serialization import dumps
+
+
+def _value(tag):
+    # Equal-sized entries, so byte budgets translate into entry counts
+    return {"tag": tag, "predictions": [{"x": 1.0, "y": 2.0}] * 8}
+
+
+ENTRY_BYTES = len(dumps(_value("a")))
+
+
+def test_get_returns_a_copy(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.set("k", _value("a"))
+
+    first = cache.get("k")
+    first["predictions"].clear()
+    first["tag"] = "changed"
+
+    assert cache.get("k") == _value("a")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache(None, max_memory_bytes=2 * ENTRY_BYTES, max_disk_bytes=0)
+    cache.set("a", _value("a"))
+    cache.set("b", _value("b"))
+    assert cache.get("a") is not None  # "b" is now the least recently used
+    cache.set("c", _value("c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") == _value("a") and cache.get("c") == _value("c")
+    stats = cache.stats()
+    assert stats["memory_entries"] == 2 and stats["memory_bytes"] <= 2 * ENTRY_BYTES
+    assert stats["evictions"] == 1 and stats["misses"] == 1
+
+
+def test_disk_tier_evicts_files_and_serves_misses_from_memory(tmp_path):
+    cache = ResultCache(str(tmp_path), max_memory_bytes=0, max_disk_bytes=2 * ENTRY_BYTES)
+    for key in ("a", "b"):
+        cache.set(make_cache_key(key), _value(key))
+    assert cache.get(make_cache_key("a")) == _value("a")
+    cache.set(make_cache_key("c"), _value("c"))
+
+    assert cache.get(make_cache_key("b")) is None
+    assert not os.path.exists(cache._path_for(make_cache_key("b")))
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["disk_bytes"] <= 2 * ENTRY_BYTES
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    key = make_cache_key("image-digest", {"confidence": 0.3})
+    ResultCache(str(tmp_path)).set(key, _value("a"))
+
+    reopened = ResultCache(str(tmp_path))
+    assert reopened.has(key)
+    assert reopened.get(key) == _value("a")
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_cache_key_ignores_dict_order():
+    assert make_cache_key("d", {"a": 1, "b": 2}) == make_cache_key("d", {"b": 2, "a": 1})
+    assert make_cache_key("d", {"a": 1}) != make_cache_key("d", {"a": 2})
@@ -0,0 +1,91 @@
+"""Pooled Roboflow client: request parameters and images (run with pytest)"""
+
+import pytest
+import requests
+from PIL import Image
+
+import roboflow_client
+from roboflow_client import Base64Image, RoboflowClient
+from rate_limiter import KeyedRateLimiter
+
+
+class _Response:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} error")
+
+    def json(self):
+        return {"predictions": []}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = RoboflowClient("https://detect.example.com", "key", max_retries=2)
+    calls = []
+    client.statuses = []  # statuses to answer with, in order (then 200)
+
+    def post(url, params=None, data=None, timeout=None):
+        calls.append({"url": url, "params": params, "data": data})
+        status, headers = client.statuses.pop(0) if client.statuses else (200, None)
+        return _Response(status, headers)
+
+    monkeypatch.setattr(client.session, "post", post)
+    client.calls = calls
+    return client
+
+
+def test_thresholds_are_sent_as_percentages(client):
+    client.infer(Base64Image("aGVsbG8="), "rooms/2", confidence=0.3, overlap=0.5, format="json")
+    (call,) = client.calls
+    assert call["url"] == "https://detect.example.com/rooms/2"
+    assert call["params"] == {"api_key": "key", "confidence": 30.0, "overlap": 50.0, "format": "json"}
+
+
+def test_out_of_range_threshold_is_rejected(client):
+    with pytest.raises(ValueError):
+        client.infer(Base64Image("aGVsbG8="), "rooms/2", confidence=40)
+    assert client.calls == []
+
+
+def test_missing_image_path_is_not_sent(client, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        client.infer(str(tmp_path / "missing.jpg"), "rooms/2")
+
+    path = tmp_path / "page.jpg"
+    Image.new("RGB", (8, 8), "white").save(path)
+    client.infer(str(path), "rooms/2", confidence=None)
+    assert client.calls[0]["params"] == {"api_key": "key"}
+
+
+def test_rate_limited_retries_take_a_token_each(client, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(roboflow_client.time, "sleep", sleeps.append)
+    limiter = KeyedRateLimiter(default_rate=1000, default_burst=10)
+    client.statuses = [(429, {"Retry-After": "2"}), (503, None)]
+
+    client.infer(Base64Image("aGVsbG8="), "rooms/2", pace=lambda: limiter.acquire("key"))
+
+    assert len(client.calls) == 3
+    assert limiter.stats()["***key"]["granted"] == 3
+    assert sleeps == [2.0, roboflow_client.RETRY_BACKOFF * 2]
+    assert client.retries == 2
+
+
+def test_retries_give_up_with_the_last_error(client, monkeypatch):
+    monkeypatch.setattr(roboflow_client.time, "sleep", lambda seconds: None)
+    client.statuses = [(429, None)] * 3
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.infer(Base64Image("aGVsbG8="), "rooms/2")
+    assert len(client.calls) == 3
+
+
+def test_client_errors_are_not_retried(client):
+    client.statuses = [(400, None)]
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.infer(Base64Image("aGVsbG8="), "rooms/2")
+    assert len(client.calls) == 1
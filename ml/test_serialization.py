@@ -0,0 +1,79 @@
+"""Response encoding: JSON, MessagePack, compression and event framing (run with pytest)"""
+
+import gzip
+import json
+
+import numpy as np
+import pytest
+
+from serialization import (
+    JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    SSE_MEDIA_TYPE,
+    ResponseEncoder,
+    dumps,
+    encode_event,
+    loads,
+    negotiate_encoding,
+    negotiate_media_type,
+    negotiate_stream_type,
+)
+
+RESULT = {
+    "success": True,
+    "image": {"width": 1536, "height": 1024},
+    "predictions": {"rooms": [{"id": "r1", "confidence": 0.91, "points": [{"x": 1.5, "y": 2.0}] * 200}]},
+}
+
+
+def test_json_round_trip_with_numpy_values():
+    value = {"area": np.float32(1.5), "count": np.int64(3), "coords": np.arange(4, dtype=np.float64)}
+    assert loads(dumps(value)) == {"area": 1.5, "count": 3, "coords": [0.0, 1.0, 2.0, 3.0]}
+
+
+def test_msgpack_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    body, headers = ResponseEncoder().encode(RESULT, accept="application/msgpack")
+    assert headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(body, raw=False) == RESULT
+
+
+def test_brotli_round_trip():
+    brotli = pytest.importorskip("brotli")
+    body, headers = ResponseEncoder(min_compress_bytes=100).encode(RESULT, accept_encoding="gzip, br")
+    assert headers["content-encoding"] == "br"
+    assert json.loads(brotli.decompress(body)) == RESULT
+
+
+def test_msgpack_with_gzip_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    body, headers = ResponseEncoder(min_compress_bytes=100).encode(
+        RESULT, accept="application/msgpack", accept_encoding="gzip"
+    )
+    assert headers["content-encoding"] == "gzip"
+    assert msgpack.unpackb(gzip.decompress(body), raw=False) == RESULT
+
+
+def test_small_bodies_are_not_compressed():
+    body, headers = ResponseEncoder(min_compress_bytes=1 << 20).encode(RESULT, accept_encoding="gzip")
+    assert "content-encoding" not in headers
+    assert loads(body) == RESULT
+
+
+def test_negotiation_honours_q_values():
+    pytest.importorskip("msgpack")
+    assert negotiate_media_type(None) == JSON_MEDIA_TYPE
+    assert negotiate_media_type("application/json, application/msgpack;q=0.5") == JSON_MEDIA_TYPE
+    assert negotiate_media_type("application/json;q=0.5, application/msgpack") == "application/msgpack"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0") == "gzip"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_stream_type("text/event-stream") == SSE_MEDIA_TYPE
+    assert negotiate_stream_type("*/*") == NDJSON_MEDIA_TYPE
+
+
+def test_event_framing():
+    line = encode_event("page", {"page_number": 2}, NDJSON_MEDIA_TYPE)
+    assert line.endswith(b"\n") and json.loads(line) == {"event": "page", "data": {"page_number": 2}}
+
+    block = encode_event("done", {"total_pages": 3}, SSE_MEDIA_TYPE)
+    assert block == b'event: done\ndata: {"total_pages":3}\n\n'
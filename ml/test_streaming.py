@@ -0,0 +1,138 @@
+"""Streaming PDF endpoints: event order and admission slot release (run with pytest)"""
+
+import asyncio
+import json
+import threading
+import uuid
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from admission import AdmissionController
+
+
+@pytest.fixture
+def pdf_admission(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "PDF_UPLOAD_DIR", str(tmp_path))
+    controller = AdmissionController("pdf-test", 1, 0, 0.1)
+    monkeypatch.setattr(app, "pdf_admission", controller)
+    return controller
+
+
+class _FakeProcessor:
+    def process_pdf(self, pdf_path, output_dir, on_start=None, on_page=None):
+        on_start(2)
+        pages = [
+            {"page_number": 2, "analyzable": True, "image_path": None},
+            {"page_number": 1, "analyzable": False, "image_path": None},
+        ]
+        for page in pages:
+            on_page(page)
+        return {"total_pages": 2, "pages": pages}
+
+
+def _events(response):
+    return [(event["event"], event["data"]) for event in map(json.loads, response.text.splitlines())]
+
+
+def test_upload_stream_event_order(monkeypatch, pdf_admission):
+    monkeypatch.setattr(app, "pdf_processor", _FakeProcessor())
+
+    response = TestClient(app.app).post(
+        "/upload-pdf/stream", files={"file": ("set.pdf", b"%PDF-1.4", "application/pdf")}
+    )
+
+    events = _events(response)
+    assert [event for event, _ in events] == ["start", "page", "page", "done"]
+    assert events[0][1]["total_pages"] == 2
+    assert [data["page_number"] for _, data in events[1:3]] == [2, 1]
+    assert events[-1][1]["analyzable_pages"] == [2]
+    assert pdf_admission.stats()["active"] == 0
+
+
+def test_saturated_stream_is_rejected_before_saving(monkeypatch, pdf_admission, tmp_path):
+    monkeypatch.setattr(app, "pdf_processor", _FakeProcessor())
+
+    async def post_while_busy():
+        await pdf_admission.acquire(owner="busy")
+        try:
+            transport = httpx.ASGITransport(app=app.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.post(
+                    "/upload-pdf/stream", files={"file": ("set.pdf", b"%PDF-1.4", "application/pdf")}
+                )
+        finally:
+            pdf_admission.release(owner="busy")
+
+    response = asyncio.run(post_while_busy())
+
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_disconnect_keeps_slot_until_model_calls_finish(monkeypatch, pdf_admission, tmp_path):
+    upload_id = str(uuid.uuid4())
+    (tmp_path / upload_id).mkdir()
+    model_busy, finish_model = threading.Event(), threading.Event()
+
+    def slow_model():
+        model_busy.set()
+        finish_model.wait(10)
+
+    async def analyze_page(upload_dir, page_num, *args):
+        if page_num == 2:
+            await app._run_inference(slow_model)
+        return {"page_number": page_num, "success": True, "predictions": {}}
+
+    monkeypatch.setattr(app, "_analyze_pdf_page", analyze_page)
+    request = httpx.Request("POST", "http://test/analyze-pages/stream", data={
+        "upload_id": upload_id, "page_numbers": "[1, 2]", "takeoff_types": '["rooms"]',
+    })
+    body = request.read()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/analyze-pages/stream", "raw_path": b"/analyze-pages/stream",
+        "query_string": b"", "root_path": "", "client": ("test", 1), "server": ("test", 80),
+        "headers": [(key.lower().encode(), value.encode()) for key, value in request.headers.items()],
+    }
+
+    async def run():
+        received = []
+        first_page = asyncio.Event()
+
+        async def receive():
+            if not received:
+                received.append(True)
+                return {"type": "http.request", "body": body, "more_body": False}
+            # The client leaves once the first page has arrived and the second is in the model
+            await first_page.wait()
+            while not model_busy.is_set():
+                await asyncio.sleep(0.01)
+            return {"type": "http.disconnect"}
+
+        sent = []
+
+        async def send(message):
+            if message["type"] == "http.response.body" and b'"page"' in message.get("body", b""):
+                sent.append(message["body"])
+                first_page.set()
+
+        await app.app(scope, receive, send)
+        assert len(sent) == 1
+
+        # The response is over, but the model thread still runs: the slot is still taken
+        await asyncio.sleep(0.1)
+        assert pdf_admission.stats()["active"] == 1
+
+        finish_model.set()
+        for _ in range(100):
+            if pdf_admission.stats()["active"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert pdf_admission.stats()["active"] == 0
+        assert pdf_admission._started == {}
+
+    asyncio.run(run())
@@ -0,0 +1,82 @@
+"""Seam merging of tiled detections (run with pytest)"""
+
+from tiling import merge_tiled_predictions
+
+# Two 1000px tiles side by side, overlapping between x=800 and x=1000
+WINDOWS = [(0, 0, 1000, 1000), (800, 0, 1800, 1000)]
+
+
+def _polygon(cls, confidence, *points):
+    return {"class": cls, "confidence": confidence, "points": [{"x": x, "y": y} for x, y in points]}
+
+
+def _rect(cls, confidence, x0, y0, x1, y1):
+    return _polygon(cls, confidence, (x0, y0), (x1, y0), (x1, y1), (x0, y1))
+
+
+def _bounds_of(prediction):
+    xs = [pt["x"] for pt in prediction["points"]]
+    ys = [pt["y"] for pt in prediction["points"]]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def test_object_cut_by_seam_is_merged():
+    # Tile 0 sees the room cut at its right edge, tile 1 sees all of it
+    cut = _rect("room", 0.95, 700, 100, 1000, 400)
+    whole = _rect("room", 0.80, 700, 100, 1200, 400)
+    merged = merge_tiled_predictions([[cut], [whole]], WINDOWS)
+    assert len(merged) == 1
+    assert _bounds_of(merged[0]) == (700, 100, 1200, 400)
+    assert merged[0]["confidence"] == 0.95
+
+
+def test_room_larger_than_the_overlap_is_reassembled():
+    # The room spans 1200px across a 200px overlap: each tile only sees part of it
+    left_piece = _rect("room", 0.7, 300, 100, 1000, 400)
+    right_piece = _rect("room", 0.9, 800, 100, 1500, 400)
+    merged = merge_tiled_predictions([[left_piece], [right_piece]], WINDOWS)
+    assert len(merged) == 1
+    assert _bounds_of(merged[0]) == (300, 100, 1500, 400)
+    assert merged[0]["confidence"] == 0.9
+    assert (merged[0]["x"], merged[0]["width"]) == (900, 1200)
+
+    # Box predictions are merged into the box covering both pieces
+    left_box = {"class": "room", "confidence": 0.7, "x": 650, "y": 250, "width": 700, "height": 300}
+    right_box = {"class": "room", "confidence": 0.9, "x": 1150, "y": 250, "width": 700, "height": 300}
+    (box,) = merge_tiled_predictions([[left_box], [right_box]], WINDOWS)
+    assert (box["x"], box["y"], box["width"], box["height"]) == (900, 250, 1200, 300)
+
+
+def test_room_across_four_tiles_is_one_room():
+    windows = [(0, 0, 1000, 1000), (800, 0, 1800, 1000), (0, 800, 1000, 1800), (800, 800, 1800, 1800)]
+    pieces = [
+        [_rect("room", 0.9, 500, 500, 1000, 1000)],
+        [_rect("room", 0.8, 800, 500, 1500, 1000)],
+        [_rect("room", 0.7, 500, 800, 1000, 1500)],
+        [_rect("room", 0.6, 800, 800, 1500, 1500)],
+    ]
+    (room,) = merge_tiled_predictions(pieces, windows)
+    assert _bounds_of(room) == (500, 500, 1500, 1500)
+
+
+def test_l_shaped_wall_keeps_segment_inside_its_bounds():
+    l_wall = _polygon("wall", 0.9, (820, 100), (1500, 100), (1500, 120), (840, 120), (840, 900), (820, 900))
+    segment = _rect("wall", 0.8, 1100, 500, 1400, 520)  # inside the L's bounding box, not touching it
+    assert len(merge_tiled_predictions([[], [l_wall, segment]], WINDOWS)) == 2
+
+    # Same pair reported by different tiles, both reaching into the overlap band
+    segment_in_band = _rect("wall", 0.8, 850, 500, 990, 520)
+    assert len(merge_tiled_predictions([[segment_in_band], [l_wall]], WINDOWS)) == 2
+
+
+def test_room_keeps_closet_within_its_bounds():
+    room = _rect("room", 0.9, 600, 100, 1400, 900)
+    closet = _rect("room", 0.8, 850, 300, 950, 400)
+    assert len(merge_tiled_predictions([[room, closet], []], WINDOWS)) == 2
+    assert len(merge_tiled_predictions([[closet], [room]], WINDOWS)) == 2
+
+
+def test_boxes_far_from_the_overlap_are_not_merged():
+    left = {"class": "door", "confidence": 0.9, "x": 100, "y": 100, "width": 50, "height": 50}
+    right = {"class": "door", "confidence": 0.9, "x": 1700, "y": 100, "width": 50, "height": 50}
+    assert len(merge_tiled_predictions([[left], [right]], WINDOWS)) == 2
@@ -0,0 +1,54 @@
+"""Micro-batching of local YOLO calls (run with pytest)"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from yolo_batcher import BatchedYOLO
+
+
+class _FakeModel:
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, images, verbose=False, **params):
+        self.batches.append(list(images))
+        if "bad" in images:
+            raise ValueError("cannot decode image")
+        return [f"result:{image}" for image in images]
+
+
+def _predict_all(batcher, images):
+    with ThreadPoolExecutor(len(images)) as pool:
+        futures = [pool.submit(batcher.predict, image, conf=0.3) for image in images]
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_concurrent_calls_share_a_batch():
+    model = _FakeModel()
+    batcher = BatchedYOLO(model, "test", max_batch_size=8, max_wait=0.2)
+    try:
+        assert _predict_all(batcher, ["a", "b", "c"]) == ["result:a", "result:b", "result:c"]
+        assert [sorted(batch) for batch in model.batches] == [["a", "b", "c"]]
+    finally:
+        batcher.close()
+
+
+def test_bad_image_only_fails_its_own_caller():
+    model = _FakeModel()
+    batcher = BatchedYOLO(model, "test", max_batch_size=8, max_wait=0.2)
+    try:
+        outcomes = _predict_all(batcher, ["a", "bad", "c"])
+    finally:
+        batcher.close()
+
+    assert outcomes[0] == "result:a" and outcomes[2] == "result:c"
+    assert isinstance(outcomes[1], ValueError)
+    assert batcher.stats()["images"] == 2
+
+
+def test_predict_after_close_is_rejected():
+    batcher = BatchedYOLO(_FakeModel(), "test")
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.predict("a")
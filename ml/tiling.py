@@ -0,0 +1,193 @@
+"""
+Tiling Module for EstimAgent
+Cut large high-DPI sheets into overlapping tiles for detection, then map tile-local
+predictions back to sheet coordinates and merge the duplicates found along tile seams.
+
+Predictions are in the raw Roboflow format (center `x`/`y`, `width`/`height`,
+optional polygon `points`), so merged output can go through the usual normalization.
+"""
+
+import logging
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from geometry import polygon_iou, polygon_union
+
+logger = logging.getLogger(__name__)
+
+Box = Tuple[float, float, float, float]
+
+
+class TileSpec(NamedTuple):
+    """Tile edge length and overlap between neighbouring tiles, in pixels (size 0 disables tiling)."""
+    size: int
+    overlap: int
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+
+def _tile_starts(length: int, size: int, stride: int) -> List[int]:
+    if length <= size:
+        return [0]
+    starts = list(range(0, length - size, stride))
+    starts.append(length - size)  # last tile flush with the far edge
+    return starts
+
+
+def tile_windows(width: int, height: int, spec: TileSpec) -> List[Tuple[int, int, int, int]]:
+    """
+    Cover a width x height image with overlapping (x0, y0, x1, y1) tiles.
+
+    Returns a single full-image window when tiling is disabled or the image fits in one tile.
+    """
+    if not spec.enabled or (width <= spec.size and height <= spec.size):
+        return [(0, 0, width, height)]
+
+    stride = max(1, spec.size - spec.overlap)
+    return [
+        (x0, y0, min(x0 + spec.size, width), min(y0 + spec.size, height))
+        for y0 in _tile_starts(height, spec.size, stride)
+        for x0 in _tile_starts(width, spec.size, stride)
+    ]
+
+
+def shift_predictions(predictions: List[Dict[str, Any]], dx: float, dy: float) -> List[Dict[str, Any]]:
+    """Copy raw predictions with their box center and polygon points offset by (dx, dy)."""
+    shifted = []
+    for p in predictions:
+        q = dict(p)
+        if "x" in q and "y" in q:
+            q["x"] = float(q["x"]) + dx
+            q["y"] = float(q["y"]) + dy
+        if q.get("points"):
+            q["points"] = [{**pt, "x": float(pt["x"]) + dx, "y": float(pt["y"]) + dy} for pt in q["points"]]
+        shifted.append(q)
+    return shifted
+
+
+def _bounds(p: Dict[str, Any]) -> Optional[Box]:
+    """Axis-aligned (x1, y1, x2, y2) of a raw prediction, from its box or its polygon."""
+    if all(k in p for k in ("x", "y", "width", "height")):
+        x, y, w, h = float(p["x"]), float(p["y"]), float(p["width"]), float(p["height"])
+        return x - w / 2, y - h / 2, x + w / 2, y + h / 2
+    points = p.get("points")
+    if points:
+        xs = [float(pt["x"]) for pt in points]
+        ys = [float(pt["y"]) for pt in points]
+        return min(xs), min(ys), max(xs), max(ys)
+    return None
+
+
+class _TilePrediction(NamedTuple):
+    prediction: Dict[str, Any]
+    tiles: FrozenSet[int]  # tiles whose pieces make up this prediction
+    box: Box
+    polygon: Optional[np.ndarray]
+
+
+def _area(r: Box) -> float:
+    return (r[2] - r[0]) * (r[3] - r[1])
+
+
+def _intersection(a: Box, b: Box) -> Optional[Box]:
+    x0, y0, x1, y1 = max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])
+    return (x0, y0, x1, y1) if x1 > x0 and y1 > y0 else None
+
+
+def _polygon(p: Dict[str, Any]) -> Optional[np.ndarray]:
+    points = p.get("points")
+    if not points or len(points) < 3:
+        return None
+    return np.array([[float(pt["x"]), float(pt["y"])] for pt in points], dtype=np.float64)
+
+
+def _overlap_in_band(a: _TilePrediction, b: _TilePrediction, band: Box) -> float:
+    """IoU of two predictions counting only what lies inside the overlap band."""
+    if a.polygon is not None and b.polygon is not None:
+        return polygon_iou(a.polygon, b.polygon, clip=band)
+    ca, cb = _intersection(a.box, band), _intersection(b.box, band)
+    if ca is None or cb is None:
+        return 0.0
+    inter = _intersection(ca, cb)
+    if inter is None:
+        return 0.0
+    union = _area(ca) + _area(cb) - _area(inter)
+    return _area(inter) / union if union > 0 else 0.0
+
+
+def _merge_pieces(a: _TilePrediction, b: _TilePrediction) -> _TilePrediction:
+    """
+    One prediction covering both pieces of an object cut by tile edges: `a`'s fields with
+    the union of the two outlines (or the box covering both boxes) and the higher confidence.
+    """
+    merged = dict(a.prediction)
+    merged["confidence"] = max(float(a.prediction.get("confidence", 0.0)), float(b.prediction.get("confidence", 0.0)))
+    polygon = None
+    if a.polygon is not None and b.polygon is not None:
+        polygon = polygon_union(a.polygon, b.polygon)
+        merged["points"] = [{"x": float(x), "y": float(y)} for x, y in polygon.tolist()]
+        box = (*polygon.min(axis=0).tolist(), *polygon.max(axis=0).tolist())
+    else:
+        merged.pop("points", None)
+        box = (min(a.box[0], b.box[0]), min(a.box[1], b.box[1]), max(a.box[2], b.box[2]), max(a.box[3], b.box[3]))
+    merged["x"], merged["y"] = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+    merged["width"], merged["height"] = box[2] - box[0], box[3] - box[1]
+    return _TilePrediction(merged, a.tiles | b.tiles, box, polygon)
+
+
+def merge_tiled_predictions(
+    tile_predictions: Sequence[List[Dict[str, Any]]],
+    windows: Sequence[Box],
+    iou_threshold: float = 0.5,
+) -> List[Dict[str, Any]]:
+    """
+    Merge duplicate detections of the same object coming from overlapping tiles.
+
+    `tile_predictions[t]` are the (already shifted) predictions of tile `windows[t]`.
+    Only same-class predictions from two different tiles that both reach into the band
+    where those tiles overlap are candidates, so separate objects found by one tile are
+    never merged. Both tiles saw the same pixels in that band, so a pair is a duplicate
+    when their overlap inside the band exceeds `iou_threshold` (polygon IoU for polygon
+    predictions, box IoU otherwise), even if the object is cut by one tile's edge.
+
+    An object larger than the overlap is cut in every tile that sees it, so duplicates are
+    merged into one prediction covering all pieces (see `_merge_pieces`) carrying the highest
+    confidence; merged pieces keep merging with pieces from further tiles.
+    """
+    candidates: List[_TilePrediction] = []
+    unboxed: List[Dict[str, Any]] = []
+    for tile, predictions in enumerate(tile_predictions):
+        for p in predictions:
+            box = _bounds(p)
+            if box is None:
+                unboxed.append(p)
+                continue
+            candidates.append(_TilePrediction(p, frozenset((tile,)), box, _polygon(p)))
+    candidates.sort(key=lambda c: float(c.prediction.get("confidence", 0.0)), reverse=True)
+
+    def is_duplicate(c: _TilePrediction, k: _TilePrediction) -> bool:
+        (tile,) = c.tiles
+        for other in k.tiles:
+            band = _intersection(windows[tile], windows[other])
+            if band is None or _intersection(c.box, band) is None or _intersection(k.box, band) is None:
+                continue
+            if _overlap_in_band(c, k, band) > iou_threshold:
+                return True
+        return False
+
+    kept: List[_TilePrediction] = []
+    for c in candidates:
+        cls = c.prediction.get("class") or c.prediction.get("label")
+        for i, k in enumerate(kept):
+            if c.tiles <= k.tiles or (k.prediction.get("class") or k.prediction.get("label")) != cls:
+                continue
+            if is_duplicate(c, k):
+                kept[i] = _merge_pieces(k, c)
+                break
+        else:
+            kept.append(c)
+
+    return [k.prediction for k in kept] + unboxed
@@ -0,0 +1,155 @@
+"""
+YOLO Batching Module for EstimAgent
+Runs a local Ultralytics model on a single worker thread that gathers concurrent
+requests into micro-batches: one forward pass per batch instead of one per image,
+and the shared model object is only ever touched by its own thread.
+"""
+
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _BatchItem:
+    __slots__ = ("image", "params", "future")
+
+    def __init__(self, image: Any, params: Tuple[Tuple[str, Any], ...]):
+        self.image = image
+        self.params = params
+        self.future: Future = Future()
+
+
+class BatchedYOLO:
+    """
+    Micro-batching front end for one Ultralytics YOLO model.
+
+    Callers block in `predict` while a worker thread collects up to `max_batch_size`
+    requests, waiting at most `max_wait` seconds after the first one arrives, and runs
+    them through the model together. Requests with different predict parameters
+    (e.g. confidence) in the same window are run as separate batches. If a batch fails,
+    its images are retried one by one so only the failing image's caller gets the error.
+    """
+
+    def __init__(self, model: Any, name: str, max_batch_size: int = 8, max_wait: float = 0.01):
+        """
+        Initialize BatchedYOLO.
+
+        Args:
+            model: Loaded ultralytics.YOLO instance
+            name: Label used in logs, the worker thread name and stats
+            max_batch_size: Maximum images per forward pass
+            max_wait: Seconds to wait for more requests after the first one in a batch
+        """
+        self.model = model
+        self.name = name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+
+        self._queue: "queue.Queue[Optional[_BatchItem]]" = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._batches = 0
+        self._images = 0
+        self._largest_batch = 0
+        self._inference_time = 0.0
+
+        self._worker = threading.Thread(target=self._run, name=f"yolo-{name}", daemon=True)
+        self._worker.start()
+
+    def predict(self, image: Any, **params: Any) -> Any:
+        """
+        Run the model on one image and return its ultralytics Results object.
+
+        Args:
+            image: Anything Ultralytics accepts as a source (path, PIL image, numpy array)
+            **params: Predict arguments (conf, iou, ...), applied per batch
+
+        Raises:
+            RuntimeError: If the batcher has been closed
+        """
+        item = _BatchItem(image, tuple(sorted(params.items())))
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError(f"BatchedYOLO '{self.name}' is closed")
+            self._queue.put(item)
+        return item.future.result()
+
+    def close(self) -> None:
+        """Stop the worker after it finishes the requests already queued; later calls are rejected."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "batches": self._batches,
+            "images": self._images,
+            "avg_batch_size": round(self._images / self._batches, 2) if self._batches else 0.0,
+            "largest_batch": self._largest_batch,
+            "avg_batch_ms": round(1000 * self._inference_time / self._batches, 1) if self._batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(1000 * self.max_wait, 1),
+        }
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            items = [first]
+            stopping = False
+            deadline = time.monotonic() + self.max_wait
+            while len(items) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                items.append(item)
+
+            groups: Dict[Tuple[Tuple[str, Any], ...], List[_BatchItem]] = {}
+            for item in items:
+                groups.setdefault(item.params, []).append(item)
+            for params, group in groups.items():
+                self._run_batch(group, dict(params))
+
+            if stopping:
+                return
+
+    def _run_batch(self, items: List[_BatchItem], params: Dict[str, Any]) -> None:
+        start = time.monotonic()
+        try:
+            results = self.model.predict([item.image for item in items], verbose=False, **params)
+            if len(results) != len(items):
+                raise RuntimeError(f"expected {len(items)} results, got {len(results)}")
+        except Exception as e:
+            if len(items) == 1:
+                logger.error(f"BatchedYOLO '{self.name}': prediction failed: {e}")
+                items[0].future.set_exception(e)
+                return
+            # One bad image must not fail everyone batched with it: retry each on its own
+            logger.warning(f"BatchedYOLO '{self.name}': batch of {len(items)} failed ({e}); retrying one by one")
+            for item in items:
+                self._run_batch([item], params)
+            return
+
+        self._batches += 1
+        self._images += len(items)
+        self._largest_batch = max(self._largest_batch, len(items))
+        self._inference_time += time.monotonic() - start
+        for item, result in zip(items, results):
+            item.future.set_result(result)